@@ -1,452 +1,651 @@
-# -*- coding: utf-8 -*-
-from __future__ import annotations
-
-from pathlib import Path
-from typing import Iterable, Sequence
-
-import pandas as pd
-from openpyxl import load_workbook, Workbook
-
-# ==========================
-# Stałe dostępne dla UI / filtrów
-# ==========================
-KOL_UDZIALY = "Czy udziały ?"
-KOL_LOKAL = "Przeznaczenie (dla lokalu)"
-KOL_KW = "Nr KW"
-SHEET_ROBOCZY = "roboczy"
-
-SHEET_RAPORT = "raport"
-SHEET_RAPORT_ODF = "raport_odfiltrowane"
-
-# kolumny adresowe wymagane w „raport”
-ADDRESS_COLUMNS_ORDER: list[str] = [
-    "Nr KW",
-    "Typ Księgi",
-    "Stan Księgi",
-    "Województwo",
-    "Powiat",
-    "Gmina",
-    "Miejscowość",
-    "Dzielnica",
-    "Położenie",
-    "Nr działek po średniku",
-    "Obręb po średniku",
-    "Ulica",
-    "Sposób korzystania",
-    "Obszar",
-    "Ulica(dla budynku)",
-    "Przeznaczenie (dla budynku)",
-    "Ulica(dla lokalu)",
-    "Nr budynku( dla lokalu)",
-    "Przeznaczenie (dla lokalu)",
-    "Cały adres (dla lokalu)",
-    "Czy udziały ?",
-]
-
-# kolumny dla bazy „Baza danych.xlsx” / arkusza „Mieszkania”
-BAZA_MIESZKANIA_HEADERS: list[str] = [
-    "cena",
-    "cena_za_metr",
-    "metry",
-    "liczba_pokoi",
-    "pietro",
-    "rynek",
-    "rok_budowy",
-    "material",
-    "wojewodztwo",
-    "powiat",
-    "gmina",
-    "miejscowosc",
-    "dzielnica",
-    "ulica",
-    "link",
-]
-
-
-# ==========================
-# Proste utilsy Excela (roboczy)
-# ==========================
-def excel_first_sheet_name(file_path: Path) -> str:
-    """Zwróć nazwę pierwszego arkusza w skoroszycie."""
-    xls = pd.ExcelFile(file_path, engine="openpyxl")
-    if not xls.sheet_names:
-        raise ValueError("Plik nie zawiera żadnych arkuszy.")
-    return xls.sheet_names[0]
-
-
-def clone_first_sheet_to_roboczy(file_path: Path, source_sheet: str) -> None:
-    """
-    Usuń istniejący arkusz 'roboczy' i utwórz go na nowo
-    jako pełną kopię arkusza źródłowego (z formatowaniem i formułami).
-    """
-    wb = load_workbook(file_path)
-    if source_sheet not in wb.sheetnames:
-        wb.close()
-        raise ValueError(f"Brak arkusza źródłowego: {source_sheet}")
-
-    if SHEET_ROBOCZY in wb.sheetnames:
-        wb.remove(wb[SHEET_ROBOCZY])
-
-    ws_src = wb[source_sheet]
-    ws_new = wb.copy_worksheet(ws_src)
-    ws_new.title = SHEET_ROBOCZY
-
-    wb.save(file_path)
-    wb.close()
-
-
-def ensure_roboczy_on_start(file_path: Path, source_sheet: str) -> None:
-    wb = load_workbook(file_path)
-    has_roboczy = SHEET_ROBOCZY in wb.sheetnames
-    wb.close()
-    if not has_roboczy:
-        clone_first_sheet_to_roboczy(file_path, source_sheet)
-
-
-def _coerce_text_cols(df: pd.DataFrame) -> pd.DataFrame:
-    for col in (KOL_UDZIALY, KOL_LOKAL, KOL_KW):
-        if col in df.columns:
-            df[col] = df[col].astype("string")
-    return df
-
-
-def read_original_and_view(file_path: Path, source_sheet: str) -> tuple[pd.DataFrame, pd.DataFrame]:
-    df_original = pd.read_excel(file_path, sheet_name=source_sheet, engine="openpyxl")
-    df_original = _coerce_text_cols(df_original)
-
-    try:
-        df_view = pd.read_excel(file_path, sheet_name=SHEET_ROBOCZY, engine="openpyxl")
-        df_view = _coerce_text_cols(df_view)
-    except ValueError:
-        # brak arkusza 'roboczy'
-        df_view = df_original.copy()
-
-    return df_original, df_view
-
-
-def write_view_to_roboczy(file_path: Path, df_view: pd.DataFrame) -> None:
-    """
-    Zapisz df_view do arkusza 'roboczy' (wartości; formatowanie nie jest zachowywane).
-    """
-    with pd.ExcelWriter(file_path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-        df_view.to_excel(writer, sheet_name=SHEET_ROBOCZY, index=False)
-
-
-# ==========================
-# Walidacja/utworzenie plików/arkuszy z nagłówkami
-# ==========================
-def ensure_workbook_and_sheet_with_header(
-    file_path: Path,
-    sheet_name: str,
-    headers: Sequence[str],
-) -> None:
-    """
-    Zapewnij istnienie pliku Excela, arkusza i wiersza nagłówków.
-    Jeśli arkusz istnieje, dołóż brakujące kolumny na końcu.
-    """
-    file_path = Path(file_path)
-    if not file_path.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.title = sheet_name
-        ws.append(list(headers))
-        wb.save(file_path)
-        wb.close()
-        return
-
-    wb = load_workbook(file_path)
-    if sheet_name not in wb.sheetnames:
-        ws = wb.create_sheet(title=sheet_name)
-        ws.append(list(headers))
-        wb.save(file_path)
-        wb.close()
-        return
-
-    # arkusz istnieje – uzupełnij brakujące kolumny
-    ws = wb[sheet_name]
-    existing = [c.value if c.value is not None else "" for c in next(ws.iter_rows(min_row=1, max_row=1))]
-    existing = [str(x) for x in existing]
-    if all(v == "" for v in existing):
-        # pusty nagłówek – nadpisz
-        ws.delete_rows(1, 1)
-        ws.append(list(headers))
-        wb.save(file_path)
-        wb.close()
-        return
-
-    # dołóż brakujące
-    missing = [h for h in headers if h not in existing]
-    if missing:
-        # dopisz puste komórki nagłówka na końcu
-        for i, name in enumerate(missing, start=len(existing) + 1):
-            ws.cell(row=1, column=i, value=name)
-    wb.save(file_path)
-    wb.close()
-
-
-def append_rows_dicts(
-    file_path: Path,
-    sheet_name: str,
-    rows: Iterable[dict],
-    headers: Sequence[str],
-) -> None:
-    """
-    Dopisz wiersze (dict) do istniejącego arkusza – zgodnie z kolejnością `headers`.
-    Brakujące klucze traktowane są jako puste.
-    """
-    ensure_workbook_and_sheet_with_header(file_path, sheet_name, headers)
-
-    wb = load_workbook(file_path)
-    ws = wb[sheet_name]
-    for row in rows:
-        ws.append([row.get(h, "") for h in headers])
-    wb.save(file_path)
-    wb.close()
-
-
-# ==========================
-# Narzędzia do arkuszy: RAPORT / RAPORT_ODFILTROWANE
-# ==========================
-def _norm_text(s: str | None) -> str:
-    import re, unicodedata
-
-    if s is None:
-        return ""
-    s = str(s).strip()
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-    s = s.casefold()
-    s = re.sub(r"[ \t\r\n\.\-\_\?\(\)]", "", s)
-    return s
-
-
-def ensure_raport_odfiltrowane(file_path: Path, raport_sheet: str = SHEET_RAPORT) -> None:
-    """
-    Utwórz arkusz 'raport_odfiltrowane' jeśli nie istnieje i skopiuj wiersz nagłówka
-    z arkusza 'raport'.
-    """
-    file_path = Path(file_path)
-    wb = load_workbook(file_path)
-    if raport_sheet not in wb.sheetnames:
-        wb.close()
-        raise ValueError(f"Brak arkusza źródłowego: {raport_sheet}")
-
-    ws_src = wb[raport_sheet]
-    headers = [c.value for c in next(ws_src.iter_rows(min_row=1, max_row=1))]
-    headers = [h if h is not None else "" for h in headers]
-
-    if SHEET_RAPORT_ODF not in wb.sheetnames:
-        ws_new = wb.create_sheet(SHEET_RAPORT_ODF)
-        ws_new.append(headers)
-        wb.save(file_path)
-        wb.close()
-        return
-
-    # jeśli istnieje – upewnij nagłówki (dołóż brakujące)
-    ws = wb[SHEET_RAPORT_ODF]
-    cur = [c.value for c in next(ws.iter_rows(min_row=1, max_row=1))]
-    cur = [x if x is not None else "" for x in cur]
-    missing = [h for h in headers if h not in cur]
-    for i, name in enumerate(missing, start=len(cur) + 1):
-        ws.cell(row=1, column=i, value=name)
-
-    wb.save(file_path)
-    wb.close()
-
-
-def _read_sheet_df(file_path: Path, sheet: str) -> pd.DataFrame:
-    return pd.read_excel(file_path, sheet_name=sheet, engine="openpyxl")
-
-
-def _write_sheet_df(file_path: Path, sheet: str, df: pd.DataFrame) -> None:
-    with pd.ExcelWriter(file_path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-        df.to_excel(writer, sheet_name=sheet, index=False)
-
-
-def filter_raport_move_to_odf(file_path: Path, mode: str) -> dict:
-    """
-    Wykonaj operację filtrowania/przerzucania między 'raport' a 'raport_odfiltrowane'.
-
-    mode:
-      - 'brak'   → nic nie rób
-      - 'jeden'  → w 'raport' znajdź wiersze gdzie KOL_UDZIALY == 'tak' (case-insens) i przerzuć do ODF
-      - 'lokal'  → w 'raport' znajdź wiersze gdzie KOL_LOKAL != 'LOKAL MIESZKALNY' i przerzuć do ODF
-      - 'oba'    → przenieś wiersze spełniające którykolwiek z ww. warunków
-      - 'cofnij' → przenieś WSZYSTKIE wiersze z ODF z powrotem do 'raport' i wyczyść ODF (zostaw nagłówek)
-
-    Zwraca słownik ze statystykami: {"moved_to_odf": int, "returned_to_raport": int}
-    """
-    file_path = Path(file_path)
-    ensure_raport_odfiltrowane(file_path, SHEET_RAPORT)
-
-    if mode == "brak":
-        return {"moved_to_odf": 0, "returned_to_raport": 0}
-
-    if mode == "cofnij":
-        # przenieś wszystkie z ODF do raport
-        df_r = _read_sheet_df(file_path, SHEET_RAPORT)
-        try:
-            df_odf = _read_sheet_df(file_path, SHEET_RAPORT_ODF)
-        except ValueError:
-            df_odf = pd.DataFrame(columns=list(df_r.columns))
-
-        # usuń nagłówek logiczny – DataFrame już go nie ma, ale upewnij kolumny
-        df_odf = df_odf[df_odf.notna().any(axis=1)]
-
-        returned = len(df_odf)
-        if returned:
-            # dopasuj kolumny
-            for c in df_r.columns:
-                if c not in df_odf.columns:
-                    df_odf[c] = pd.NA
-            df_odf = df_odf[df_r.columns]
-            df_r2 = pd.concat([df_r, df_odf], ignore_index=True)
-        else:
-            df_r2 = df_r
-
-        # zapisz: raport = scalony, odf = tylko nagłówek
-        _write_sheet_df(file_path, SHEET_RAPORT, df_r2)
-        _write_sheet_df(file_path, SHEET_RAPORT_ODF, pd.DataFrame(columns=list(df_r2.columns)))
-        return {"moved_to_odf": 0, "returned_to_raport": returned}
-
-    # pozostałe tryby – przerzucamy z raport → odfiltrowane
-    df_r = _read_sheet_df(file_path, SHEET_RAPORT)
-    try:
-        df_odf = _read_sheet_df(file_path, SHEET_RAPORT_ODF)
-    except ValueError:
-        df_odf = pd.DataFrame(columns=list(df_r.columns))
-
-    def _col(df: pd.DataFrame, wanted: str) -> str | None:
-        target = _norm_text(wanted)
-        mapping = {c: _norm_text(str(c)) for c in df.columns}
-        for c, n in mapping.items():
-            if n == target or target in n:
-                return c
-        return None
-
-    col_ud = _col(df_r, KOL_UDZIALY)
-    col_lok = _col(df_r, KOL_LOKAL)
-
-    mask_jeden = pd.Series([False] * len(df_r))
-    if col_ud:
-        ser = df_r[col_ud].astype("string").fillna("").str.strip().str.casefold()
-        mask_jeden = ser == "tak"
-
-    def _is_lokal_mieszkalny(x) -> bool:
-        return _norm_text(str(x)) == "lokalmieszkalny"
-
-    mask_lokal = pd.Series([False] * len(df_r))
-    if col_lok:
-        mask_lokal = ~df_r[col_lok].apply(_is_lokal_mieszkalny)
-
-    if mode == "jeden":
-        to_move = mask_jeden
-    elif mode == "lokal":
-        to_move = mask_lokal
-    elif mode == "oba":
-        to_move = mask_jeden | mask_lokal
-    else:
-        raise ValueError("Nieznany tryb filtrowania: " + str(mode))
-
-    df_move = df_r[to_move].copy()
-    moved = len(df_move)
-    if moved == 0:
-        return {"moved_to_odf": 0, "returned_to_raport": 0}
-
-    # dopasuj kolumny i dołącz do ODF
-    for c in df_r.columns:
-        if c not in df_odf.columns:
-            df_odf[c] = pd.NA
-    df_move = df_move[df_odf.columns] if set(df_odf.columns) == set(df_r.columns) else df_move[df_r.columns]
-    df_odf2 = pd.concat([df_odf, df_move], ignore_index=True)
-
-    # usuń z raportu przenoszone (tu: wyrzucamy całe wiersze)
-    df_keep = df_r[~to_move].copy()
-
-    _write_sheet_df(file_path, SHEET_RAPORT, df_keep)
-    _write_sheet_df(file_path, SHEET_RAPORT_ODF, df_odf2)
-
-    return {"moved_to_odf": moved, "returned_to_raport": 0}
-
-
-# ==========================
-# Kolumna „Położenie” – składanie/uzupełnianie
-# ==========================
-def compose_polozenie(
-    woj: str = "",
-    powiat: str = "",
-    gmina: str = "",
-    miejscowosc: str = "",
-    dzielnica: str = "",
-    ulica: str = "",
-) -> str:
-    """Złożenie pola 'Położenie' jako 'Województwo; Powiat; Gmina; Miejscowość; Dzielnica; Ulica'."""
-    parts = [woj, powiat, gmina, miejscowosc, dzielnica, ulica]
-    cleaned = [str(p).strip() for p in parts if str(p).strip()]
-    return "; ".join(cleaned)
-
-
-def update_polozenie_column(file_path: Path, sheet: str = SHEET_RAPORT) -> int:
-    """
-    Uzupełnij/odśwież kolumnę 'Położenie' w podanym arkuszu na podstawie kolumn:
-    Województwo, Powiat, Gmina, Miejscowość, Dzielnica, Ulica.
-
-    Zwraca liczbę zaktualizowanych wierszy.
-    """
-    df = _read_sheet_df(file_path, sheet)
-    changed = 0
-    for col in ["Położenie", "Województwo", "Powiat", "Gmina", "Miejscowość", "Dzielnica", "Ulica"]:
-        if col not in df.columns:
-            # dołóż brakujące kolumny
-            df[col] = ""
-
-    new_vals = []
-    for _, r in df.iterrows():
-        s = compose_polozenie(r["Województwo"], r["Powiat"], r["Gmina"], r["Miejscowość"], r["Dzielnica"], r["Ulica"])
-        new_vals.append(s)
-    if "Położenie" in df.columns:
-        changed = int((df["Położenie"].fillna("") != pd.Series(new_vals)).sum())
-    df["Położenie"] = new_vals
-    _write_sheet_df(file_path, sheet, df)
-    return changed
-
-
-def reorder_columns_by_header(
-    file_path: Path,
-    sheet: str,
-    desired_order: Sequence[str],
-    keep_others_at_end: bool = True,
-) -> None:
-    """
-    Ułóż kolumny w arkuszu wg `desired_order`. Brakujące dopisz puste, nieznane zostaw na końcu (domyślnie).
-    """
-    df = _read_sheet_df(file_path, sheet)
-    # dołóż brakujące
-    for c in desired_order:
-        if c not in df.columns:
-            df[c] = pd.NA
-    ordered = [c for c in desired_order if c in df.columns]
-    if keep_others_at_end:
-        rest = [c for c in df.columns if c not in ordered]
-        new_cols = ordered + rest
-    else:
-        new_cols = ordered
-    df = df[new_cols]
-    _write_sheet_df(file_path, sheet, df)
-
-
-# ==========================
-# Baza danych: upewnij plik/arkusz/nagłówki i dopisz dane
-# ==========================
-def ensure_baza_mieszkania(file_path: Path, sheet: str = "Mieszkania") -> None:
-    """
-    Zapewnij plik Excela dla bazy danych i arkusz z wymaganymi kolumnami.
-    """
-    ensure_workbook_and_sheet_with_header(file_path, sheet, BAZA_MIESZKANIA_HEADERS)
-
-
-def append_mieszkania_rows(file_path: Path, rows: Iterable[dict], sheet: str = "Mieszkania") -> None:
-    """
-    Dopisz rekordy ogłoszeń do arkusza 'Mieszkania' w 'Baza danych.xlsx'.
-    """
-    append_rows_dicts(file_path, sheet, rows, BAZA_MIESZKANIA_HEADERS)
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import pickle
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+import pandas as pd
+from openpyxl import load_workbook, Workbook
+
+# ==========================
+# Stałe dostępne dla UI / filtrów
+# ==========================
+KOL_UDZIALY = "Czy udziały ?"
+KOL_LOKAL = "Przeznaczenie (dla lokalu)"
+KOL_KW = "Nr KW"
+SHEET_ROBOCZY = "roboczy"
+
+SHEET_RAPORT = "raport"
+SHEET_RAPORT_ODF = "raport_odfiltrowane"
+
+# kolumny adresowe wymagane w „raport”
+ADDRESS_COLUMNS_ORDER: list[str] = [
+    "Nr KW",
+    "Typ Księgi",
+    "Stan Księgi",
+    "Województwo",
+    "Powiat",
+    "Gmina",
+    "Miejscowość",
+    "Dzielnica",
+    "Położenie",
+    "Nr działek po średniku",
+    "Obręb po średniku",
+    "Ulica",
+    "Sposób korzystania",
+    "Obszar",
+    "Ulica(dla budynku)",
+    "Przeznaczenie (dla budynku)",
+    "Ulica(dla lokalu)",
+    "Nr budynku( dla lokalu)",
+    "Przeznaczenie (dla lokalu)",
+    "Cały adres (dla lokalu)",
+    "Czy udziały ?",
+]
+
+# kolumny dla bazy „Baza danych.xlsx” / arkusza „Mieszkania”
+BAZA_MIESZKANIA_HEADERS: list[str] = [
+    "cena",
+    "cena_za_metr",
+    "metry",
+    "liczba_pokoi",
+    "pietro",
+    "rynek",
+    "rok_budowy",
+    "material",
+    "wojewodztwo",
+    "powiat",
+    "gmina",
+    "miejscowosc",
+    "dzielnica",
+    "ulica",
+    "link",
+]
+
+
+# ==========================
+# Proste utilsy Excela (roboczy)
+# ==========================
+def excel_first_sheet_name(file_path: Path) -> str:
+    """Zwróć nazwę pierwszego arkusza w skoroszycie."""
+    return probe_workbook(file_path).first_sheet()
+
+
+def clone_first_sheet_to_roboczy(file_path: Path, source_sheet: str) -> None:
+    """
+    Usuń istniejący arkusz 'roboczy' i utwórz go na nowo
+    jako pełną kopię arkusza źródłowego (z formatowaniem i formułami).
+    """
+    wb = load_workbook(file_path)
+    if source_sheet not in wb.sheetnames:
+        wb.close()
+        raise ValueError(f"Brak arkusza źródłowego: {source_sheet}")
+
+    if SHEET_ROBOCZY in wb.sheetnames:
+        wb.remove(wb[SHEET_ROBOCZY])
+
+    ws_src = wb[source_sheet]
+    ws_new = wb.copy_worksheet(ws_src)
+    ws_new.title = SHEET_ROBOCZY
+
+    wb.save(file_path)
+    wb.close()
+
+
+def ensure_roboczy_on_start(file_path: Path, source_sheet: str) -> None:
+    if SHEET_ROBOCZY not in probe_workbook(file_path).sheet_names:
+        clone_first_sheet_to_roboczy(file_path, source_sheet)
+
+
+def _coerce_text_cols(df: pd.DataFrame) -> pd.DataFrame:
+    for col in (KOL_UDZIALY, KOL_LOKAL, KOL_KW):
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    return df
+
+
+def read_original_and_view(file_path: Path, source_sheet: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    df_original = pd.read_excel(file_path, sheet_name=source_sheet, engine="openpyxl")
+    df_original = _coerce_text_cols(df_original)
+
+    try:
+        df_view = pd.read_excel(file_path, sheet_name=SHEET_ROBOCZY, engine="openpyxl")
+        df_view = _coerce_text_cols(df_view)
+    except ValueError:
+        # brak arkusza 'roboczy'
+        df_view = df_original.copy()
+
+    return df_original, df_view
+
+
+def write_view_to_roboczy(file_path: Path, df_view: pd.DataFrame) -> None:
+    """
+    Zapisz df_view do arkusza 'roboczy' (wartości; formatowanie nie jest zachowywane).
+    """
+    with pd.ExcelWriter(file_path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+        df_view.to_excel(writer, sheet_name=SHEET_ROBOCZY, index=False)
+
+
+# ==========================
+# Walidacja/utworzenie plików/arkuszy z nagłówkami
+# ==========================
+def ensure_workbook_and_sheet_with_header(
+    file_path: Path,
+    sheet_name: str,
+    headers: Sequence[str],
+) -> None:
+    """
+    Zapewnij istnienie pliku Excela, arkusza i wiersza nagłówków.
+    Jeśli arkusz istnieje, dołóż brakujące kolumny na końcu.
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        wb = Workbook()
+        ws = wb.active
+        ws.title = sheet_name
+        ws.append(list(headers))
+        wb.save(file_path)
+        wb.close()
+        return
+
+    wb = load_workbook(file_path)
+    if sheet_name not in wb.sheetnames:
+        ws = wb.create_sheet(title=sheet_name)
+        ws.append(list(headers))
+        wb.save(file_path)
+        wb.close()
+        return
+
+    # arkusz istnieje – uzupełnij brakujące kolumny
+    ws = wb[sheet_name]
+    existing = [c.value if c.value is not None else "" for c in next(ws.iter_rows(min_row=1, max_row=1))]
+    existing = [str(x) for x in existing]
+    if all(v == "" for v in existing):
+        # pusty nagłówek – nadpisz
+        ws.delete_rows(1, 1)
+        ws.append(list(headers))
+        wb.save(file_path)
+        wb.close()
+        return
+
+    # dołóż brakujące
+    missing = [h for h in headers if h not in existing]
+    if missing:
+        # dopisz puste komórki nagłówka na końcu
+        for i, name in enumerate(missing, start=len(existing) + 1):
+            ws.cell(row=1, column=i, value=name)
+    wb.save(file_path)
+    wb.close()
+
+
+# ==========================
+# Szybki odczyt metadanych skoroszytu (bez parsowania arkuszy)
+# ==========================
+class WorkbookInfo:
+    """Nazwy arkuszy, wymiary i 1. wiersz każdego arkusza – z odczytu read-only."""
+
+    def __init__(self, sheet_names: list[str], dimensions: dict[str, tuple[int, int]], headers: dict[str, list]):
+        self.sheet_names = sheet_names
+        self.dimensions = dimensions  # arkusz -> (max_row, max_column); 0 gdy nieznane
+        self.headers = headers        # arkusz -> surowe wartości 1. wiersza
+
+    def first_sheet(self) -> str:
+        if not self.sheet_names:
+            raise ValueError("Plik nie zawiera żadnych arkuszy.")
+        return self.sheet_names[0]
+
+    def pick(self, prefer: str | None = None) -> str:
+        """Arkusz `prefer`, jeśli istnieje – inaczej pierwszy."""
+        if prefer and prefer in self.sheet_names:
+            return prefer
+        return self.first_sheet()
+
+
+# cache: ścieżka -> (mtime_ns, rozmiar, WorkbookInfo)
+_PROBE_CACHE: dict[str, tuple[int, int, WorkbookInfo]] = {}
+
+
+def probe_workbook(file_path: Path) -> WorkbookInfo:
+    """
+    Odczytaj tylko metadane skoroszytu (tryb read-only): nazwy arkuszy, wymiary, 1. wiersz.
+    Wynik cache'owany po (ścieżka, mtime, rozmiar) – zmiana pliku unieważnia wpis.
+    """
+    file_path = Path(file_path)
+    st = file_path.stat()
+    key = str(file_path.resolve())
+    hit = _PROBE_CACHE.get(key)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        dims: dict[str, tuple[int, int]] = {}
+        headers: dict[str, list] = {}
+        for ws in wb.worksheets:
+            dims[ws.title] = (ws.max_row or 0, ws.max_column or 0)
+            headers[ws.title] = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+        info = WorkbookInfo(list(wb.sheetnames), dims, headers)
+    finally:
+        wb.close()
+    _PROBE_CACHE[key] = (st.st_mtime_ns, st.st_size, info)
+    return info
+
+
+def normalize_header_map(cols: list[str]) -> dict[str, str]:
+    """Nagłówek znormalizowany (bez wielkości liter i twardych spacji) -> oryginalny."""
+    def norm(s: str) -> str:
+        return str(s).strip().casefold().replace("  ", " ").replace("\u00a0", " ")
+    return {norm(c): c for c in cols}
+
+
+def report_sheet_from_headers(headers: dict[str, list]) -> str | None:
+    """Arkusz raportu wg nagłówków: pierwszy z 'Nr KW' i 'Obszar', inaczej pierwszy z 'Nr KW'."""
+    best_name = None
+    for name, cols in headers.items():
+        norm = normalize_header_map([c for c in cols if c is not None])
+        if "nr kw" in norm:
+            if "obszar" in norm:
+                return name
+            if best_name is None:
+                best_name = name
+    return best_name
+
+
+def _probe_header(file_path: Path, sheet_name: str) -> list[str] | None:
+    """Nagłówek arkusza jako stringi (z probe_workbook); None, gdy plik lub arkusz nie istnieje."""
+    file_path = Path(file_path)
+    if not file_path.exists():
+        return None
+    info = probe_workbook(file_path)
+    if sheet_name not in info.headers:
+        return None
+    return [str(v) if v is not None else "" for v in info.headers[sheet_name]]
+
+
+class BatchAppender:
+    """
+    Buforowane dopisywanie wierszy (dict) do arkusza – jako context manager.
+
+    - nagłówek sprawdzany jest raz, z cache'owanego odczytu 1. wiersza
+      (plik zapisywany jest tylko, gdy naprawdę brakuje arkusza/kolumn),
+    - wiersze trzymane są w pamięci; po przekroczeniu `batch_size` paczka trafia
+      do pliku pomocniczego `<plik>.<arkusz>.append.pkl` obok skoroszytu (pickle – wartości
+      wracają z tym samym typem: daty, liczby numpy itd.; koszt dopisania nie zależy od rozmiaru bazy),
+    - przy zamknięciu: jeśli nic nie trafiło na dysk – wiersze z pamięci dopisywane wprost
+      (jeden load + jeden save; przy błędzie trafiają do pliku pomocniczego); inaczej bufor
+      dopisywany do pliku pomocniczego, który scalany jest paczka po paczce, a usuwany dopiero
+      po udanym zapisie skoroszytu.
+
+    Pozostawiony (np. po awarii albo błędzie zapisu skoroszytu) plik pomocniczy zostanie scalony
+    przy następnym zamknięciu – wiersze nie giną.
+
+    Obecnie jedynym użytkownikiem jest append_rows_dicts: scrapery zapisują CSV, a scalanie.py
+    zapisuje całą bazę jednym ExcelWriterem – przy dopisywaniu wierszy do istniejącego
+    skoroszytu w wielu wywołaniach trzymaj jeden BatchAppender przez całą pracę.
+
+        with BatchAppender(path, "Mieszkania", BAZA_MIESZKANIA_HEADERS) as ap:
+            for row in rows:
+                ap.append(row)
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        sheet_name: str,
+        headers: Sequence[str],
+        batch_size: int = 5000,
+    ) -> None:
+        self.file_path = Path(file_path)
+        self.sheet_name = sheet_name
+        self.headers = list(headers)
+        self.batch_size = max(1, int(batch_size))
+        self.sidecar = self.file_path.with_name(f"{self.file_path.name}.{sheet_name}.append.pkl")
+        self._buffer: list[list] = []
+        self._header_ok = False
+        self._closed = False
+
+    # --- context manager ---
+    def __enter__(self) -> "BatchAppender":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # --- API ---
+    def append(self, row: dict) -> None:
+        if self._closed:
+            raise ValueError("BatchAppender jest już zamknięty.")
+        self._buffer.append([row.get(h, "") for h in self.headers])
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def flush(self) -> None:
+        """Przenieś bufor do pliku pomocniczego jako jedną paczkę (bez otwierania skoroszytu)."""
+        if not self._buffer:
+            return
+        with self.sidecar.open("ab") as f:
+            pickle.dump(self._buffer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._buffer = []
+
+    def _sidecar_batches(self) -> Iterator[list]:
+        """Paczki z pliku pomocniczego po kolei; urwana ostatnia paczka (awaria zapisu) jest pomijana."""
+        with self.sidecar.open("rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+                except pickle.UnpicklingError:
+                    print(f"[WARN] Urwany zapis w {self.sidecar.name} – pomijam ostatnią paczkę.", file=sys.stderr)
+                    return
+
+    def close(self) -> None:
+        """Scal plik pomocniczy i bufor do skoroszytu – jeden load + jeden save."""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self.sidecar.exists():
+            # błąd load_workbook/save nie może zgubić buforowanych wierszy – najpierw na dysk
+            self.flush()
+            batches: Iterable[list] = self._sidecar_batches()
+        elif self._buffer:
+            batches = [self._buffer]
+        else:
+            return
+
+        try:
+            self._ensure_header()
+            wb = load_workbook(self.file_path)
+            try:
+                ws = wb[self.sheet_name]
+                for batch in batches:
+                    for vals in batch:
+                        ws.append(vals)
+                wb.save(self.file_path)
+            finally:
+                wb.close()
+        except BaseException:
+            self.flush()  # wiersze tylko z pamięci – zachowaj do scalenia przy następnym zamknięciu
+            raise
+        self._buffer = []
+        self.sidecar.unlink(missing_ok=True)
+
+    def _ensure_header(self) -> None:
+        if self._header_ok:
+            return
+        header = _probe_header(self.file_path, self.sheet_name)
+        if header is None or any(h not in header for h in self.headers):
+            ensure_workbook_and_sheet_with_header(self.file_path, self.sheet_name, self.headers)
+        self._header_ok = True
+
+
+def append_rows_dicts(
+    file_path: Path,
+    sheet_name: str,
+    rows: Iterable[dict],
+    headers: Sequence[str],
+) -> None:
+    """
+    Dopisz wiersze (dict) do istniejącego arkusza – zgodnie z kolejnością `headers`.
+    Brakujące klucze traktowane są jako puste.
+    Skoroszyt zapisywany jest raz (nagłówek sprawdzany odczytem read-only); duże `rows`
+    przechodzą przez plik pomocniczy paczkami, więc poza skoroszytem w pamięci jest najwyżej
+    jedna paczka. Wartości komórek zachowują typ (daty, liczby).
+    """
+    with BatchAppender(file_path, sheet_name, headers) as ap:
+        ap.extend(rows)
+
+
+# ==========================
+# Narzędzia do arkuszy: RAPORT / RAPORT_ODFILTROWANE
+# ==========================
+def _norm_text(s: str | None) -> str:
+    import re, unicodedata
+
+    if s is None:
+        return ""
+    s = str(s).strip()
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = s.casefold()
+    s = re.sub(r"[ \t\r\n\.\-\_\?\(\)]", "", s)
+    return s
+
+
+def ensure_raport_odfiltrowane(file_path: Path, raport_sheet: str = SHEET_RAPORT) -> None:
+    """
+    Utwórz arkusz 'raport_odfiltrowane' jeśli nie istnieje i skopiuj wiersz nagłówka
+    z arkusza 'raport'.
+    """
+    file_path = Path(file_path)
+    wb = load_workbook(file_path)
+    if raport_sheet not in wb.sheetnames:
+        wb.close()
+        raise ValueError(f"Brak arkusza źródłowego: {raport_sheet}")
+
+    ws_src = wb[raport_sheet]
+    headers = [c.value for c in next(ws_src.iter_rows(min_row=1, max_row=1))]
+    headers = [h if h is not None else "" for h in headers]
+
+    if SHEET_RAPORT_ODF not in wb.sheetnames:
+        ws_new = wb.create_sheet(SHEET_RAPORT_ODF)
+        ws_new.append(headers)
+        wb.save(file_path)
+        wb.close()
+        return
+
+    # jeśli istnieje – upewnij nagłówki (dołóż brakujące)
+    ws = wb[SHEET_RAPORT_ODF]
+    cur = [c.value for c in next(ws.iter_rows(min_row=1, max_row=1))]
+    cur = [x if x is not None else "" for x in cur]
+    missing = [h for h in headers if h not in cur]
+    for i, name in enumerate(missing, start=len(cur) + 1):
+        ws.cell(row=1, column=i, value=name)
+
+    wb.save(file_path)
+    wb.close()
+
+
+def _read_sheet_df(file_path: Path, sheet: str) -> pd.DataFrame:
+    return pd.read_excel(file_path, sheet_name=sheet, engine="openpyxl")
+
+
+def _write_sheet_df(file_path: Path, sheet: str, df: pd.DataFrame) -> None:
+    with pd.ExcelWriter(file_path, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+        df.to_excel(writer, sheet_name=sheet, index=False)
+
+
+def filter_raport_move_to_odf(file_path: Path, mode: str) -> dict:
+    """
+    Wykonaj operację filtrowania/przerzucania między 'raport' a 'raport_odfiltrowane'.
+
+    mode:
+      - 'brak'   → nic nie rób
+      - 'jeden'  → w 'raport' znajdź wiersze gdzie KOL_UDZIALY == 'tak' (case-insens) i przerzuć do ODF
+      - 'lokal'  → w 'raport' znajdź wiersze gdzie KOL_LOKAL != 'LOKAL MIESZKALNY' i przerzuć do ODF
+      - 'oba'    → przenieś wiersze spełniające którykolwiek z ww. warunków
+      - 'cofnij' → przenieś WSZYSTKIE wiersze z ODF z powrotem do 'raport' i wyczyść ODF (zostaw nagłówek)
+
+    Zwraca słownik ze statystykami: {"moved_to_odf": int, "returned_to_raport": int}
+    """
+    file_path = Path(file_path)
+    ensure_raport_odfiltrowane(file_path, SHEET_RAPORT)
+
+    if mode == "brak":
+        return {"moved_to_odf": 0, "returned_to_raport": 0}
+
+    if mode == "cofnij":
+        # przenieś wszystkie z ODF do raport
+        df_r = _read_sheet_df(file_path, SHEET_RAPORT)
+        try:
+            df_odf = _read_sheet_df(file_path, SHEET_RAPORT_ODF)
+        except ValueError:
+            df_odf = pd.DataFrame(columns=list(df_r.columns))
+
+        # usuń nagłówek logiczny – DataFrame już go nie ma, ale upewnij kolumny
+        df_odf = df_odf[df_odf.notna().any(axis=1)]
+
+        returned = len(df_odf)
+        if returned:
+            # dopasuj kolumny
+            for c in df_r.columns:
+                if c not in df_odf.columns:
+                    df_odf[c] = pd.NA
+            df_odf = df_odf[df_r.columns]
+            df_r2 = pd.concat([df_r, df_odf], ignore_index=True)
+        else:
+            df_r2 = df_r
+
+        # zapisz: raport = scalony, odf = tylko nagłówek
+        _write_sheet_df(file_path, SHEET_RAPORT, df_r2)
+        _write_sheet_df(file_path, SHEET_RAPORT_ODF, pd.DataFrame(columns=list(df_r2.columns)))
+        return {"moved_to_odf": 0, "returned_to_raport": returned}
+
+    # pozostałe tryby – przerzucamy z raport → odfiltrowane
+    df_r = _read_sheet_df(file_path, SHEET_RAPORT)
+    try:
+        df_odf = _read_sheet_df(file_path, SHEET_RAPORT_ODF)
+    except ValueError:
+        df_odf = pd.DataFrame(columns=list(df_r.columns))
+
+    def _col(df: pd.DataFrame, wanted: str) -> str | None:
+        target = _norm_text(wanted)
+        mapping = {c: _norm_text(str(c)) for c in df.columns}
+        for c, n in mapping.items():
+            if n == target or target in n:
+                return c
+        return None
+
+    col_ud = _col(df_r, KOL_UDZIALY)
+    col_lok = _col(df_r, KOL_LOKAL)
+
+    mask_jeden = pd.Series([False] * len(df_r))
+    if col_ud:
+        ser = df_r[col_ud].astype("string").fillna("").str.strip().str.casefold()
+        mask_jeden = ser == "tak"
+
+    def _is_lokal_mieszkalny(x) -> bool:
+        return _norm_text(str(x)) == "lokalmieszkalny"
+
+    mask_lokal = pd.Series([False] * len(df_r))
+    if col_lok:
+        mask_lokal = ~df_r[col_lok].apply(_is_lokal_mieszkalny)
+
+    if mode == "jeden":
+        to_move = mask_jeden
+    elif mode == "lokal":
+        to_move = mask_lokal
+    elif mode == "oba":
+        to_move = mask_jeden | mask_lokal
+    else:
+        raise ValueError("Nieznany tryb filtrowania: " + str(mode))
+
+    df_move = df_r[to_move].copy()
+    moved = len(df_move)
+    if moved == 0:
+        return {"moved_to_odf": 0, "returned_to_raport": 0}
+
+    # dopasuj kolumny i dołącz do ODF
+    for c in df_r.columns:
+        if c not in df_odf.columns:
+            df_odf[c] = pd.NA
+    df_move = df_move[df_odf.columns] if set(df_odf.columns) == set(df_r.columns) else df_move[df_r.columns]
+    df_odf2 = pd.concat([df_odf, df_move], ignore_index=True)
+
+    # usuń z raportu przenoszone (tu: wyrzucamy całe wiersze)
+    df_keep = df_r[~to_move].copy()
+
+    _write_sheet_df(file_path, SHEET_RAPORT, df_keep)
+    _write_sheet_df(file_path, SHEET_RAPORT_ODF, df_odf2)
+
+    return {"moved_to_odf": moved, "returned_to_raport": 0}
+
+
+# ==========================
+# Kolumna „Położenie” – składanie/uzupełnianie
+# ==========================
+def compose_polozenie(
+    woj: str = "",
+    powiat: str = "",
+    gmina: str = "",
+    miejscowosc: str = "",
+    dzielnica: str = "",
+    ulica: str = "",
+) -> str:
+    """Złożenie pola 'Położenie' jako 'Województwo; Powiat; Gmina; Miejscowość; Dzielnica; Ulica'."""
+    parts = [woj, powiat, gmina, miejscowosc, dzielnica, ulica]
+    cleaned = [str(p).strip() for p in parts if str(p).strip()]
+    return "; ".join(cleaned)
+
+
+def update_polozenie_column(file_path: Path, sheet: str = SHEET_RAPORT) -> int:
+    """
+    Uzupełnij/odśwież kolumnę 'Położenie' w podanym arkuszu na podstawie kolumn:
+    Województwo, Powiat, Gmina, Miejscowość, Dzielnica, Ulica.
+
+    Zwraca liczbę zaktualizowanych wierszy.
+    """
+    df = _read_sheet_df(file_path, sheet)
+    changed = 0
+    for col in ["Położenie", "Województwo", "Powiat", "Gmina", "Miejscowość", "Dzielnica", "Ulica"]:
+        if col not in df.columns:
+            # dołóż brakujące kolumny
+            df[col] = ""
+
+    new_vals = []
+    for _, r in df.iterrows():
+        s = compose_polozenie(r["Województwo"], r["Powiat"], r["Gmina"], r["Miejscowość"], r["Dzielnica"], r["Ulica"])
+        new_vals.append(s)
+    if "Położenie" in df.columns:
+        changed = int((df["Położenie"].fillna("") != pd.Series(new_vals)).sum())
+    df["Położenie"] = new_vals
+    _write_sheet_df(file_path, sheet, df)
+    return changed
+
+
+def reorder_columns_by_header(
+    file_path: Path,
+    sheet: str,
+    desired_order: Sequence[str],
+    keep_others_at_end: bool = True,
+) -> None:
+    """
+    Ułóż kolumny w arkuszu wg `desired_order`. Brakujące dopisz puste, nieznane zostaw na końcu (domyślnie).
+    """
+    df = _read_sheet_df(file_path, sheet)
+    # dołóż brakujące
+    for c in desired_order:
+        if c not in df.columns:
+            df[c] = pd.NA
+    ordered = [c for c in desired_order if c in df.columns]
+    if keep_others_at_end:
+        rest = [c for c in df.columns if c not in ordered]
+        new_cols = ordered + rest
+    else:
+        new_cols = ordered
+    df = df[new_cols]
+    _write_sheet_df(file_path, sheet, df)
+
+
+# ==========================
+# Baza danych: upewnij plik/arkusz/nagłówki i dopisz dane
+# ==========================
+def ensure_baza_mieszkania(file_path: Path, sheet: str = "Mieszkania") -> None:
+    """
+    Zapewnij plik Excela dla bazy danych i arkusz z wymaganymi kolumnami.
+    """
+    ensure_workbook_and_sheet_with_header(file_path, sheet, BAZA_MIESZKANIA_HEADERS)
+
+
+def append_mieszkania_rows(file_path: Path, rows: Iterable[dict], sheet: str = "Mieszkania") -> None:
+    """
+    Dopisz rekordy ogłoszeń do arkusza 'Mieszkania' w 'Baza danych.xlsx'.
+    """
+    append_rows_dicts(file_path, sheet, rows, BAZA_MIESZKANIA_HEADERS)
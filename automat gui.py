@@ -1,124 +1,209 @@
-# -*- coding: utf-8 -*-
-"""
-automat_gui.py — minimalistyczny GUI do uruchamiania automatu
-- potwierdza poprawność bazy (kolumny + liczba wierszy),
-- pozwala wskazać RAPORT oraz BAZĘ,
-- jednym kliknięciem przelicza *cały* raport i zapisuje wyniki.
-"""
-
-from __future__ import annotations
-
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from pathlib import Path
-
-import pandas as pd
-
-import automat as auto
-
-# ====== GUI ======
-
-class AutomatApp(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("Wycena – tryb AUTOMAT")
-        self.geometry("760x420")
-
-        self.var_db = tk.StringVar(value=str(auto.DEFAULT_DB_XLSX))
-        self.var_db_sheet = tk.StringVar(value=auto.DEFAULT_DB_SHEET)
-        self.var_report = tk.StringVar(value="")
-        self.var_level = tk.StringVar(value=auto.DEFAULT_LEVEL)
-        self.var_tol = tk.StringVar(value=str(int(auto.DEFAULT_TOL)))
-
-        self._build()
-
-    def _build(self):
-        root = ttk.Frame(self, padding=12)
-        root.pack(fill="both", expand=True)
-
-        # Baza
-        frm_db = ttk.LabelFrame(root, text="Baza danych (scalona) – Excel", padding=10)
-        frm_db.pack(fill="x")
-        ttk.Label(frm_db, text="Plik:").grid(row=0, column=0, sticky="w")
-        ttk.Entry(frm_db, textvariable=self.var_db, width=60).grid(row=0, column=1, sticky="we", padx=6)
-        ttk.Button(frm_db, text="Wybierz…", command=self._pick_db).grid(row=0, column=2)
-        ttk.Label(frm_db, text="Arkusz:").grid(row=0, column=3, padx=(12, 0))
-        ttk.Entry(frm_db, textvariable=self.var_db_sheet, width=16).grid(row=0, column=4, padx=6)
-        ttk.Button(frm_db, text="Sprawdź bazę", command=self._check_db).grid(row=0, column=5, padx=(10, 0))
-        frm_db.columnconfigure(1, weight=1)
-
-        # Raport
-        frm_rp = ttk.LabelFrame(root, text="Plik RAPORTU (Excel)", padding=10)
-        frm_rp.pack(fill="x", pady=(10,0))
-        ttk.Label(frm_rp, text="Plik:").grid(row=0, column=0, sticky="w")
-        ttk.Entry(frm_rp, textvariable=self.var_report, width=60).grid(row=0, column=1, sticky="we", padx=6)
-        ttk.Button(frm_rp, text="Wybierz…", command=self._pick_report).grid(row=0, column=2)
-        frm_rp.columnconfigure(1, weight=1)
-
-        # Parametry
-        frm_p = ttk.LabelFrame(root, text="Parametry", padding=10)
-        frm_p.pack(fill="x", pady=(10,0))
-        ttk.Label(frm_p, text="Poziom adresu:").grid(row=0, column=0, sticky="w")
-        self.cmb_level = ttk.Combobox(
-            frm_p, width=20, state="readonly",
-            values=[name for (name, _, _) in auto.ADDRESS_LEVELS if name != "Województwo"],
-            textvariable=self.var_level
-        )
-        self.cmb_level.grid(row=0, column=1, padx=(6, 12), sticky="w")
-        ttk.Label(frm_p, text="Tolerancja (± m²):").grid(row=0, column=2, sticky="w")
-        ttk.Entry(frm_p, textvariable=self.var_tol, width=10).grid(row=0, column=3, padx=(6, 12))
-        ttk.Button(frm_p, text="Uruchom AUTOMAT", command=self._run).grid(row=0, column=4)
-
-        # Log
-        self.txt = tk.Text(root, height=10, wrap="word")
-        self.txt.pack(fill="both", expand=True, pady=(10,0))
-
-    # Handlery
-    def _pick_db(self):
-        p = filedialog.askopenfilename(
-            title="Wybierz bazę danych (Excel)",
-            filetypes=[("Excel", "*.xlsx *.xlsm *.xls"), ("Wszystkie pliki", "*.*")]
-        )
-        if p:
-            self.var_db.set(p)
-
-    def _pick_report(self):
-        p = filedialog.askopenfilename(
-            title="Wybierz RAPORT (Excel)",
-            filetypes=[("Excel", "*.xlsx *.xlsm *.xls"), ("Wszystkie pliki", "*.*")]
-        )
-        if p:
-            self.var_report.set(p)
-
-    def _check_db(self):
-        try:
-            df = auto.load_db_excel(Path(self.var_db.get()), self.var_db_sheet.get().strip() or auto.DEFAULT_DB_SHEET)
-            # potwierdzenie „dobra baza”
-            ok_cols = set(amc for amc in df.columns if amc in set(auto.RESULT_COLS + [c for (_,_,c) in auto.ADDRESS_LEVELS]))
-            msg = f"OK – baza poprawna.\nWierszy: {len(df)}.\nPrzykładowe kolumny adresowe wykryte: {', '.join(sorted(ok_cols)[:8])}"
-            messagebox.showinfo("Baza OK", msg)
-        except Exception as e:
-            messagebox.showerror("Błąd bazy", str(e))
-
-    def _run(self):
-        try:
-            tol = float(str(self.var_tol.get()).replace(",", ".").replace(" ", ""))
-        except Exception:
-            tol = auto.DEFAULT_TOL
-
-        try:
-            n, sheet = auto.process_report(
-                report_xlsx=Path(self.var_report.get()).expanduser(),
-                db_xlsx=Path(self.var_db.get()).expanduser(),
-                db_sheet=self.var_db_sheet.get().strip() or auto.DEFAULT_DB_SHEET,
-                level_human=self.var_level.get(),
-                tol=tol,
-            )
-            self.txt.insert("end", f"Zakończono. Przeliczono {n} wierszy w arkuszu '{sheet}'.\n")
-            messagebox.showinfo("Gotowe", f"Przeliczono {n} wierszy w arkuszu '{sheet}'.")
-        except Exception as e:
-            messagebox.showerror("Błąd", str(e))
-
-if __name__ == "__main__":
-    app = AutomatApp()
-    app.mainloop()
+# -*- coding: utf-8 -*-
+"""
+automat_gui.py — minimalistyczny GUI do uruchamiania automatu
+- potwierdza poprawność bazy (kolumny + liczba wierszy),
+- pozwala wskazać RAPORT oraz BAZĘ,
+- jednym kliknięciem przelicza *cały* raport i zapisuje wyniki – w tle (zadania.py):
+  okno odpowiada, postęp i komunikaty na bieżąco, przycisk „Anuluj” przerywa wycenę.
+"""
+
+from __future__ import annotations
+
+import os
+import tkinter as tk
+from functools import partial
+from tkinter import ttk, filedialog, messagebox
+from pathlib import Path
+
+import pandas as pd
+
+import automat as auto
+import zadania
+
+# ====== GUI ======
+
+class AutomatApp(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("Wycena – tryb AUTOMAT")
+        self.geometry("760x420")
+
+        self.var_db = tk.StringVar(value=str(auto.DEFAULT_DB_XLSX))
+        self.var_db_sheet = tk.StringVar(value=auto.DEFAULT_DB_SHEET)
+        self.var_report = tk.StringVar(value="")
+        self.var_level = tk.StringVar(value=auto.DEFAULT_LEVEL)
+        self.var_tol = tk.StringVar(value=str(int(auto.DEFAULT_TOL)))
+        self.var_stream = tk.BooleanVar(value=False)
+        self.var_fallback = tk.BooleanVar(value=False)
+        self.var_incremental = tk.BooleanVar(value=False)
+        self.var_ci = tk.BooleanVar(value=False)
+        self.var_adaptive = tk.BooleanVar(value=False)
+        # wycena wg daty pobrania ofert (puste = bez filtra)
+        self.var_as_of = tk.StringVar(value="")
+        self.var_max_age = tk.StringVar(value="")
+        self.var_half_life = tk.StringVar(value="")
+        self.var_mode = tk.StringVar(value=auto.MODE_WINDOW)
+        self.var_radius = tk.StringVar(value=str(auto.geo.DEFAULT_RADIUS_KM))
+        self.var_workers = tk.StringVar(value=str(max(1, (os.cpu_count() or 2) - 1)))
+
+        self._build()
+        self.jobs = zadania.JobRunner(self, on_log=self._log, on_progress=self._on_progress,
+                                      busy=[self.btn_run], cancel_button=self.btn_cancel)
+
+    def _build(self):
+        root = ttk.Frame(self, padding=12)
+        root.pack(fill="both", expand=True)
+
+        # Baza
+        frm_db = ttk.LabelFrame(root, text="Baza danych (scalona) – Excel", padding=10)
+        frm_db.pack(fill="x")
+        ttk.Label(frm_db, text="Plik:").grid(row=0, column=0, sticky="w")
+        ttk.Entry(frm_db, textvariable=self.var_db, width=60).grid(row=0, column=1, sticky="we", padx=6)
+        ttk.Button(frm_db, text="Wybierz…", command=self._pick_db).grid(row=0, column=2)
+        ttk.Label(frm_db, text="Arkusz:").grid(row=0, column=3, padx=(12, 0))
+        ttk.Entry(frm_db, textvariable=self.var_db_sheet, width=16).grid(row=0, column=4, padx=6)
+        ttk.Button(frm_db, text="Sprawdź bazę", command=self._check_db).grid(row=0, column=5, padx=(10, 0))
+        frm_db.columnconfigure(1, weight=1)
+
+        # Raport
+        frm_rp = ttk.LabelFrame(root, text="Plik RAPORTU (Excel)", padding=10)
+        frm_rp.pack(fill="x", pady=(10,0))
+        ttk.Label(frm_rp, text="Plik:").grid(row=0, column=0, sticky="w")
+        ttk.Entry(frm_rp, textvariable=self.var_report, width=60).grid(row=0, column=1, sticky="we", padx=6)
+        ttk.Button(frm_rp, text="Wybierz…", command=self._pick_report).grid(row=0, column=2)
+        frm_rp.columnconfigure(1, weight=1)
+
+        # Parametry
+        frm_p = ttk.LabelFrame(root, text="Parametry", padding=10)
+        frm_p.pack(fill="x", pady=(10,0))
+        ttk.Label(frm_p, text="Poziom adresu:").grid(row=0, column=0, sticky="w")
+        self.cmb_level = ttk.Combobox(
+            frm_p, width=20, state="readonly",
+            values=[name for (name, _, _) in auto.ADDRESS_LEVELS if name != "Województwo"],
+            textvariable=self.var_level
+        )
+        self.cmb_level.grid(row=0, column=1, padx=(6, 12), sticky="w")
+        ttk.Label(frm_p, text="Tolerancja (± m²):").grid(row=0, column=2, sticky="w")
+        ttk.Entry(frm_p, textvariable=self.var_tol, width=10).grid(row=0, column=3, padx=(6, 12))
+        ttk.Label(frm_p, text="Procesy:").grid(row=0, column=4, sticky="w")
+        ttk.Spinbox(frm_p, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.var_workers, width=4).grid(row=0, column=5, padx=(6, 12))
+        ttk.Checkbutton(frm_p, text="Tryb strumieniowy (duże raporty)", variable=self.var_stream).grid(row=1, column=0, columnspan=4, sticky="w", pady=(6, 0))
+        ttk.Label(frm_p, text="Tryb:").grid(row=2, column=0, sticky="w", pady=(6, 0))
+        ttk.Combobox(frm_p, width=10, state="readonly", values=auto.MODES, textvariable=self.var_mode).grid(row=2, column=1, padx=(6, 12), pady=(6, 0), sticky="w")
+        ttk.Label(frm_p, text="Promień (km):").grid(row=2, column=2, sticky="w", pady=(6, 0))
+        ttk.Entry(frm_p, textvariable=self.var_radius, width=10).grid(row=2, column=3, padx=(6, 12), pady=(6, 0))
+        ttk.Checkbutton(frm_p, text="Poszerzaj poziom, gdy < 5 ofert", variable=self.var_fallback).grid(row=1, column=4, columnspan=3, sticky="w", pady=(6, 0))
+        ttk.Checkbutton(frm_p, text="Tylko zmienione wiersze", variable=self.var_incremental).grid(row=2, column=4, columnspan=3, sticky="w", pady=(6, 0))
+        ttk.Checkbutton(frm_p, text="Przedziały ufności (bootstrap)", variable=self.var_ci).grid(row=3, column=0, columnspan=4, sticky="w", pady=(6, 0))
+        ttk.Checkbutton(frm_p, text="Okno adaptacyjne (zamiast ± m²)", variable=self.var_adaptive).grid(row=3, column=4, columnspan=3, sticky="w", pady=(6, 0))
+        ttk.Label(frm_p, text="Na dzień:").grid(row=4, column=0, sticky="w", pady=(6, 0))
+        ttk.Entry(frm_p, textvariable=self.var_as_of, width=12).grid(row=4, column=1, padx=(6, 12), pady=(6, 0), sticky="w")
+        ttk.Label(frm_p, text="Ostatnie dni:").grid(row=4, column=2, sticky="w", pady=(6, 0))
+        ttk.Entry(frm_p, textvariable=self.var_max_age, width=10).grid(row=4, column=3, padx=(6, 12), pady=(6, 0))
+        ttk.Label(frm_p, text="Półokres wagi (dni):").grid(row=4, column=4, sticky="w", pady=(6, 0))
+        ttk.Entry(frm_p, textvariable=self.var_half_life, width=6).grid(row=4, column=5, padx=(6, 12), pady=(6, 0))
+        self.btn_run = ttk.Button(frm_p, text="Uruchom AUTOMAT", command=self._run)
+        self.btn_run.grid(row=0, column=6)
+        self.btn_cancel = ttk.Button(frm_p, text="Anuluj", command=lambda: self.jobs.cancel())
+        self.btn_cancel.grid(row=1, column=6, pady=(6, 0))
+
+        # Postęp
+        self.progress = ttk.Progressbar(root, mode="determinate", maximum=1)
+        self.progress.pack(fill="x", pady=(10, 0))
+
+        # Log
+        self.txt = tk.Text(root, height=10, wrap="word")
+        self.txt.pack(fill="both", expand=True, pady=(10,0))
+
+    # Handlery
+    def _pick_db(self):
+        p = filedialog.askopenfilename(
+            title="Wybierz bazę danych (Excel)",
+            filetypes=[("Excel", "*.xlsx *.xlsm *.xls"), ("Wszystkie pliki", "*.*")]
+        )
+        if p:
+            self.var_db.set(p)
+
+    def _pick_report(self):
+        p = filedialog.askopenfilename(
+            title="Wybierz RAPORT (Excel)",
+            filetypes=[("Excel", "*.xlsx *.xlsm *.xls"), ("Wszystkie pliki", "*.*")]
+        )
+        if p:
+            self.var_report.set(p)
+
+    def _check_db(self):
+        try:
+            df = auto.load_db_excel(Path(self.var_db.get()), self.var_db_sheet.get().strip() or auto.DEFAULT_DB_SHEET)
+            # potwierdzenie „dobra baza”
+            ok_cols = set(amc for amc in df.columns if amc in set(auto.RESULT_COLS + [c for (_,_,c) in auto.ADDRESS_LEVELS]))
+            msg = f"OK – baza poprawna.\nWierszy: {len(df)}.\nPrzykładowe kolumny adresowe wykryte: {', '.join(sorted(ok_cols)[:8])}"
+            messagebox.showinfo("Baza OK", msg)
+        except Exception as e:
+            messagebox.showerror("Błąd bazy", str(e))
+
+    def _run(self):
+        try:
+            tol = float(str(self.var_tol.get()).replace(",", ".").replace(" ", ""))
+        except Exception:
+            tol = auto.DEFAULT_TOL
+        try:
+            workers = max(1, int(self.var_workers.get()))
+        except Exception:
+            workers = 1
+        try:
+            radius_km = float(str(self.var_radius.get()).replace(",", ".").replace(" ", ""))
+        except Exception:
+            radius_km = auto.geo.DEFAULT_RADIUS_KM
+
+        try:
+            max_age, half_life = (
+                float(v.replace(",", ".")) if v.strip() else None
+                for v in (self.var_max_age.get(), self.var_half_life.get())
+            )
+        except ValueError:
+            messagebox.showerror("Błąd", "Ostatnie dni i półokres wagi muszą być liczbami (albo puste).")
+            return
+
+        self.progress["value"] = 0
+        if self.var_stream.get():
+            run = auto.process_report_streaming
+        else:
+            run = partial(auto.process_report, incremental=self.var_incremental.get())
+        # wartości pól odczytane tutaj (wątek Tk) – zadanie w tle nie dotyka widżetów
+        run = partial(
+            run,
+            report_xlsx=Path(self.var_report.get()).expanduser(),
+            db_xlsx=Path(self.var_db.get()).expanduser(),
+            db_sheet=self.var_db_sheet.get().strip() or auto.DEFAULT_DB_SHEET,
+            level_human=self.var_level.get(),
+            tol=tol,
+            workers=workers,
+            fallback=self.var_fallback.get(),
+            mode=self.var_mode.get(),
+            radius_km=radius_km,
+            ci=self.var_ci.get(),
+            adaptive=self.var_adaptive.get(),
+            as_of=self.var_as_of.get().strip() or None,
+            max_age_days=max_age,
+            half_life_days=half_life,
+        )
+        self.jobs.start("wycena raportu", lambda job: run(progress=job.progress),
+                        on_done=self._on_done, on_error=lambda e: messagebox.showerror("Błąd", str(e)))
+
+    def _on_done(self, result):
+        n, sheet = result
+        self._log(f"Zakończono. Przeliczono {n} wierszy w arkuszu '{sheet}'.")
+        messagebox.showinfo("Gotowe", f"Przeliczono {n} wierszy w arkuszu '{sheet}'.")
+
+    def _log(self, text: str):
+        self.txt.insert("end", text + "\n")
+        self.txt.see("end")
+
+    def _on_progress(self, done: int, total: int):
+        self.progress["maximum"] = max(total, 1)
+        self.progress["value"] = done
+
+if __name__ == "__main__":
+    app = AutomatApp()
+    app.mainloop()
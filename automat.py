@@ -1,244 +1,821 @@
-# -*- coding: utf-8 -*-
-"""
-automat.py — silnik automatycznego przeliczania całego RAPORTU w Excelu
-- sprawdza bazę danych,
-- iteruje po wszystkich wierszach RAPORTU,
-- zapisuje wyniki do wybranych kolumn w tym samym pliku.
-Użycie (CLI):
-    python automat.py <raport.xlsx> [<baza.xlsx> [<arkusz_bazy=Polska> [<poziom=Miejscowość> [<tolerancja=15>]]]]
-"""
-
-from __future__ import annotations
-
-import sys
-from pathlib import Path
-from typing import Optional, Dict, Tuple, List
-
-import pandas as pd
-import openpyxl  # noqa: F401 (wymagane przez pandas engine)
-
-import automat_matma as am
-
-# ====== Stałe / konfiguracja ======
-
-def _default_db_path() -> Path:
-    return Path.home() / "Desktop" / "baza danych" / "Baza danych.xlsx"
-
-DEFAULT_DB_XLSX = _default_db_path()
-DEFAULT_DB_SHEET = "Polska"
-DEFAULT_LEVEL = "Miejscowość"
-DEFAULT_TOL = 15.0
-
-COL_MEAN_M2      = "Średnia cena za m² (z bazy)"
-COL_MEAN_M2_ADJ  = "Średnia skorygowana cena za m² (z bazy)"
-COL_PROP_VALUE   = "Statystyczna wartość nieruchomości"
-RESULT_COLS = [COL_MEAN_M2, COL_MEAN_M2_ADJ, COL_PROP_VALUE]
-
-MSG_NO_SIMILAR = "brak podobnych ogłoszeń"
-
-REQUIRED_REPORT_COLUMNS = [
-    "Nr KW","Typ Księgi","Stan Księgi","Województwo","Powiat","Gmina","Miejscowość","Dzielnica",
-    "Położenie","Nr działek po średniku","Obręb po średniku","Ulica","Sposób korzystania","Obszar",
-    "Ulica(dla budynku)","przeznaczenie (dla budynku)","Ulica(dla lokalu)","Nr budynku( dla lokalu)",
-    "Przeznaczenie (dla lokalu)","Cały adres (dla lokalu)","Czy udziały?",
-]
-
-# (etykieta_GUI, kolumna_w_bazie, kolumna_w_raporcie)
-ADDRESS_LEVELS = [
-    ("Województwo", "wojewodztwo", "Województwo"),
-    ("Powiat",       "powiat",      "Powiat"),
-    ("Gmina",        "gmina",       "Gmina"),
-    ("Miejscowość",  "miejscowosc", "Miejscowość"),
-    ("Dzielnica",    "dzielnica",   "Dzielnica"),
-    ("Ulica",        "ulica",       "Ulica"),
-]
-
-# ====== I/O: baza / raport ======
-
-def _pick_sheet_safely(xlsx: Path, prefer: str | None = None) -> str:
-    xl = pd.ExcelFile(xlsx, engine="openpyxl")
-    if prefer and prefer in xl.sheet_names:
-        return prefer
-    return xl.sheet_names[0]
-
-def load_db_excel(path: Path, sheet: str) -> pd.DataFrame:
-    if not path.exists():
-        raise FileNotFoundError(
-            f"Nie znaleziono bazy danych: {path}\n"
-            "Upewnij się, że istnieje plik 'Baza danych.xlsx'."
-        )
-    chosen_sheet = _pick_sheet_safely(path, prefer=sheet or DEFAULT_DB_SHEET)
-    df = pd.read_excel(path, sheet_name=chosen_sheet, engine="openpyxl")
-
-    # walidacja kolumn:
-    missing = [c for c in am.REQUIRED_COLUMNS if c not in df.columns]
-    if missing:
-        raise ValueError(
-            "Brakuje kolumn w bazie: " + ", ".join(missing) +
-            f"\nPlik: {path.name}, arkusz: {chosen_sheet}"
-        )
-
-    # typy/liczby/teksty
-    for num_col in ["cena_za_metr","metry","rok_budowy","liczba_pokoi","pietro"]:
-        df[num_col] = am._coerce_numeric(df[num_col])
-    for txt_col in ["wojewodztwo","powiat","gmina","miejscowosc","dzielnica","ulica"]:
-        df[txt_col] = df[txt_col].astype(str)
-
-    return df
-
-def _normalize_header_map(cols: List[str]) -> Dict[str, str]:
-    def norm(s: str) -> str:
-        return str(s).strip().casefold().replace("  ", " ").replace("\u00a0", " ")
-    return {norm(c): c for c in cols}
-
-def _pick_report_sheet(xlsx: Path) -> Tuple[str, pd.DataFrame]:
-    xl = pd.ExcelFile(xlsx, engine="openpyxl")
-    best_name = None
-    best_df = None
-    for name in xl.sheet_names:
-        df = xl.parse(name)
-        norm = _normalize_header_map(list(df.columns))
-        if "nr kw" in norm:
-            if "obszar" in norm:
-                return name, df
-            if best_name is None:
-                best_name, best_df = name, df
-    if best_name is None:
-        raise ValueError("Nie znaleziono w raporcie arkusza z kolumną 'Nr KW'.")
-    return best_name, best_df  # type: ignore[return-value]
-
-def ensure_report_columns(xlsx: Path, sheet: str) -> pd.DataFrame:
-    """Upewnij się, że w raporcie istnieją wymagane kolumny oraz kolumny wynikowe; zwróć DataFrame z arkusza."""
-    df = pd.read_excel(xlsx, sheet_name=sheet, engine="openpyxl")
-    for col in REQUIRED_REPORT_COLUMNS:
-        if col not in df.columns:
-            df[col] = ""
-    existing = list(df.columns)
-    rest = [c for c in existing if c not in REQUIRED_REPORT_COLUMNS and c not in RESULT_COLS]
-    new_order = REQUIRED_REPORT_COLUMNS + RESULT_COLS + rest
-    df = df.reindex(columns=new_order)
-    return df
-
-# ====== Filtr + obliczenia dla jednego wiersza ======
-
-def _filter_db(
-    df_db: pd.DataFrame,
-    level_key_db: str,
-    level_value: str,
-    area_center_str: str,
-    tol: float,
-) -> Tuple[pd.DataFrame, float, float, float]:
-    try:
-        center = float(str(area_center_str).replace(",", ".").replace(" ", ""))
-    except Exception:
-        center = float("nan")
-
-    lo = center - tol if pd.notna(center) else float("-inf")
-    hi = center + tol if pd.notna(center) else float("inf")
-
-    m = am._coerce_numeric(df_db["metry"])
-    mask = m.between(lo, hi)
-
-    if str(level_value).strip():
-        mask &= (df_db[level_key_db].astype(str).str.casefold() ==
-                 str(level_value).strip().casefold())
-
-    out = df_db[mask].copy()
-    return out, center, lo, hi
-
-def compute_row(
-    row: pd.Series,
-    df_db: pd.DataFrame,
-    level_human: str,
-    tol: float,
-) -> Tuple[str, str, str]:
-    """Zwróć (surowa_śr_m2, skorygowana_śr_m2, wartość_nieruchomości) jako sformatowane stringi."""
-    mapping = {h: (db_key, rp_key) for (h, db_key, rp_key) in ADDRESS_LEVELS}
-    if level_human not in mapping:
-        raise ValueError(f"Nieprawidłowy poziom adresu: {level_human}")
-    db_key, rp_key = mapping[level_human]
-
-    level_value = str(row.get(rp_key, "") or "")
-    obszar = str(row.get("Obszar", "") or "")
-
-    df_filt, center, lo, hi = _filter_db(df_db, db_key, level_value, obszar, tol)
-
-    # brak wyników albo zbyt mało podobnych
-    if df_filt.empty or len(df_filt) < 5:
-        return (MSG_NO_SIMILAR, MSG_NO_SIMILAR, MSG_NO_SIMILAR)
-
-    # 1) średnia surowa
-    mean_raw_m2 = am.mean_numeric(df_filt["cena_za_metr"])
-
-    # 2) średnia po IQR
-    df_clean = am.remove_outliers_iqr(df_filt.copy(), "cena_za_metr")
-    mean_adj_m2 = am.mean_numeric(df_clean["cena_za_metr"])
-
-    # 3) wartość nieruchomości
-    prop_value = (mean_adj_m2 * center) if (mean_adj_m2 is not None and pd.notna(center)) else None
-
-    return (
-        am.format_price_per_m2(mean_raw_m2),
-        am.format_price_per_m2(mean_adj_m2),
-        am.format_currency(prop_value),
-    )
-
-# ====== Główny przebieg ======
-
-def process_report(
-    report_xlsx: Path,
-    db_xlsx: Path | None = None,
-    db_sheet: str = DEFAULT_DB_SHEET,
-    level_human: str = DEFAULT_LEVEL,
-    tol: float = DEFAULT_TOL,
-) -> Tuple[int, str]:
-    """
-    Przetwórz cały raport: zwróć (liczba_przeliczonych_wierszy, arkusz_raportu).
-    Zapis odbywa się w miejscu (ten sam plik raportu).
-    """
-    db_xlsx = db_xlsx or DEFAULT_DB_XLSX
-
-    # 1) wczytaj i potwierdź bazę
-    df_db = load_db_excel(Path(db_xlsx), db_sheet)
-
-    # 2) raport + arkusz
-    rp_sheet, _tmp = _pick_report_sheet(Path(report_xlsx))
-    df_rp = ensure_report_columns(Path(report_xlsx), rp_sheet)
-
-    # 3) iteracja po wierszach danych
-    out = df_rp.copy()
-    n = len(out.index)
-    for idx in out.index:
-        row = out.loc[idx]
-        s_raw, s_adj, s_prop = compute_row(row, df_db, level_human=level_human, tol=tol)
-        out.loc[idx, COL_MEAN_M2]     = s_raw
-        out.loc[idx, COL_MEAN_M2_ADJ] = s_adj
-        out.loc[idx, COL_PROP_VALUE]  = s_prop
-
-    # 4) zapis
-    with pd.ExcelWriter(Path(report_xlsx), engine="openpyxl", mode="a", if_sheet_exists="replace") as wr:
-        out.to_excel(wr, sheet_name=rp_sheet, index=False)
-
-    return n, rp_sheet
-
-# ====== CLI ======
-
-def _argv_or_none(i: int) -> Optional[str]:
-    return sys.argv[i] if len(sys.argv) > i and sys.argv[i].strip() else None
-
-if __name__ == "__main__":
-    report_arg = _argv_or_none(1)
-    if not report_arg:
-        print("Użycie: python automat.py <raport.xlsx> [<baza.xlsx> [<arkusz_bazy=Polska> [<poziom=Miejscowość> [<tolerancja=15>]]]]")
-        sys.exit(1)
-    db_arg     = _argv_or_none(2) or str(DEFAULT_DB_XLSX)
-    db_sheet   = _argv_or_none(3) or DEFAULT_DB_SHEET
-    level      = _argv_or_none(4) or DEFAULT_LEVEL
-    tol_str    = _argv_or_none(5) or str(DEFAULT_TOL)
-    try:
-        tol = float(str(tol_str).replace(",", ".").replace(" ", ""))
-    except Exception:
-        tol = DEFAULT_TOL
-
-    n, sheet = process_report(Path(report_arg), Path(db_arg), db_sheet=db_sheet, level_human=level, tol=tol)
-    print(f"Zrobione. Przeliczono {n} wierszy w arkuszu '{sheet}'.")
+# -*- coding: utf-8 -*-
+"""
+automat.py — silnik automatycznego przeliczania całego RAPORTU w Excelu
+- sprawdza bazę danych,
+- wycenia wsadowo wszystkie wiersze RAPORTU (silnik_wyceny) – przez lokalny serwer wyceny
+  (serwer_wyceny.py, baza już w pamięci), gdy działa; inaczej w tym procesie,
+- zapisuje wyniki do wybranych kolumn w tym samym pliku.
+Użycie (CLI):
+    python automat.py <raport.xlsx> [<baza.xlsx> [<arkusz_bazy=Polska> [<poziom=Miejscowość> [<tolerancja=15>]]]]
+                      [--workers N] [--stream] [--fallback] [--approx] [--adaptacyjnie] [--tryb okno|knn|promien|model] [--k 10] [--promien 2] [--przyrostowo] [--przedzialy] [--bez-serwera] [--profile]
+                      [--na-dzien RRRR-MM-DD] [--ostatnie-dni N] [--polokres DNI]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Optional, Dict, Tuple, List
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+import EXCELoperacje as xo
+import automat_matma as am
+import geolokalizacja as geo
+import indeks_czasu as ic
+import indeks_lokalizacji as il
+import klient_wyceny as kw
+import migawka
+import model_cen
+import pamiec_wycen as pc
+import profilowanie as prof
+import sasiedzi
+import silnik_wyceny as sw
+import statystyki as st
+
+# ====== Stałe / konfiguracja ======
+
+def _default_db_path() -> Path:
+    return Path.home() / "Desktop" / "baza danych" / "Baza danych.xlsx"
+
+DEFAULT_DB_XLSX = _default_db_path()
+DEFAULT_DB_SHEET = "Polska"
+DEFAULT_LEVEL = "Miejscowość"
+DEFAULT_TOL = 15.0
+DEFAULT_STREAM_BATCH = 20_000
+
+# tryby doboru porównywalnych ofert
+MODE_WINDOW = "okno"   # lokalizacja + okno ±tol m² (domyślny)
+MODE_KNN    = "knn"    # k najbardziej podobnych ofert lokalizacji (sasiedzi.py)
+MODE_RADIUS = "promien"  # oferty w promieniu R km + okno ±tol m² (geolokalizacja.py)
+MODE_MODEL  = "model"  # okno ±tol + równolegle regionalny model hedoniczny (model_cen.py)
+MODES = [MODE_WINDOW, MODE_KNN, MODE_RADIUS, MODE_MODEL]
+
+COL_MEAN_M2      = "Średnia cena za m² (z bazy)"
+COL_MEAN_M2_ADJ  = "Średnia skorygowana cena za m² (z bazy)"
+COL_PROP_VALUE   = "Statystyczna wartość nieruchomości"
+RESULT_COLS = [COL_MEAN_M2, COL_MEAN_M2_ADJ, COL_PROP_VALUE]
+# tylko w trybie z poszerzaniem poziomu: poziom adresu, z którego pochodzi wycena
+COL_LEVEL_USED   = "Poziom wyceny"
+# tylko w trybie okna adaptacyjnego: połowa szerokości okna metrażu, przy której zebrano oferty
+COL_TOL_USED     = "Użyta tolerancja metrażu"
+# tylko w trybie modelu: wycena modelem hedonicznym obok średniej z porównywalnych
+COL_MODEL_M2     = "Cena za m² (model)"
+COL_MODEL_VALUE  = "Wartość nieruchomości (model)"
+COL_MODEL_DIFF   = "Model vs średnia skorygowana"
+COL_MODEL_REGION = "Region modelu"
+MODEL_COLS = [COL_MODEL_M2, COL_MODEL_VALUE, COL_MODEL_DIFF, COL_MODEL_REGION]
+# odcisk danych wejściowych wiersza i wycinka bazy – przy przeliczeniu przyrostowym
+# liczone są tylko wiersze, których odcisk się zmienił
+COL_ROW_FP       = "Odcisk wyceny"
+# opcjonalnie: niepewność średniej skorygowanej (bootstrap, silnik_wyceny.uncertainty_rows)
+COL_COUNT        = "Liczba porównywalnych"
+COL_STD_M2       = "Odchylenie standardowe ceny za m²"
+COL_CI_LOW       = "Przedział ufności 95% – dolna granica (za m²)"
+COL_CI_HIGH      = "Przedział ufności 95% – górna granica (za m²)"
+UNCERTAINTY_COLS = [COL_COUNT, COL_STD_M2, COL_CI_LOW, COL_CI_HIGH]
+
+MSG_NO_SIMILAR = "brak podobnych ogłoszeń"
+
+REQUIRED_REPORT_COLUMNS = [
+    "Nr KW","Typ Księgi","Stan Księgi","Województwo","Powiat","Gmina","Miejscowość","Dzielnica",
+    "Położenie","Nr działek po średniku","Obręb po średniku","Ulica","Sposób korzystania","Obszar",
+    "Ulica(dla budynku)","przeznaczenie (dla budynku)","Ulica(dla lokalu)","Nr budynku( dla lokalu)",
+    "Przeznaczenie (dla lokalu)","Cały adres (dla lokalu)","Czy udziały?",
+]
+
+# (etykieta_GUI, kolumna_w_bazie, kolumna_w_raporcie)
+ADDRESS_LEVELS = [
+    ("Województwo", "wojewodztwo", "Województwo"),
+    ("Powiat",       "powiat",      "Powiat"),
+    ("Gmina",        "gmina",       "Gmina"),
+    ("Miejscowość",  "miejscowosc", "Miejscowość"),
+    ("Dzielnica",    "dzielnica",   "Dzielnica"),
+    ("Ulica",        "ulica",       "Ulica"),
+]
+
+# kolumny raportu czytane przez wycenę (wszystkie tryby)
+VALUATION_INPUT_COLUMNS = list(dict.fromkeys(
+    [rp for (_, _, rp) in ADDRESS_LEVELS] + ["Obszar"] + [c for (_, c, _) in sasiedzi.FEATURES]
+    + [geo.REPORT_LAT, geo.REPORT_LON, model_cen.MATERIAL[1]]
+))
+
+# poszerzanie poziomu (od wybranego w górę, bez województwa)
+FALLBACK_STOP = "Powiat"
+
+def _fallback_levels(level_human: str) -> List[Tuple[str, str, str]]:
+    """Łańcuch poziomów od wybranego do FALLBACK_STOP, np. Ulica → Dzielnica → … → Powiat."""
+    names = [h for (h, _, _) in ADDRESS_LEVELS]
+    i, stop = names.index(level_human), names.index(FALLBACK_STOP)
+    return [ADDRESS_LEVELS[j] for j in range(i, min(i, stop) - 1, -1)]
+
+def _put_level_used(df: pd.DataFrame, values: List[str]) -> None:
+    """Kolumna użytego poziomu zaraz za kolumnami wynikowymi."""
+    if COL_LEVEL_USED in df.columns:
+        df.drop(columns=COL_LEVEL_USED, inplace=True)
+    df.insert(df.columns.get_loc(COL_PROP_VALUE) + 1, COL_LEVEL_USED, values)
+
+def _put_tol_used(df: pd.DataFrame, values: List[str]) -> None:
+    """Kolumna użytej tolerancji zaraz za kolumnami wynikowymi."""
+    if COL_TOL_USED in df.columns:
+        df.drop(columns=COL_TOL_USED, inplace=True)
+    df.insert(df.columns.get_loc(COL_PROP_VALUE) + 1, COL_TOL_USED, values)
+
+def _put_model_cols(df: pd.DataFrame, values: List[tuple]) -> None:
+    """Kolumny modelu zaraz za kolumnami wynikowymi."""
+    df.drop(columns=[c for c in MODEL_COLS if c in df.columns], inplace=True)
+    at = df.columns.get_loc(COL_PROP_VALUE) + 1
+    for j, col in enumerate(MODEL_COLS):
+        df.insert(at + j, col, [v[j] for v in values])
+
+def _put_row_fp(df: pd.DataFrame, values: List[str], after: str) -> None:
+    """Kolumna odcisków za ostatnią kolumną wynikową trybu."""
+    if COL_ROW_FP in df.columns:
+        df.drop(columns=COL_ROW_FP, inplace=True)
+    df.insert(df.columns.get_loc(after) + 1, COL_ROW_FP, values)
+
+def _put_uncertainty_cols(df: pd.DataFrame, values: List[tuple], after: str) -> None:
+    """Kolumny niepewności za ostatnią kolumną wynikową trybu."""
+    df.drop(columns=[c for c in UNCERTAINTY_COLS if c in df.columns], inplace=True)
+    at = df.columns.get_loc(after) + 1
+    for j, col in enumerate(UNCERTAINTY_COLS):
+        df.insert(at + j, col, [v[j] for v in values])
+
+def _output_cols(fallback: bool, mode: str, ci: bool = False, adaptive: bool = False) -> List[str]:
+    """Kolumny wynikowe trybu (w kolejności krotek zwracanych przez _value_frame)."""
+    return (RESULT_COLS + ([COL_LEVEL_USED] if fallback else []) + ([COL_TOL_USED] if adaptive else [])
+            + (MODEL_COLS if mode == MODE_MODEL else []) + (UNCERTAINTY_COLS if ci else []))
+
+# ====== I/O: baza / raport ======
+
+def _pick_sheet_safely(xlsx: Path, prefer: str | None = None) -> str:
+    return xo.probe_workbook(xlsx).pick(prefer)
+
+def load_db_excel(path: Path, sheet: str) -> pd.DataFrame:
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Nie znaleziono bazy danych: {path}\n"
+            "Upewnij się, że istnieje plik 'Baza danych.xlsx'."
+        )
+    # migawka Arrow ze scalania: mapowana współdzielona kopia, bez parsowania xlsx
+    snap = migawka.load_snapshot(path, sheet or DEFAULT_DB_SHEET)
+    if snap is not None and all(c in snap.columns for c in am.REQUIRED_COLUMNS):
+        snap.attrs["db_path"] = str(path)
+        return snap
+
+    chosen_sheet = _pick_sheet_safely(path, prefer=sheet or DEFAULT_DB_SHEET)
+    df = pd.read_excel(path, sheet_name=chosen_sheet, engine="openpyxl")
+
+    # walidacja kolumn:
+    missing = [c for c in am.REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(
+            "Brakuje kolumn w bazie: " + ", ".join(missing) +
+            f"\nPlik: {path.name}, arkusz: {chosen_sheet}"
+        )
+
+    # typy/liczby; kolumny adresowe jako kody słownikowe (porównania = porównania liczb)
+    df = migawka.prepare_offer_frame(df)
+    df.attrs["db_path"] = str(path)  # tu obok zapisuje się indeks lokalizacji
+    return df
+
+def _pick_report_sheet(xlsx: Path) -> str:
+    # tylko nagłówki (odczyt read-only, cache po mtime) – bez parsowania arkuszy
+    name = xo.report_sheet_from_headers(xo.probe_workbook(xlsx).headers)
+    if name is None:
+        raise ValueError("Nie znaleziono w raporcie arkusza z kolumną 'Nr KW'.")
+    return name
+
+def ensure_report_columns(xlsx: Path, sheet: str) -> pd.DataFrame:
+    """Upewnij się, że w raporcie istnieją wymagane kolumny oraz kolumny wynikowe; zwróć DataFrame z arkusza."""
+    df = pd.read_excel(xlsx, sheet_name=sheet, engine="openpyxl")
+    for col in REQUIRED_REPORT_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+    existing = list(df.columns)
+    rest = [c for c in existing if c not in REQUIRED_REPORT_COLUMNS and c not in RESULT_COLS]
+    new_order = REQUIRED_REPORT_COLUMNS + RESULT_COLS + rest
+    df = df.reindex(columns=new_order)
+    return df
+
+# ====== Filtr + obliczenia dla jednego wiersza ======
+
+def _filter_db(
+    df_db: pd.DataFrame,
+    level_key_db: str,
+    level_value: str,
+    area_center_str: str,
+    tol: float,
+) -> Tuple[pd.DataFrame, float, float, float]:
+    try:
+        center = float(str(area_center_str).replace(",", ".").replace(" ", ""))
+    except Exception:
+        center = float("nan")
+
+    lo = center - tol if pd.notna(center) else float("-inf")
+    hi = center + tol if pd.notna(center) else float("inf")
+
+    # indeks lokalizacji: okno metrażu = wyszukiwanie binarne w ofertach danej lokalizacji
+    pos = il.get_index(df_db).window(level_key_db, level_value, lo, hi)
+    out = df_db.iloc[pos].copy()
+    return out, center, lo, hi
+
+def compute_row(
+    row: pd.Series,
+    df_db: pd.DataFrame,
+    level_human: str,
+    tol: float,
+) -> Tuple[str, str, str]:
+    """Zwróć (surowa_śr_m2, skorygowana_śr_m2, wartość_nieruchomości) jako sformatowane stringi."""
+    mapping = {h: (db_key, rp_key) for (h, db_key, rp_key) in ADDRESS_LEVELS}
+    if level_human not in mapping:
+        raise ValueError(f"Nieprawidłowy poziom adresu: {level_human}")
+    db_key, rp_key = mapping[level_human]
+
+    level_value = str(row.get(rp_key, "") or "")
+    obszar = str(row.get("Obszar", "") or "")
+
+    # identyczne zapytanie już policzone (w tym lub poprzednim uruchomieniu)?
+    cache = pc.get_cache(df_db)
+    key = pc.make_key(db_key, level_value, sw.parse_area(obszar), tol)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit  # type: ignore[return-value]
+
+    df_filt, center, lo, hi = _filter_db(df_db, db_key, level_value, obszar, tol)
+
+    # brak wyników albo zbyt mało podobnych
+    if df_filt.empty or len(df_filt) < 5:
+        cache.put(key, (MSG_NO_SIMILAR, MSG_NO_SIMILAR, MSG_NO_SIMILAR))
+        return (MSG_NO_SIMILAR, MSG_NO_SIMILAR, MSG_NO_SIMILAR)
+
+    # 1) średnia surowa i 2) średnia po IQR – jedna konwersja, jedno wywołanie jądra
+    stats = st.price_stats(st.coerce_numeric(df_filt["cena_za_metr"]))
+    mean_raw_m2, mean_adj_m2 = stats.mean_raw, stats.mean_adj
+
+    # 3) wartość nieruchomości
+    prop_value = (mean_adj_m2 * center) if (mean_adj_m2 is not None and pd.notna(center)) else None
+
+    result = (
+        am.format_price_per_m2(mean_raw_m2),
+        am.format_price_per_m2(mean_adj_m2),
+        am.format_currency(prop_value),
+    )
+    cache.put(key, result)
+    return result
+
+# ====== Główny przebieg ======
+
+def _value_frame(
+    df: pd.DataFrame,
+    engine: sw.ValuationEngine,
+    level_human: str,
+    tol: float,
+    workers: int = 1,
+    progress: Optional[Callable[[int, int], None]] = None,
+    fallback: bool = False,
+    approx: bool = False,
+    mode: str = MODE_WINDOW,
+    k: int = sasiedzi.DEFAULT_K,
+    radius_km: float = geo.DEFAULT_RADIUS_KM,
+    ci: bool = False,
+    adaptive: bool = False,
+    as_of: Optional[str] = None,
+    max_age_days: Optional[float] = None,
+    half_life_days: Optional[float] = None,
+) -> List[tuple]:
+    """Wyceń wiersze ramki raportu wybranym trybem (wspólne dla process_report i trybu strumieniowego)."""
+    mapping = {h: (db_key, rp_key) for (h, db_key, rp_key) in ADDRESS_LEVELS}
+    db_key, rp_key = mapping[level_human]
+    if mode == MODE_KNN:
+        return sw.value_report_knn(df, engine, db_key, rp_key, k, progress=progress)
+    if mode == MODE_RADIUS:
+        return sw.value_report_radius(df, engine, tol, radius_km, progress=progress)
+    if fallback:
+        return sw.value_report_fallback(df, engine, _fallback_levels(level_human), tol, workers=workers, progress=progress)
+    if adaptive:
+        results = sw.value_report_adaptive(df, engine, db_key, rp_key, workers=workers, progress=progress)
+    elif as_of is not None:
+        results = sw.value_report_recent(df, engine, db_key, rp_key, tol, as_of, max_age_days, half_life_days,
+                                         progress=progress)
+    elif approx:
+        results = sw.value_report_approx(df, engine, db_key, rp_key, tol, workers=workers, progress=progress)
+    else:
+        results = sw.value_report(df, engine, db_key, rp_key, tol, workers=workers, progress=progress)
+    if mode == MODE_MODEL:
+        results = [r + m for r, m in zip(results, sw.value_report_model(df, engine, results))]
+    if ci:
+        results = [r + u for r, u in zip(results, sw.value_report_uncertainty(df, engine, db_key, rp_key, tol))]
+    return results
+
+def _canon(value) -> str:
+    """Wartość komórki do odcisku – tak samo z pandas i z openpyxl (54 i 54.0 → '54.0', puste → '')."""
+    if value is None or isinstance(value, (bool, np.bool_)):
+        return "" if value is None else str(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return "" if np.isnan(value) else repr(float(value))
+    return str(value).strip()
+
+def _row_fingerprints(
+    df: pd.DataFrame,
+    engine: sw.ValuationEngine,
+    level_human: str,
+    tol: float,
+    fallback: bool = False,
+    approx: bool = False,
+    mode: str = MODE_WINDOW,
+    k: int = sasiedzi.DEFAULT_K,
+    radius_km: float = geo.DEFAULT_RADIUS_KM,
+    ci: bool = False,
+    adaptive: bool = False,
+    as_of: Optional[str] = None,
+    max_age_days: Optional[float] = None,
+    half_life_days: Optional[float] = None,
+) -> List[str]:
+    """
+    Odcisk każdego wiersza: kolumny wejściowe wyceny + parametry trybu + skrót wycinka bazy.
+    Wycinek w trybie okna = oferty lokalizacji wiersza; w pozostałych trybach – cała baza
+    (z cechami / współrzędnymi, jeśli tryb ich używa).
+    """
+    mapping = {h: (db_key, rp_key) for (h, db_key, rp_key) in ADDRESS_LEVELS}
+    db_key, rp_key = mapping[level_human]
+    n = len(df.index)
+    params = f"{level_human}|{tol!r}|{mode}|{int(fallback)}|{int(approx)}|{int(ci)}"
+    if adaptive:
+        params += f"|adapt:{sw.ADAPT_TARGET}:{sw.ADAPT_START!r}:{sw.ADAPT_GROWTH!r}:{sw.ADAPT_CAP!r}"
+    if as_of is not None:
+        params += f"|czas:{as_of}:{max_age_days!r}:{half_life_days!r}"
+    if mode == MODE_KNN:
+        params += f"|{k}"
+    if mode == MODE_RADIUS:
+        params += f"|{radius_km!r}"
+
+    if mode in (MODE_WINDOW, MODE_MODEL) and not fallback:
+        values = sw._report_inputs(df, rp_key)
+        slices = engine.slice_fingerprints(db_key, values)
+    else:
+        slices = [engine.index.fingerprint] * n
+    if mode in (MODE_KNN, MODE_MODEL):
+        extra = model_cen.model_fingerprint(engine.df_db, engine.index)
+        slices = [s + extra for s in slices]
+    elif mode == MODE_RADIUS:
+        extra = geo.geo_fingerprint(engine.df_db, engine.index)
+        slices = [s + extra for s in slices]
+    if as_of is not None:
+        extra = ic.get_time_index(engine.df_db, engine.index).fingerprint
+        slices = [s + extra for s in slices]
+
+    cols = [df[c].tolist() if c in df.columns else [""] * n for c in VALUATION_INPUT_COLUMNS]
+    out: List[str] = []
+    for i in range(n):
+        text = "\x1f".join([params, slices[i]] + [_canon(col[i]) for col in cols])
+        out.append(hashlib.sha1(text.encode("utf-8")).hexdigest()[:16])
+    return out
+
+def _write_changed_cells(xlsx: Path, sheet: str, rows: List[int], values: List[tuple], cols: List[str]) -> None:
+    """Zapisz tylko komórki wyników przeliczonych wierszy (reszta arkusza i formatowanie bez zmian)."""
+    if not rows:
+        return  # nic się nie zmieniło – bez wczytywania i zapisu skoroszytu
+    wb = openpyxl.load_workbook(xlsx)
+    try:
+        ws = wb[sheet]
+        where = {c.value: c.column for c in ws[1] if c.value is not None}
+        for i, vals in zip(rows, values):
+            for col, v in zip(cols, vals):
+                ws.cell(row=i + 2, column=where[col], value=v)  # wiersz 1 = nagłówek
+        wb.save(xlsx)
+    finally:
+        wb.close()
+
+class _LocalValuation:
+    """Wycena ramek raportu w tym procesie (baza wczytana tutaj) – stałe opcje trybu."""
+
+    def __init__(self, df_db: pd.DataFrame, level_human: str, tol: float, workers: int, options: Dict[str, object]):
+        self.cache = pc.get_cache(df_db)
+        self.cache.reset_stats()
+        self.engine = sw.ValuationEngine(df_db, cache=self.cache)
+        self.level_human, self.tol, self.workers, self.options = level_human, tol, workers, options
+
+    def fingerprints(self, df: pd.DataFrame) -> List[str]:
+        return _row_fingerprints(df, self.engine, self.level_human, self.tol, **self.options)
+
+    def values(self, df: pd.DataFrame, progress: Optional[Callable[[int, int], None]] = None) -> List[tuple]:
+        return _value_frame(df, self.engine, self.level_human, self.tol, workers=self.workers, progress=progress,
+                            **self.options)
+
+    def finish(self) -> None:
+        self.cache.save()
+        print(self.cache.stats_text())
+
+class _ServiceValuation:
+    """Wycena przez serwer_wyceny; gdy serwer przestanie odpowiadać – dalej w procesie."""
+
+    def __init__(self, client: kw.ServiceClient, db_xlsx: Path, db_sheet: str, level_human: str, tol: float,
+                 workers: int, options: Dict[str, object]):
+        self.client, self.db_xlsx, self.db_sheet = client, db_xlsx, db_sheet
+        self.level_human, self.tol, self.workers, self.options = level_human, tol, workers, options
+        self.local: Optional[_LocalValuation] = None
+
+    def _fall_back(self, e: Exception) -> _LocalValuation:
+        print(f"[WARN] {e} – dalej liczę w procesie.", file=sys.stderr)
+        with prof.stage("wczytanie bazy"):
+            df_db = load_db_excel(self.db_xlsx, self.db_sheet)
+        self.local = _LocalValuation(df_db, self.level_human, self.tol, self.workers, self.options)
+        return self.local
+
+    def fingerprints(self, df: pd.DataFrame) -> List[str]:
+        if self.local is None:
+            try:
+                return self.client.fingerprints(df, VALUATION_INPUT_COLUMNS, self.level_human, self.tol, **self.options)
+            except kw.ServiceError as e:
+                self._fall_back(e)
+        return self.local.fingerprints(df)
+
+    def values(self, df: pd.DataFrame, progress: Optional[Callable[[int, int], None]] = None) -> List[tuple]:
+        if self.local is None:
+            try:
+                return self.client.values(df, VALUATION_INPUT_COLUMNS, self.level_human, self.tol,
+                                          workers=self.workers, progress=progress, **self.options)
+            except kw.ServiceError as e:
+                self._fall_back(e)
+        return self.local.values(df, progress)
+
+    def finish(self) -> None:
+        if self.local is not None:
+            self.local.finish()
+        elif self.client.cache_text:
+            print(f"{self.client.cache_text} (serwer wyceny)")
+
+def _open_valuation(db_xlsx: Path, db_sheet: str, level_human: str, tol: float, workers: int, service: bool,
+                    options: Dict[str, object]):
+    """Serwer wyceny z tą bazą w pamięci (gdy działa i `service`), inaczej wczytanie bazy tutaj."""
+    client = kw.connect(db_xlsx, db_sheet) if service else None
+    if client is not None:
+        print(f"Wycena przez serwer: {client.url} (baza w pamięci serwera, {client.rows} ofert).")
+        return _ServiceValuation(client, db_xlsx, db_sheet, level_human, tol, workers, options)
+    with prof.stage("wczytanie bazy"):
+        df_db = load_db_excel(db_xlsx, db_sheet)
+    with prof.stage("indeks i odciski"):
+        return _LocalValuation(df_db, level_human, tol, workers, options)
+
+def _check_options(level_human: str, mode: str, fallback: bool, ci: bool = False,
+                   adaptive: bool = False, approx: bool = False, temporal: bool = False) -> None:
+    if level_human not in {h for (h, _, _) in ADDRESS_LEVELS}:
+        raise ValueError(f"Nieprawidłowy poziom adresu: {level_human}")
+    if mode not in MODES:
+        raise ValueError(f"Nieznany tryb wyceny: {mode} (dostępne: {', '.join(MODES)})")
+    if fallback and mode != MODE_WINDOW:
+        raise ValueError("Poszerzanie poziomu działa tylko w trybie 'okno'.")
+    if ci and (fallback or mode not in (MODE_WINDOW, MODE_MODEL)):
+        raise ValueError("Przedziały ufności działają tylko w trybach 'okno' i 'model' (bez poszerzania poziomu).")
+    if adaptive and (fallback or approx or ci or mode not in (MODE_WINDOW, MODE_MODEL)):
+        raise ValueError("Okno adaptacyjne działa tylko w trybach 'okno' i 'model' "
+                         "(bez poszerzania poziomu, kostki i przedziałów ufności).")
+    if temporal and (fallback or approx or ci or adaptive or mode not in (MODE_WINDOW, MODE_MODEL)):
+        raise ValueError("Wycena wg daty pobrania działa tylko w trybach 'okno' i 'model' "
+                         "(bez poszerzania poziomu, kostki, przedziałów ufności i okna adaptacyjnego).")
+
+def _temporal_options(as_of: Optional[str], max_age_days: Optional[float],
+                      half_life_days: Optional[float]) -> Dict[str, object]:
+    """Opcje wyceny wg daty pobrania: dzień „stanu na” ustalony raz (domyślnie dzisiaj), gdy użyto którejś z nich."""
+    if as_of is None and max_age_days is None and half_life_days is None:
+        return dict(as_of=None, max_age_days=None, half_life_days=None)
+    if (max_age_days is not None and max_age_days <= 0) or (half_life_days is not None and half_life_days <= 0):
+        raise ValueError("Liczba dni i okres połowicznego zaniku muszą być dodatnie.")
+    return dict(as_of=ic.resolve_as_of(as_of), max_age_days=max_age_days, half_life_days=half_life_days)
+
+def process_report(
+    report_xlsx: Path,
+    db_xlsx: Path | None = None,
+    db_sheet: str = DEFAULT_DB_SHEET,
+    level_human: str = DEFAULT_LEVEL,
+    tol: float = DEFAULT_TOL,
+    workers: int = 1,
+    progress: Optional[Callable[[int, int], None]] = None,
+    fallback: bool = False,
+    approx: bool = False,
+    mode: str = MODE_WINDOW,
+    k: int = sasiedzi.DEFAULT_K,
+    radius_km: float = geo.DEFAULT_RADIUS_KM,
+    incremental: bool = False,
+    ci: bool = False,
+    adaptive: bool = False,
+    service: bool = True,
+    as_of: Optional[str] = None,
+    max_age_days: Optional[float] = None,
+    half_life_days: Optional[float] = None,
+) -> Tuple[int, str]:
+    """
+    Przetwórz cały raport: zwróć (liczba_przeliczonych_wierszy, arkusz_raportu).
+    Zapis odbywa się w miejscu (ten sam plik raportu).
+    `workers` > 1 – wycena na wielu procesach; `progress(zrobione, wszystkie)` – postęp (np. dla GUI).
+    `fallback` – przy < 5 ofertach poszerz poziom (Ulica → … → Powiat); użyty poziom w COL_LEVEL_USED.
+    `approx` – wycena przybliżona z kostki statystyk (kostka.py); nie łączy się z `fallback`.
+    `mode` – dobór porównywalnych: MODE_WINDOW (okno ±tol), MODE_KNN (`k` najbliższych wg cech)
+    albo MODE_RADIUS (oferty w promieniu `radius_km` od wiersza i w oknie ±tol; wiersz geokodowany
+    z pełnego adresu, poziom adresu nie jest używany) albo MODE_MODEL (okno ±tol jak MODE_WINDOW
+    plus wycena regionalnym modelem hedonicznym w kolumnach MODEL_COLS – do porównania).
+    `incremental` – każdy wiersz dostaje odcisk (COL_ROW_FP); przy kolejnym uruchomieniu przelicz
+    tylko wiersze o zmienionym odcisku i nadpisz wyłącznie ich komórki wynikowe (gdy arkusz ma już
+    kolumny wyników trybu). Bez `incremental` odcisk zapisywany tylko, gdy arkusz ma już tę kolumnę.
+    `ci` – dodatkowo UNCERTAINTY_COLS: liczba porównywalnych, odchylenie i bootstrapowy przedział
+    ufności średniej skorygowanej (tryby okno/model).
+    `adaptive` – okno metrażu dobierane per wiersz zamiast stałego ±tol: od ±5% metrażu poszerzane
+    geometrycznie (do ±50%), aż zbierze sw.ADAPT_TARGET ofert; użyta tolerancja w COL_TOL_USED.
+    `service` – użyj serwera wyceny (serwer_wyceny.py), jeśli działa; wyniki takie same jak w procesie.
+    `as_of` / `max_age_days` / `half_life_days` – tylko oferty pobrane do dnia `as_of` (RRRR-MM-DD,
+    domyślnie dzisiaj) i z ostatnich `max_age_days` dni; `half_life_days` – średnie ważone wiekiem
+    oferty (waga 0.5 co tyle dni). Wymaga kolumny 'data_pobrania' w bazie (scalanie.py).
+    """
+    db_xlsx = db_xlsx or DEFAULT_DB_XLSX
+    temporal = _temporal_options(as_of, max_age_days, half_life_days)
+    _check_options(level_human, mode, fallback, ci, adaptive, approx, temporal["as_of"] is not None)
+    options = dict(fallback=fallback, approx=approx, mode=mode, k=k, radius_km=radius_km, ci=ci, adaptive=adaptive,
+                   **temporal)
+
+    # 1) baza: w pamięci serwera wyceny albo wczytana tutaj
+    valuation = _open_valuation(Path(db_xlsx), db_sheet, level_human, tol, workers, service, options)
+
+    # 2) raport + arkusz
+    with prof.stage("wczytanie raportu"):
+        rp_sheet = _pick_report_sheet(Path(report_xlsx))
+        df_rp = ensure_report_columns(Path(report_xlsx), rp_sheet)
+
+    # 3) wycena wsadowa wszystkich wierszy (silnik_wyceny – wynik jak compute_row)
+    out = df_rp.copy()
+    n = len(out.index)
+    # odciski tylko dla trybu przyrostowego albo gdy raport ma już ich kolumnę (odświeżenie)
+    write_fp = incremental or COL_ROW_FP in out.columns
+    if write_fp:
+        with prof.stage("indeks i odciski"):
+            fps = valuation.fingerprints(out)
+    cols = _output_cols(fallback, mode, ci, adaptive)
+
+    if incremental and all(c in out.columns for c in cols + [COL_ROW_FP]):
+        old = [_canon(v) for v in out[COL_ROW_FP].tolist()]
+        changed = [i for i in range(n) if fps[i] != old[i]]
+        results = []
+        if changed:
+            with prof.stage("wycena"):
+                results = valuation.values(out.iloc[changed].reset_index(drop=True), progress)
+        elif progress is not None:
+            progress(n, n)
+        with prof.stage("zapis"):
+            _write_changed_cells(Path(report_xlsx), rp_sheet, changed,
+                                 [tuple(r) + (fps[i],) for i, r in zip(changed, results)], cols + [COL_ROW_FP])
+        valuation.finish()
+        print(f"Tryb przyrostowy: przeliczono {len(changed)} z {n} wierszy.")
+        return len(changed), rp_sheet
+
+    with prof.stage("wycena"):
+        results = valuation.values(out, progress)
+    out[COL_MEAN_M2]     = [r[0] for r in results]
+    out[COL_MEAN_M2_ADJ] = [r[1] for r in results]
+    out[COL_PROP_VALUE]  = [r[2] for r in results]
+    if fallback:
+        _put_level_used(out, [r[3] for r in results])
+    if mode == MODE_MODEL:
+        at = 4 if adaptive else 3
+        _put_model_cols(out, [r[at:at + len(MODEL_COLS)] for r in results])
+    if adaptive:
+        _put_tol_used(out, [r[3] for r in results])
+    if ci:
+        _put_uncertainty_cols(out, [r[-len(UNCERTAINTY_COLS):] for r in results], after=cols[-len(UNCERTAINTY_COLS) - 1])
+    if write_fp:
+        _put_row_fp(out, fps, after=cols[-1])
+
+    # 4) zapis
+    with prof.stage("zapis"), pd.ExcelWriter(Path(report_xlsx), engine="openpyxl", mode="a", if_sheet_exists="replace") as wr:
+        out.to_excel(wr, sheet_name=rp_sheet, index=False)
+
+    valuation.finish()
+
+    return n, rp_sheet
+
+# ====== Tryb strumieniowy (duże raporty) ======
+
+def _batch_frame(rows: List[tuple], src_idx: Dict[str, int]) -> pd.DataFrame:
+    """Paczka wierszy jako ramka z kolumnami potrzebnymi do wyceny (pusta komórka → NaN, jak pandas)."""
+    return pd.DataFrame({
+        c: [np.nan if r[src_idx[c]] is None else r[src_idx[c]] for r in rows]
+        for c in VALUATION_INPUT_COLUMNS if c in src_idx
+    }, index=range(len(rows)))
+
+def _is_empty_row(row: tuple) -> bool:
+    return all(v is None or (isinstance(v, str) and v == "") for v in row)
+
+def process_report_streaming(
+    report_xlsx: Path,
+    db_xlsx: Path | None = None,
+    db_sheet: str = DEFAULT_DB_SHEET,
+    level_human: str = DEFAULT_LEVEL,
+    tol: float = DEFAULT_TOL,
+    workers: int = 1,
+    progress: Optional[Callable[[int, int], None]] = None,
+    batch_rows: int = DEFAULT_STREAM_BATCH,
+    fallback: bool = False,
+    approx: bool = False,
+    mode: str = MODE_WINDOW,
+    k: int = sasiedzi.DEFAULT_K,
+    radius_km: float = geo.DEFAULT_RADIUS_KM,
+    ci: bool = False,
+    adaptive: bool = False,
+    service: bool = True,
+    as_of: Optional[str] = None,
+    max_age_days: Optional[float] = None,
+    half_life_days: Optional[float] = None,
+) -> Tuple[int, str]:
+    """
+    Jak process_report, ale bez wczytywania raportu do pamięci:
+    arkusz czytany paczkami wierszy (openpyxl read_only), każda paczka wyceniana i od razu
+    zapisywana do nowego skoroszytu w trybie write_only (podmiana pliku na końcu).
+    Pamięć ~ jedna paczka; czas liniowy względem liczby wierszy.
+    Uwaga: przepisywane są wartości komórek – formatowanie arkuszy nie jest zachowywane.
+    Odcisk wiersza (COL_ROW_FP) odświeżany tylko, gdy arkusz ma już tę kolumnę.
+    """
+    report_xlsx = Path(report_xlsx)
+    db_xlsx = db_xlsx or DEFAULT_DB_XLSX
+    temporal = _temporal_options(as_of, max_age_days, half_life_days)
+    _check_options(level_human, mode, fallback, ci, adaptive, approx, temporal["as_of"] is not None)
+    options = dict(fallback=fallback, approx=approx, mode=mode, k=k, radius_km=radius_km, ci=ci, adaptive=adaptive,
+                   **temporal)
+    valuation = _open_valuation(Path(db_xlsx), db_sheet, level_human, tol, workers, service, options)
+
+    # pozostałe arkusze przepisujemy z formułami; arkusz raportu – wartościami (jak pandas)
+    src = openpyxl.load_workbook(report_xlsx, read_only=True, data_only=False)
+    src_vals = openpyxl.load_workbook(report_xlsx, read_only=True, data_only=True)
+    tmp = report_xlsx.with_name(report_xlsx.stem + ".tmp" + report_xlsx.suffix)
+    try:
+        headers = xo.probe_workbook(report_xlsx).headers
+        rp_sheet = _pick_report_sheet(report_xlsx)
+
+        dst = openpyxl.Workbook(write_only=True)
+        n = 0
+        for ws in src.worksheets:
+            out_ws = dst.create_sheet(ws.title)
+            if ws.title != rp_sheet:
+                for row in ws.iter_rows(values_only=True):
+                    out_ws.append(list(row))
+                continue
+            ws = src_vals[rp_sheet]
+
+            # układ kolumn jak w ensure_report_columns: wymagane + wynikowe + pozostałe
+            header = headers[rp_sheet]
+            src_idx = {c: i for i, c in enumerate(header) if c is not None}
+            write_fp = COL_ROW_FP in src_idx
+            result_cols = _output_cols(fallback, mode, ci, adaptive) + ([COL_ROW_FP] if write_fp else [])
+            rest = [i for i, c in enumerate(header) if c not in REQUIRED_REPORT_COLUMNS and c not in result_cols]
+            out_ws.append(REQUIRED_REPORT_COLUMNS + result_cols + [header[i] for i in rest])
+            req_idx = [src_idx.get(c) for c in REQUIRED_REPORT_COLUMNS]
+            total = max((ws.max_row or 1) - 1, 0)
+
+            batch: List[tuple] = []
+            pending_empty: List[tuple] = []
+
+            def flush(rows: List[tuple]) -> None:
+                frame = _batch_frame(rows, src_idx)
+                with prof.stage("wycena"):
+                    res = valuation.values(frame)
+                fps: List[list] = [[]] * len(rows)
+                if write_fp:
+                    with prof.stage("indeks i odciski"):
+                        fps = [[fp] for fp in valuation.fingerprints(frame)]
+                for r, values, fp in zip(rows, res, fps):
+                    out_ws.append([r[i] if i is not None else None for i in req_idx] + list(values) + fp
+                                  + [r[i] for i in rest])
+
+            width = len(header)
+            for row in ws.iter_rows(min_row=2, values_only=True):
+                row = tuple(row) + (None,) * (width - len(row))
+                # puste wiersze na końcu arkusza pomijamy (jak pandas) – buforujemy je do pierwszego niepustego
+                if _is_empty_row(row):
+                    pending_empty.append(row)
+                    continue
+                batch.extend(pending_empty)
+                pending_empty.clear()
+                batch.append(row)
+                if len(batch) >= batch_rows:
+                    flush(batch)
+                    n += len(batch)
+                    batch = []
+                    if progress is not None:
+                        progress(n, max(total, n))
+            if batch:
+                flush(batch)
+                n += len(batch)
+            if progress is not None:
+                progress(n, n)
+
+        with prof.stage("zapis"):
+            dst.save(tmp)
+    finally:
+        src.close()
+        src_vals.close()
+    os.replace(tmp, report_xlsx)
+
+    valuation.finish()
+    return n, rp_sheet
+
+# ====== CLI ======
+
+def _argv_or_none(i: int) -> Optional[str]:
+    return sys.argv[i] if len(sys.argv) > i and sys.argv[i].strip() else None
+
+def _pop_flag(name: str) -> bool:
+    """Zdejmij z sys.argv przełącznik (np. '--stream'); True, jeśli był podany."""
+    if name not in sys.argv:
+        return False
+    sys.argv.remove(name)
+    return True
+
+def _pop_option(name: str) -> Optional[str]:
+    """Zdejmij z sys.argv opcję z wartością ('--workers 4'); None, gdy jej nie podano."""
+    if name not in sys.argv:
+        return None
+    i = sys.argv.index(name)
+    val = sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+    del sys.argv[i:i + 2]
+    return val
+
+def _int_option(name: str, default: int) -> int:
+    val = _pop_option(name)
+    if val is None:
+        return default
+    try:
+        return max(1, int(val))
+    except ValueError:
+        print(f"[WARN] {name} wymaga liczby – używam {default}.", file=sys.stderr)
+        return default
+
+def _optional_float(name: str) -> Optional[float]:
+    """Liczba z opcji albo None (opcji nie podano lub wartość nie jest liczbą)."""
+    val = _pop_option(name)
+    if val is None:
+        return None
+    try:
+        return float(val.replace(",", "."))
+    except ValueError:
+        print(f"[WARN] {name} wymaga liczby – pomijam.", file=sys.stderr)
+        return None
+
+def _float_option(name: str, default: float) -> float:
+    val = _pop_option(name)
+    if val is None:
+        return default
+    try:
+        return max(0.1, float(val.replace(",", ".")))
+    except ValueError:
+        print(f"[WARN] {name} wymaga liczby – używam {default}.", file=sys.stderr)
+        return default
+
+if __name__ == "__main__":
+    workers  = _int_option("--workers", 1)
+    k        = _int_option("--k", sasiedzi.DEFAULT_K)
+    mode     = _pop_option("--tryb") or MODE_WINDOW
+    radius   = _float_option("--promien", geo.DEFAULT_RADIUS_KM)
+    stream   = _pop_flag("--stream")
+    fallback = _pop_flag("--fallback")
+    approx   = _pop_flag("--approx")
+    incremental = _pop_flag("--przyrostowo")
+    ci       = _pop_flag("--przedzialy")
+    adaptive = _pop_flag("--adaptacyjnie")
+    as_of    = _pop_option("--na-dzien")
+    max_age  = _optional_float("--ostatnie-dni")
+    half_life = _optional_float("--polokres")
+    service  = not _pop_flag("--bez-serwera")
+    profile  = prof.pop_flag()
+    report_arg = _argv_or_none(1)
+    if not report_arg:
+        print("Użycie: python automat.py <raport.xlsx> [<baza.xlsx> [<arkusz_bazy=Polska> [<poziom=Miejscowość> [<tolerancja=15>]]]]\n"
+              "       [--workers N] [--stream] [--fallback] [--approx] [--adaptacyjnie] [--tryb okno|knn|promien|model] [--k 10] [--promien 2] [--przyrostowo] [--przedzialy] [--bez-serwera] [--profile]\n"
+              "       [--na-dzien RRRR-MM-DD] [--ostatnie-dni N] [--polokres DNI]")
+        sys.exit(1)
+    db_arg     = _argv_or_none(2) or str(DEFAULT_DB_XLSX)
+    db_sheet   = _argv_or_none(3) or DEFAULT_DB_SHEET
+    level      = _argv_or_none(4) or DEFAULT_LEVEL
+    tol_str    = _argv_or_none(5) or str(DEFAULT_TOL)
+    try:
+        tol = float(str(tol_str).replace(",", ".").replace(" ", ""))
+    except Exception:
+        tol = DEFAULT_TOL
+
+    with prof.session("automat", profile):
+        if stream:
+            if incremental:
+                print("[WARN] --przyrostowo nie działa z --stream – przeliczam cały raport.", file=sys.stderr)
+            n, sheet = process_report_streaming(Path(report_arg), Path(db_arg), db_sheet=db_sheet, level_human=level,
+                                                tol=tol, workers=workers, fallback=fallback, approx=approx,
+                                                mode=mode, k=k, radius_km=radius, ci=ci, adaptive=adaptive,
+                                                service=service, as_of=as_of, max_age_days=max_age,
+                                                half_life_days=half_life)
+        else:
+            n, sheet = process_report(Path(report_arg), Path(db_arg), db_sheet=db_sheet, level_human=level, tol=tol,
+                                      workers=workers, fallback=fallback, approx=approx, mode=mode, k=k,
+                                      radius_km=radius, incremental=incremental, ci=ci, adaptive=adaptive,
+                                      service=service, as_of=as_of, max_age_days=max_age,
+                                      half_life_days=half_life)
+    print(f"Zrobione. Przeliczono {n} wierszy w arkuszu '{sheet}'.")
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark_wyceny.py — benchmark wyceny raportu na syntetycznych danych
+- baza ofert (np. 10 tys. – 1 mln wierszy) w formacie jak po scalaniu; lokalizacje losowane
+  z TERYT.xlsx z wagami jak w ogłoszeniach: miasta na prawach powiatu ≫ siedziby gmin ≫ wsie,
+  do tego losowa „popularność” miejscowości (rozkład log-normalny),
+- raport (np. 100 – 100 tys. wierszy) z tych samych lokalizacji, część wierszy bez metrażu,
+- etapy mierzone osobno: wczytanie bazy (migawka / xlsx), wczytanie raportu, budowa indeksu,
+  filtr (okna metrażu), statystyki (statystyki.batch_price_stats), pełna wycena
+  (silnik_wyceny.value_report, bez cache), zapis wyników do raportu, a na końcu cały
+  automat.py jako osobny proces (zimny start: bez indeksu i cache obok bazy, bez serwera wyceny),
+- wynik w JSON (commit, wersje, parametry, czasy etapów) – do porównania między commitami.
+
+Duże bazy (> XLSX_MAX_ROWS wierszy) zapisywane są tylko jako migawka Arrow (migawka.py) obok
+xlsx z samym nagłówkiem – zapis i odczyt milionowego xlsx trwałby dłużej niż cały pomiar.
+
+Użycie:
+    python benchmark_wyceny.py [--baza 10000,100000] [--raport 100,10000] [--poziom Miejscowość]
+                               [--tol 15] [--ziarno 0] [--folder DIR] [--wynik benchmark_wyceny.json]
+                               [--bez-procesu] [--porownaj poprzedni.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import automat
+import indeks_lokalizacji as il
+import migawka
+import pamiec_wycen as pc
+import silnik_wyceny as sw
+import statystyki as st
+
+HERE = Path(__file__).resolve().parent
+TERYT_XLSX = HERE / "TERYT.xlsx"
+DB_SHEET = "Polska"
+REPORT_SHEET = "raport"
+XLSX_MAX_ROWS = 200_000
+
+DEFAULT_DB_SIZES = [10_000, 100_000]
+DEFAULT_REPORT_SIZES = [100, 10_000]
+
+# waga miejscowości (przed losową popularnością) i bazowa cena za m²
+WEIGHT_CITY, WEIGHT_SEAT, WEIGHT_VILLAGE = 400.0, 12.0, 1.0
+PRICE_CITY, PRICE_SEAT, PRICE_VILLAGE = 11_000.0, 6_500.0, 4_500.0
+OUTLIER_SHARE = 0.01
+MISSING_AREA_SHARE = 0.03
+
+STREETS = [
+    "Polna", "Leśna", "Słoneczna", "Krótka", "Szkolna", "Ogrodowa", "Lipowa", "Brzozowa", "Łąkowa",
+    "Kwiatowa", "Sosnowa", "Kościelna", "Akacjowa", "Parkowa", "Zielona", "Kolejowa", "Sportowa",
+    "Długa", "Mickiewicza", "Słowackiego", "Kopernika", "Kościuszki", "Piłsudskiego", "Jana Pawła II",
+]
+MATERIALS = ["cegła", "wielka płyta", "pustak", "silikat", "beton", "żelbet", "inne"]
+
+
+# ===== Dane syntetyczne =====
+
+def load_places(teryt_xlsx: Path = TERYT_XLSX) -> pd.DataFrame:
+    """Wiersze TERYT (województwo … dzielnica) z wagą losowania i bazową ceną za m²."""
+    t = pd.read_excel(teryt_xlsx, dtype=str).fillna("")
+    t.columns = ["wojewodztwo", "powiat", "gmina", "miejscowosc", "dzielnica"]
+    t["wojewodztwo"] = t["wojewodztwo"].str.title()
+    city = t["powiat"] == t["miejscowosc"]      # miasto na prawach powiatu
+    seat = ~city & (t["gmina"] == t["miejscowosc"])
+    kind_weight = np.select([city, seat], [WEIGHT_CITY, WEIGHT_SEAT], WEIGHT_VILLAGE)
+    # waga dzielona między dzielnice tej samej miejscowości – liczy się miejscowość, nie liczba wierszy
+    n_rows = t.groupby(["wojewodztwo", "powiat", "gmina", "miejscowosc"])["dzielnica"].transform("size")
+    t["waga"] = kind_weight / n_rows.to_numpy()
+    t["cena_m2"] = np.select([city, seat], [PRICE_CITY, PRICE_SEAT], PRICE_VILLAGE)
+    return t
+
+
+def _draw_places(places: pd.DataFrame, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    w = places["waga"].to_numpy() * places["popularnosc"].to_numpy()
+    idx = rng.choice(len(places), size=n, p=w / w.sum())
+    return places.iloc[idx].reset_index(drop=True)
+
+
+def _with_popularity(places: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Losowa popularność i poziom cen miejscowości (wspólne dla bazy i raportu)."""
+    key = places["wojewodztwo"] + "|" + places["powiat"] + "|" + places["gmina"] + "|" + places["miejscowosc"]
+    codes, uniq = pd.factorize(key)
+    out = places.copy()
+    out["popularnosc"] = rng.lognormal(0.0, 1.0, len(uniq))[codes]
+    out["cena_m2"] = out["cena_m2"] * rng.lognormal(0.0, 0.15, len(uniq))[codes]
+    return out
+
+
+def _area(n: int, rng: np.random.Generator) -> np.ndarray:
+    return np.round(np.clip(rng.lognormal(np.log(55.0), 0.35, n), 15.0, 250.0), 2)
+
+
+def make_db(n: int, places: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Baza ofert w formacie scalonego pliku (teksty jak ze scrapera: '645 000 zł', '54.0')."""
+    p = _draw_places(places, n, rng)
+    metry = _area(n, rng)
+    price_m2 = p["cena_m2"].to_numpy() * rng.lognormal(0.0, 0.2, n)
+    outlier = rng.random(n) < OUTLIER_SHARE
+    price_m2[outlier] *= rng.choice([0.3, 3.0], int(outlier.sum()))
+    price_m2 = np.round(price_m2)
+    cena = np.round(price_m2 * metry, -3)
+    rooms = np.clip(np.round(metry / 22.0 + rng.normal(0.0, 0.6, n)), 1, 6).astype(int)
+    floor = rng.integers(0, 11, n)
+    return pd.DataFrame({
+        "cena": [f"{int(c):,} zł".replace(",", " ") for c in cena],
+        "cena_za_metr": price_m2.astype(int),
+        "metry": metry,
+        "liczba_pokoi": rooms,
+        "pietro": np.where(floor == 0, "parter", floor.astype(str)),
+        "rynek": np.where(rng.random(n) < 0.35, "pierwotny", "wtórny"),
+        "rok_budowy": rng.integers(1900, 2026, n),
+        "material": rng.choice(MATERIALS, n),
+        "wojewodztwo": p["wojewodztwo"],
+        "powiat": p["powiat"],
+        "gmina": p["gmina"],
+        "miejscowosc": p["miejscowosc"],
+        "dzielnica": p["dzielnica"],
+        "ulica": rng.choice(STREETS, n),
+        "link": [f"https://www.otodom.pl/pl/oferta/benchmark-ID{i:07d}" for i in range(n)],
+    })
+
+
+def make_report(n: int, places: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """Raport KW z lokalizacjami z tego samego rozkładu co baza; 'Obszar' jak w raporcie ('93,2')."""
+    p = _draw_places(places, n, rng)
+    area = _area(n, rng)
+    obszar = [f"{a:.1f}".replace(".", ",") for a in area]
+    for i in np.flatnonzero(rng.random(n) < MISSING_AREA_SHARE):
+        obszar[i] = ""
+    return pd.DataFrame({
+        "Nr KW": [f"WA1M/{i:08d}/1" for i in range(n)],
+        "Województwo": p["wojewodztwo"],
+        "Powiat": p["powiat"],
+        "Gmina": p["gmina"],
+        "Miejscowość": p["miejscowosc"],
+        "Dzielnica": p["dzielnica"],
+        "Ulica": rng.choice(STREETS, n),
+        "Obszar": obszar,
+    })
+
+
+def write_db(df: pd.DataFrame, db_xlsx: Path) -> str:
+    """Zapisz bazę jak scalanie (xlsx + migawka); zwraca źródło, z którego czyta automat."""
+    big = len(df) > XLSX_MAX_ROWS and migawka.available()
+    src = df.iloc[:0] if big else df
+    with pd.ExcelWriter(db_xlsx, engine="openpyxl") as wr:
+        src.to_excel(wr, sheet_name=DB_SHEET, index=False)
+    if migawka.publish_snapshot(df, db_xlsx, DB_SHEET) is not None:
+        return "migawka"
+    return "xlsx"
+
+
+def _clear_side_files(db_xlsx: Path) -> None:
+    """Usuń indeks i cache wycen obok bazy – pomiar od zimnego startu."""
+    for p in (il.index_path(db_xlsx), pc.cache_path(db_xlsx)):
+        p.unlink(missing_ok=True)
+
+
+# ===== Pomiar =====
+
+class Stopwatch:
+    """Czasy nazwanych etapów (sekundy, ścienne)."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - t, 4)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_case(
+    db_xlsx: Path,
+    df_db_source: str,
+    rp_xlsx: Path,
+    level_human: str,
+    tol: float,
+    subprocess_run: bool = True,
+) -> Dict[str, object]:
+    """Zmierz etapy wyceny jednego raportu względem jednej (zapisanej) bazy."""
+    db_key, rp_key = {h: (d, r) for (h, d, r) in automat.ADDRESS_LEVELS}[level_human]
+    timer = Stopwatch()
+    _clear_side_files(db_xlsx)
+
+    with timer.stage("wczytanie_bazy"):
+        df_db = automat.load_db_excel(db_xlsx, DB_SHEET)
+    with timer.stage("wczytanie_raportu"):
+        df_rp = automat.ensure_report_columns(rp_xlsx, REPORT_SHEET)
+    with timer.stage("indeks"):
+        engine = sw.ValuationEngine(df_db, index=il.LocationIndex.build(df_db))
+
+    level_values = sw._report_inputs(df_rp, rp_key)
+    areas = sw._report_inputs(df_rp, "Obszar")
+    with timer.stage("filtr"):
+        rows, windows = engine.windows(db_key, level_values, areas, tol)
+    with timer.stage("statystyki"):
+        if rows:
+            st.batch_price_stats(np.concatenate(windows), np.array([w.size for w in windows]))
+    with timer.stage("wycena"):
+        results = sw.value_report(df_rp, engine, db_key, rp_key, tol)
+    with timer.stage("zapis"):
+        out = df_rp.copy()
+        out[automat.COL_MEAN_M2] = [r[0] for r in results]
+        out[automat.COL_MEAN_M2_ADJ] = [r[1] for r in results]
+        out[automat.COL_PROP_VALUE] = [r[2] for r in results]
+        with pd.ExcelWriter(rp_xlsx, engine="openpyxl", mode="a", if_sheet_exists="replace") as wr:
+            out.to_excel(wr, sheet_name=REPORT_SHEET, index=False)
+
+    if subprocess_run:
+        _clear_side_files(db_xlsx)
+        cmd = [sys.executable, str(HERE / "automat.py"), str(rp_xlsx), str(db_xlsx), DB_SHEET, level_human, str(tol),
+           "--bez-serwera"]
+        with timer.stage("automat_proces"):
+            proc = subprocess.run(cmd, cwd=HERE, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"[WARN] automat.py zakończył się kodem {proc.returncode}: {proc.stderr.strip()[-500:]}", file=sys.stderr)
+            timer.stages.pop("automat_proces", None)
+
+    return {
+        "baza": len(df_db),
+        "raport": len(df_rp),
+        "zrodlo_bazy": df_db_source,
+        "okna": len(rows),
+        "oferty_w_oknach": int(sum(w.size for w in windows)),
+        "wycenione": sum(1 for r in results if r[0] != sw.MSG_NO_SIMILAR),
+        "etapy": timer.stages,
+    }
+
+
+def run_benchmark(
+    db_sizes: List[int],
+    report_sizes: List[int],
+    level_human: str = automat.DEFAULT_LEVEL,
+    tol: float = automat.DEFAULT_TOL,
+    seed: int = 0,
+    folder: Optional[Path] = None,
+    subprocess_run: bool = True,
+) -> Dict[str, object]:
+    """Wszystkie kombinacje (baza × raport); dane generowane raz na rozmiar, z jednego ziarna."""
+    folder = Path(folder) if folder else Path(tempfile.mkdtemp(prefix="benchmark_wyceny_"))
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    places = _with_popularity(load_places(), rng)
+
+    cases: List[Dict[str, object]] = []
+    for n_db in db_sizes:
+        db_xlsx = folder / f"baza_{n_db}.xlsx"
+        t = time.perf_counter()
+        source = write_db(make_db(n_db, places, rng), db_xlsx)
+        print(f"[INFO] Baza {n_db} wierszy ({source}) przygotowana w {time.perf_counter() - t:.1f} s")
+        for n_rp in report_sizes:
+            rp_xlsx = folder / f"raport_{n_db}_{n_rp}.xlsx"
+            with pd.ExcelWriter(rp_xlsx, engine="openpyxl") as wr:
+                make_report(n_rp, places, rng).to_excel(wr, sheet_name=REPORT_SHEET, index=False)
+            case = run_case(db_xlsx, source, rp_xlsx, level_human, tol, subprocess_run)
+            cases.append(case)
+            print(f"[OK] baza {n_db} × raport {n_rp}: " + ", ".join(f"{k} {v:.3f} s" for k, v in case["etapy"].items()))
+
+    return {
+        "utworzono": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "parametry": {"poziom": level_human, "tol": tol, "ziarno": seed, "folder": str(folder)},
+        "wyniki": cases,
+    }
+
+
+def compare(old: Dict[str, object], new: Dict[str, object]) -> str:
+    """Tabela: czasy etapów poprzedniego i bieżącego pomiaru dla tych samych rozmiarów."""
+    before = {(c["baza"], c["raport"]): c["etapy"] for c in old.get("wyniki", [])}
+    lines = [f"Porównanie z {old.get('commit') or '?'} ({old.get('utworzono', '?')}):"]
+    for c in new["wyniki"]:
+        prev = before.get((c["baza"], c["raport"]))
+        if prev is None:
+            continue
+        lines.append(f"  baza {c['baza']} × raport {c['raport']}")
+        for name, t in c["etapy"].items():
+            if name in prev:
+                ratio = prev[name] / t if t > 0 else float("inf")
+                lines.append(f"    {name:<18} {prev[name]:9.3f} s → {t:9.3f} s   ×{ratio:6.2f}")
+    return "\n".join(lines)
+
+
+# ===== CLI =====
+
+def _sizes(text: str) -> List[int]:
+    return [int(x.replace("_", "")) for x in text.split(",") if x.strip()]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark wyceny raportu na syntetycznych danych.")
+    ap.add_argument("--baza", type=_sizes, default=DEFAULT_DB_SIZES, help="Rozmiary bazy, np. 10000,100000,1000000")
+    ap.add_argument("--raport", type=_sizes, default=DEFAULT_REPORT_SIZES, help="Rozmiary raportu, np. 100,10000,100000")
+    ap.add_argument("--poziom", default=automat.DEFAULT_LEVEL, help="Poziom adresu wyceny")
+    ap.add_argument("--tol", type=float, default=automat.DEFAULT_TOL, help="Tolerancja metrażu ±m²")
+    ap.add_argument("--ziarno", type=int, default=0, help="Ziarno generatora danych")
+    ap.add_argument("--folder", help="Folder na wygenerowane pliki (domyślnie tymczasowy)")
+    ap.add_argument("--wynik", default="benchmark_wyceny.json", help="Plik JSON z wynikami")
+    ap.add_argument("--bez-procesu", dest="bez_procesu", action="store_true",
+                    help="Pomiń pomiar całego automat.py w osobnym procesie")
+    ap.add_argument("--porownaj", help="Poprzedni plik JSON do porównania")
+    args = ap.parse_args()
+
+    if args.poziom not in {h for (h, _, _) in automat.ADDRESS_LEVELS}:
+        print(f"[ERR] Nieprawidłowy poziom adresu: {args.poziom}", file=sys.stderr)
+        return 2
+
+    result = run_benchmark(args.baza, args.raport, args.poziom, args.tol, args.ziarno,
+                           Path(args.folder) if args.folder else None, not args.bez_procesu)
+    Path(args.wynik).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[OK] Zapisano wyniki: {args.wynik}")
+    if args.porownaj:
+        print(compare(json.loads(Path(args.porownaj).read_text(encoding="utf-8")), result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+geolokalizacja.py — wyszukiwanie porównywalnych ofert po współrzędnych (promień R km + okno ±tol m²)
+- współrzędne ofert (kolumny 'lat'/'lon') zapisują scrapery, jeśli strona je podaje,
+- tabela centroidów: mediana współrzędnych ofert per ścieżka adresu TERYT
+  (województwo › powiat › gmina › miejscowość › dzielnica) oraz per pojedyncza wartość poziomu,
+- geokodowanie wiersza raportu = centroid najdokładniejszej znanej ścieżki jego adresu;
+  oferty bez współrzędnych dostają centroid swojej lokalizacji,
+- siatka kwadratów CELL_KM km: oferty posortowane wg (kwadrat, metry), zapytanie przegląda
+  tylko kwadraty pokrywające koło (wyszukiwanie binarne) – czas zależy od gęstości ofert
+  w okolicy, nie od wielkości bazy,
+- indeks zapisywany obok bazy ('<baza>.geo.npz') i kluczowany skrótem treści bazy i współrzędnych.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import automat_matma as am
+import indeks_lokalizacji as il
+import lokalizacje as lok
+
+GEO_SUFFIX = ".geo.npz"
+GEO_VERSION = "1"
+
+COL_LAT = "lat"
+COL_LON = "lon"
+# opcjonalne kolumny raportu ze współrzędnymi (gdy brak – geokodowanie z adresu)
+REPORT_LAT = "Szerokość geograficzna"
+REPORT_LON = "Długość geograficzna"
+
+# (kolumna bazy, kolumna raportu) – poziomy ścieżki TERYT, od najogólniejszego
+PATH_COLUMNS: List[Tuple[str, str]] = [
+    ("wojewodztwo", "Województwo"),
+    ("powiat",      "Powiat"),
+    ("gmina",       "Gmina"),
+    ("miejscowosc", "Miejscowość"),
+    ("dzielnica",   "Dzielnica"),
+]
+
+DEFAULT_RADIUS_KM = 2.0
+CELL_KM = 2.0
+
+# rzut równoodległościowy: km na stopień szerokości / długości (przy LAT0)
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320
+LAT0 = 52.0
+# obszar Polski z zapasem – współrzędne spoza niego traktujemy jak brak
+LAT_RANGE = (48.5, 55.5)
+LON_RANGE = (13.5, 24.5)
+# w rzucie z LAT0 odległości wschód–zachód na północy kraju są zawyżone – szerszy przegląd kwadratów
+_SCAN = math.cos(math.radians(LAT0)) / math.cos(math.radians(LAT_RANGE[1]))
+_SPAN = 1 << 20  # id kwadratu = ix * _SPAN + iy
+
+
+def _norm(value) -> str:
+    """Znormalizowana wartość adresu; None/NaN/'nan' → ''."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    s = lok.normalize_location(value)
+    return "" if s == "nan" else s
+
+
+def _coords(lat: pd.Series, lon: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    la = am._coerce_numeric(lat.astype(object)).to_numpy(dtype="float64")
+    lo = am._coerce_numeric(lon.astype(object)).to_numpy(dtype="float64")
+    bad = ~((la >= LAT_RANGE[0]) & (la <= LAT_RANGE[1]) & (lo >= LON_RANGE[0]) & (lo <= LON_RANGE[1]))
+    la[bad] = np.nan
+    lo[bad] = np.nan
+    return la, lo
+
+
+def _project(lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+    """Współrzędne → km w rzucie równoodległościowym (x na wschód, y na północ)."""
+    x = np.asarray(lon, dtype="float64") * KM_PER_DEG_LON * math.cos(math.radians(LAT0))
+    y = np.asarray(lat, dtype="float64") * KM_PER_DEG_LAT
+    return x, y
+
+
+def distance_km(lat0: float, lon0: float, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Odległość (km) w przybliżeniu lokalnie płaskim – dokładne dla promieni rzędu kilkunastu km."""
+    k = np.cos(np.radians((lat + lat0) / 2.0))
+    dx = (lon - lon0) * KM_PER_DEG_LON * k
+    dy = (lat - lat0) * KM_PER_DEG_LAT
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def _path_keys(parts: List[np.ndarray], depth: int) -> np.ndarray:
+    """Klucze ścieżek długości `depth` ('woj|pow|…'); '' gdy brakuje najniższego poziomu."""
+    keys = parts[0].astype(object)
+    for j in range(1, depth):
+        keys = keys + "|" + parts[j]
+    return np.where(parts[depth - 1] != "", keys, "")
+
+
+def _level_keys(parts: List[np.ndarray], j: int) -> np.ndarray:
+    return np.where(parts[j] != "", PATH_COLUMNS[j][0] + "=" + parts[j].astype(object), "")
+
+
+class Centroids:
+    """Mediana współrzędnych ofert per ścieżka adresu i per wartość pojedynczego poziomu."""
+
+    def __init__(self, keys: np.ndarray, lat: np.ndarray, lon: np.ndarray):
+        self.keys = pd.Index(keys, dtype=object)
+        self.lat = lat
+        self.lon = lon
+
+    @classmethod
+    def build(cls, parts: List[np.ndarray], lat: np.ndarray, lon: np.ndarray) -> "Centroids":
+        ok = ~np.isnan(lat)
+        frames = []
+        for depth in range(1, len(PATH_COLUMNS) + 1):
+            frames.append(pd.DataFrame({"k": _path_keys(parts, depth)[ok], "lat": lat[ok], "lon": lon[ok]}))
+        for j in range(len(PATH_COLUMNS)):
+            frames.append(pd.DataFrame({"k": _level_keys(parts, j)[ok], "lat": lat[ok], "lon": lon[ok]}))
+        allk = pd.concat(frames, ignore_index=True)
+        med = allk[allk["k"] != ""].groupby("k", sort=True)[["lat", "lon"]].median()
+        return cls(med.index.to_numpy(dtype=object), med["lat"].to_numpy(), med["lon"].to_numpy())
+
+    def locate(self, parts: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Współrzędne dla wierszy o danych (znormalizowanych) poziomach adresu:
+        najpierw najdłuższa znana ścieżka, potem najniższy znany pojedynczy poziom; brak → NaN.
+        """
+        n = len(parts[0])
+        lat = np.full(n, np.nan)
+        lon = np.full(n, np.nan)
+        candidates = [_path_keys(parts, d) for d in range(len(PATH_COLUMNS), 1, -1)]
+        candidates += [_level_keys(parts, j) for j in range(len(PATH_COLUMNS) - 1, -1, -1)]
+        for keys in candidates:
+            todo = np.flatnonzero(np.isnan(lat))
+            if todo.size == 0:
+                break
+            hit = self.keys.get_indexer(keys[todo])
+            found = hit >= 0
+            lat[todo[found]] = self.lat[hit[found]]
+            lon[todo[found]] = self.lon[hit[found]]
+        return lat, lon
+
+
+def _parts_from(df: pd.DataFrame, columns: List[str]) -> List[np.ndarray]:
+    parts = []
+    for col in columns:
+        if col not in df.columns:
+            parts.append(np.full(len(df), "", dtype=object))
+            continue
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            cats = np.array([_norm(c) for c in s.cat.categories] + [""], dtype=object)
+            parts.append(cats[s.cat.codes.to_numpy()])  # kod -1 (brak) → ostatni element ''
+        else:
+            codes, uniques = pd.factorize(s.astype(object), sort=False)
+            norm = np.array([_norm(u) for u in uniques] + [""], dtype=object)
+            parts.append(norm[codes])
+    return parts
+
+
+class GeoIndex:
+    """Siatka kwadratów nad ofertami z (własnymi albo przypisanymi) współrzędnymi + tabela centroidów."""
+
+    def __init__(
+        self,
+        fingerprint: str,
+        centroids: Centroids,
+        pos: np.ndarray,
+        metry: np.ndarray,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        cells: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        n_tagged: int,
+    ):
+        self.fingerprint = fingerprint
+        self.centroids = centroids
+        self.pos = pos
+        self.metry = metry
+        self.lat = lat
+        self.lon = lon
+        self.cells = cells
+        self.starts = starts
+        self.ends = ends
+        self.n_tagged = n_tagged
+
+    @property
+    def empty(self) -> bool:
+        return self.pos.size == 0
+
+    # --- budowa / zapis / odczyt ---
+    @classmethod
+    def build(cls, df_db: pd.DataFrame, fingerprint: str) -> "GeoIndex":
+        n = len(df_db)
+        if COL_LAT in df_db.columns and COL_LON in df_db.columns:
+            lat, lon = _coords(df_db[COL_LAT], df_db[COL_LON])
+        else:
+            lat, lon = np.full(n, np.nan), np.full(n, np.nan)
+        n_tagged = int((~np.isnan(lat)).sum())
+        parts = _parts_from(df_db, [c for (c, _) in PATH_COLUMNS])
+        centroids = Centroids.build(parts, lat, lon)
+
+        # oferty bez współrzędnych → centroid ich lokalizacji
+        missing = np.flatnonzero(np.isnan(lat))
+        if missing.size and len(centroids.keys):
+            m_lat, m_lon = centroids.locate([p[missing] for p in parts])
+            lat[missing], lon[missing] = m_lat, m_lon
+
+        metry = am._coerce_numeric(df_db["metry"]).to_numpy(dtype="float64")
+        idx = np.flatnonzero(~np.isnan(metry) & ~np.isnan(lat))
+        x, y = _project(lat[idx], lon[idx])
+        cell = np.floor(x / CELL_KM).astype(np.int64) * _SPAN + np.floor(y / CELL_KM).astype(np.int64)
+        order = np.lexsort((metry[idx], cell))
+        cell_s = cell[order]
+        cells, starts = np.unique(cell_s, return_index=True)
+        ends = np.append(starts[1:], cell_s.size)
+        sel = idx[order]
+        return cls(fingerprint, centroids, sel.astype(np.int64), metry[sel], lat[sel], lon[sel],
+                   cells, starts.astype(np.int64), ends.astype(np.int64), n_tagged)
+
+    def save(self, path: Path) -> None:
+        arrays = {
+            "fingerprint": np.array(self.fingerprint),
+            "n_tagged": np.array(self.n_tagged),
+            "c_keys": np.array(self.centroids.keys.astype(str).tolist(), dtype=str),
+            "c_lat": self.centroids.lat,
+            "c_lon": self.centroids.lon,
+        }
+        for name in ("pos", "metry", "lat", "lon", "cells", "starts", "ends"):
+            arrays[name] = getattr(self, name)
+        tmp = Path(path).with_name(Path(path).name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "GeoIndex":
+        with np.load(path, allow_pickle=False) as z:
+            centroids = Centroids(np.array(z["c_keys"].tolist(), dtype=object), z["c_lat"], z["c_lon"])
+            return cls(
+                str(z["fingerprint"]), centroids, z["pos"], z["metry"], z["lat"], z["lon"],
+                z["cells"], z["starts"], z["ends"], int(z["n_tagged"]),
+            )
+
+    # --- zapytania ---
+    def locate_report(self, df_rp: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Współrzędne wierszy raportu: z kolumn REPORT_LAT/REPORT_LON, a brakujące – z centroidów adresu."""
+        n = len(df_rp)
+        if REPORT_LAT in df_rp.columns and REPORT_LON in df_rp.columns:
+            lat, lon = _coords(df_rp[REPORT_LAT], df_rp[REPORT_LON])
+        else:
+            lat, lon = np.full(n, np.nan), np.full(n, np.nan)
+        missing = np.flatnonzero(np.isnan(lat))
+        if missing.size and len(self.centroids.keys):
+            parts = _parts_from(df_rp.iloc[missing], [c for (_, c) in PATH_COLUMNS])
+            lat[missing], lon[missing] = self.centroids.locate(parts)
+        return lat, lon
+
+    def query(self, lat: float, lon: float, radius_km: float, lo: float, hi: float) -> np.ndarray:
+        """Pozycje (iloc) ofert w promieniu `radius_km` od punktu i w oknie metrażu [lo, hi] – rosnąco."""
+        if self.empty or math.isnan(lat) or math.isnan(lon):
+            return np.empty(0, dtype=np.int64)
+        x, y = _project(lat, lon)
+        ix0, iy0 = int(math.floor(float(x) / CELL_KM)), int(math.floor(float(y) / CELL_KM))
+        r = int(math.ceil(radius_km * _SCAN / CELL_KM))
+        found = []
+        for ix in range(ix0 - r, ix0 + r + 1):
+            # kwadraty jednej kolumny siatki mają kolejne id – jeden zakres w posortowanej tablicy
+            c0 = int(np.searchsorted(self.cells, ix * _SPAN + iy0 - r, side="left"))
+            c1 = int(np.searchsorted(self.cells, ix * _SPAN + iy0 + r, side="right"))
+            for c in range(c0, c1):
+                s, e = int(self.starts[c]), int(self.ends[c])
+                seg = self.metry[s:e]
+                a = s + int(np.searchsorted(seg, lo, side="left"))
+                b = s + int(np.searchsorted(seg, hi, side="right"))
+                if b > a:
+                    found.append(np.arange(a, b))
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        cand = np.concatenate(found)
+        near = cand[distance_km(lat, lon, self.lat[cand], self.lon[cand]) <= radius_km]
+        return np.sort(self.pos[near])
+
+
+# ===== Dostęp z cache =====
+
+_CACHE: il.FrameCache[GeoIndex] = il.FrameCache(GEO_SUFFIX)
+
+
+def geo_path(db_path: Path) -> Path:
+    return _CACHE.path(db_path)
+
+
+def geo_fingerprint(df_db: pd.DataFrame, index: il.LocationIndex) -> str:
+    """Skrót treści bazy (z indeksu lokalizacji) rozszerzony o kolumny współrzędnych."""
+    h = hashlib.sha1((GEO_VERSION + index.fingerprint).encode())
+    cols = [c for c in (COL_LAT, COL_LON) if c in df_db.columns]
+    if cols:
+        part = df_db[cols].astype(str)
+        h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def get_geo(df_db: pd.DataFrame, db_path: Optional[Path] = None) -> GeoIndex:
+    """Indeks geograficzny dla ramki bazy: z pamięci, z pliku obok bazy (ten sam skrót) albo zbudowany."""
+    return _CACHE.get(df_db, lambda: geo_fingerprint(df_db, il.get_index(df_db, db_path)),
+                      lambda fp: GeoIndex.build(df_db, fp), GeoIndex.load, db_path)
+
+
+def publish_geo(df: pd.DataFrame, db_xlsx: Path, sheet: str) -> Path:
+    """Zbuduj i zapisz indeks geograficzny dla świeżo scalonej bazy (jak kostka.publish_cube)."""
+    return _CACHE.publish(df, db_xlsx, sheet, get_geo)
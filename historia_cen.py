@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+historia_cen.py — dopisywana (append-only) historia cen ogłoszeń
+- każde pobranie województwa (CSV z ofertami + intake_<region>.csv z datą pobrania)
+  dopisuje wiersze (link, captured_at, cena, cena_za_metr, metry),
+- partycje dzienne: <magazyn>/<RRRR-MM-DD>.csv – nic nie jest nadpisywane,
+- indeks ostatnich wartości per link w SQLite (<magazyn>/ostatnie.sqlite)
+  → zapytanie o jeden link nie czyta historii,
+- w tym samym pliku indeks wpisów: (link, partycja, przesunięcie, długość) każdego wiersza
+  → historia jednego linku czyta tylko jego wiersze, nie całe partycje,
+- przekrój „na dzień” czyta tylko partycje <= data, od najnowszej, strumieniowo.
+
+Użycie (CLI):
+    python historia_cen.py --dodaj <oferty.csv> [--intake <intake.csv>]
+    python historia_cen.py --link <url>
+    python historia_cen.py --na-dzien 2025-08-30 [--zapis wynik.csv]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import re
+import sqlite3
+import sys
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+import automat_matma as am
+import roznice
+
+HISTORY_COLUMNS = ["link", "captured_at", "cena", "cena_za_metr", "metry"]
+INDEX_FILE = "ostatnie.sqlite"
+
+
+def _desktop() -> Path:
+    return Path.home() / "Desktop"
+
+
+def _base_dir() -> Path:
+    d = _desktop()
+    for name in ("baza danych", "Baza danych"):
+        p = d / name
+        if p.exists():
+            return p
+    return d / "baza danych"
+
+
+DEFAULT_STORE = _base_dir() / "historia_cen"
+
+
+def _slug(s: str) -> str:
+    s = unicodedata.normalize("NFD", str(s))
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn").replace("ł", "l").replace("Ł", "L")
+    return re.sub(r"[^a-z]", "", s.casefold())
+
+
+# ===== Magazyn =====
+
+class PriceHistory:
+    """Partycje dzienne CSV (tylko dopisywanie) + indeks ostatnich wartości per link."""
+
+    def __init__(self, store_dir: Path = DEFAULT_STORE):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.store_dir / INDEX_FILE))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ostatnie ("
+            " link TEXT PRIMARY KEY, captured_at TEXT NOT NULL,"
+            " cena REAL, cena_za_metr REAL, metry REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS wpisy ("
+            " link TEXT NOT NULL, dzien TEXT NOT NULL, przesuniecie INTEGER NOT NULL, dlugosc INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS wpisy_link ON wpisy(link)")
+        # magazyn sprzed indeksu wpisów – zindeksuj istniejące partycje raz
+        if self._db.execute("SELECT 1 FROM wpisy LIMIT 1").fetchone() is None:
+            for path in self.partitions():
+                self._index_partition(path, 0)
+            self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "PriceHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- zapis ---
+    def _partition(self, day: str) -> Path:
+        return self.store_dir / f"{day}.csv"
+
+    def _index_partition(self, path: Path, start: int) -> None:
+        """Dopisz do indeksu wpisów wiersze partycji od bajtu `start` (0 = od początku, z nagłówkiem)."""
+        with open(path, "rb") as f:
+            f.seek(start)
+            lines = f.read().splitlines(keepends=True)
+        offset = start
+        if start == 0 and lines:
+            offset += len(lines[0])
+            lines = lines[1:]
+        if not lines:
+            return
+        links = pd.read_csv(io.BytesIO(b"".join(lines)), header=None, names=HISTORY_COLUMNS,
+                            usecols=["link"], dtype=str)["link"].tolist()
+        rows = []
+        for link, line in zip(links, lines):
+            rows.append((link, path.stem, offset, len(line)))
+            offset += len(line)
+        self._db.executemany("INSERT INTO wpisy(link, dzien, przesuniecie, dlugosc) VALUES (?,?,?,?)", rows)
+
+    def append(self, df: pd.DataFrame) -> int:
+        """
+        Dopisz pobrania (kolumny HISTORY_COLUMNS, captured_at w ISO).
+        Pomija wiersze nie nowsze niż to, co już jest w indeksie (ponowny import jest bezpieczny).
+        Zwraca liczbę dopisanych wierszy.
+        """
+        if df.empty:
+            return 0
+        df = df[HISTORY_COLUMNS].copy()
+        df = df.sort_values("captured_at").drop_duplicates(subset=["link", "captured_at"], keep="last")
+
+        # odrzuć to, co już zarejestrowano (porównanie z indeksem – tylko dla tych linków)
+        known = self._latest_times(df["link"].unique().tolist())
+        if known:
+            prev = df["link"].map(known)
+            df = df[prev.isna() | (df["captured_at"] > prev)]
+        if df.empty:
+            return 0
+
+        for day, part in df.groupby(df["captured_at"].str.slice(0, 10), sort=True):
+            path = self._partition(day)
+            new_file = not path.exists()
+            start = 0 if new_file else path.stat().st_size
+            part.to_csv(path, mode="a", header=new_file, index=False, encoding="utf-8")
+            self._index_partition(path, start)
+
+        latest = df.drop_duplicates(subset=["link"], keep="last")
+        self._db.executemany(
+            "INSERT INTO ostatnie(link, captured_at, cena, cena_za_metr, metry) VALUES (?,?,?,?,?) "
+            "ON CONFLICT(link) DO UPDATE SET captured_at=excluded.captured_at, cena=excluded.cena, "
+            "cena_za_metr=excluded.cena_za_metr, metry=excluded.metry "
+            "WHERE excluded.captured_at > ostatnie.captured_at",
+            [
+                (r.link, r.captured_at, _f(r.cena), _f(r.cena_za_metr), _f(r.metry))
+                for r in latest.itertuples(index=False)
+            ],
+        )
+        self._db.commit()
+        return int(len(df))
+
+    def _latest_times(self, links: List[str]) -> dict:
+        out = {}
+        for i in range(0, len(links), 500):
+            chunk = links[i:i + 500]
+            q = "SELECT link, captured_at FROM ostatnie WHERE link IN (%s)" % ",".join("?" * len(chunk))
+            out.update(dict(self._db.execute(q, chunk).fetchall()))
+        return out
+
+    # --- odczyt ---
+    def latest(self, link: str) -> Optional[dict]:
+        """Ostatnia znana cena dla linku – pojedyncze zapytanie po kluczu."""
+        key = roznice.normalize_link(pd.Series([link])).iloc[0]
+        row = self._db.execute(
+            "SELECT link, captured_at, cena, cena_za_metr, metry FROM ostatnie WHERE link = ?", (key,)
+        ).fetchone()
+        return dict(zip(HISTORY_COLUMNS, row)) if row else None
+
+    def partitions(self, until: Optional[str] = None) -> List[Path]:
+        days = sorted(p for p in self.store_dir.glob("????-??-??.csv"))
+        if until:
+            days = [p for p in days if p.stem <= until]
+        return days
+
+    def history(self, link: str) -> pd.DataFrame:
+        """Pełna historia jednego linku – z indeksu wpisów czytane są tylko jego wiersze partycji."""
+        key = roznice.normalize_link(pd.Series([link])).iloc[0]
+        entries = self._db.execute(
+            "SELECT dzien, przesuniecie, dlugosc FROM wpisy WHERE link = ? ORDER BY dzien, przesuniecie", (key,)
+        ).fetchall()
+        chunks: List[bytes] = []
+        day_open, f = None, None
+        try:
+            for day, offset, length in entries:
+                if day != day_open:
+                    if f is not None:
+                        f.close()
+                    f, day_open = open(self._partition(day), "rb"), day
+                f.seek(offset)
+                chunks.append(f.read(length))
+        finally:
+            if f is not None:
+                f.close()
+        if not chunks:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        df = pd.read_csv(io.BytesIO(b"".join(chunks)), header=None, names=HISTORY_COLUMNS,
+                         dtype={"link": str, "captured_at": str})
+        return df.sort_values("captured_at", ignore_index=True)
+
+    def as_of(self, day: str) -> pd.DataFrame:
+        """
+        Stan „na dzień”: ostatnia wartość każdego linku pobrana nie później niż `day`.
+        Partycje czytane od najnowszej; w pamięci trzymany jest tylko wynik (1 wiersz na link).
+        """
+        seen: set = set()
+        parts = []
+        for path in reversed(self.partitions(until=day)):
+            df = pd.read_csv(path, dtype={"link": str, "captured_at": str})
+            df = df.sort_values("captured_at").drop_duplicates(subset=["link"], keep="last")
+            df = df[~df["link"].isin(seen)]
+            seen.update(df["link"])
+            parts.append(df)
+        if not parts:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        return pd.concat(parts, ignore_index=True)
+
+
+def _f(v) -> Optional[float]:
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if v != v else v
+
+
+# ===== Import z plików pobrania =====
+
+def capture_times(links: pd.Series, intake_csv: Optional[Path], fallback: str) -> pd.Series:
+    """
+    Czas pobrania ('RRRR-MM-DDTHH:MM:SS') dla każdego linku z pliku intake (captured_date
+    + captured_time); linki spoza intake (albo brak pliku) – `fallback`. Indeks jak `links`.
+    """
+    out = pd.Series(fallback, index=links.index, dtype=object)
+    if intake_csv is None or not Path(intake_csv).exists():
+        return out
+    intake = pd.read_csv(intake_csv, dtype=str, encoding="utf-8-sig")
+    if not {"link", "captured_date"}.issubset(intake.columns):
+        return out
+    t = intake.get("captured_time", pd.Series("00:00:00", index=intake.index)).fillna("00:00:00")
+    ts = pd.Series(
+        (intake["captured_date"].str.strip() + "T" + t.str.strip()).to_numpy(),
+        index=roznice.normalize_link(intake["link"]),
+    )
+    ts = ts[~ts.index.duplicated(keep="last")]
+    return roznice.normalize_link(links).map(ts).fillna(fallback)
+
+
+def file_time(path: Path) -> str:
+    """Czas modyfikacji pliku jako 'RRRR-MM-DDTHH:MM:SS' (czas pobrania, gdy brak intake)."""
+    return datetime.fromtimestamp(Path(path).stat().st_mtime).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def captures_from_files(offers_csv: Path, intake_csv: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Zbuduj wiersze historii z CSV ofert województwa i (opcjonalnie) pliku intake
+    z datą pobrania linku. Bez intake – czas modyfikacji pliku ofert.
+    """
+    offers = pd.read_csv(offers_csv, sep=None, engine="python", encoding="utf-8-sig")
+    if "link" not in offers.columns:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    out = pd.DataFrame({
+        "link": roznice.normalize_link(offers["link"]),
+        "cena": am._coerce_numeric(offers.get("cena", pd.Series(index=offers.index, dtype=object))),
+        "cena_za_metr": am._coerce_numeric(offers.get("cena_za_metr", pd.Series(index=offers.index, dtype=object))),
+        "metry": am._coerce_numeric(offers.get("metry", pd.Series(index=offers.index, dtype=object))),
+    })
+    out = out[out["link"] != ""]
+
+    out["captured_at"] = capture_times(out["link"], intake_csv, file_time(offers_csv))
+    return out[HISTORY_COLUMNS]
+
+
+def find_intake(region_name: str, search_dirs: Iterable[Path]) -> Optional[Path]:
+    """Znajdź intake_<region>.csv niezależnie od pisowni (ogonki, myślniki, wielkość liter)."""
+    want = _slug(region_name)
+    for d in search_dirs:
+        d = Path(d)
+        if not d.exists():
+            continue
+        for p in d.glob("intake_*.csv"):
+            if _slug(p.stem[len("intake_"):]) == want:
+                return p
+    return None
+
+
+def ingest_folder(src_dir: Path, intake_dirs: Iterable[Path], store_dir: Path = DEFAULT_STORE) -> int:
+    """Dopisz do historii wszystkie CSV województw z folderu (używane przez scalanie.py)."""
+    intake_dirs = list(intake_dirs)
+    added = 0
+    with PriceHistory(store_dir) as hist:
+        for f in sorted(Path(src_dir).glob("*.csv")):
+            try:
+                added += hist.append(captures_from_files(f, find_intake(f.stem, intake_dirs)))
+            except Exception as e:
+                print(f"[WARN] Historia cen – pominięto {f.name}: {e}", file=sys.stderr)
+    return added
+
+
+# ===== CLI =====
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Historia cen ogłoszeń (append-only).")
+    ap.add_argument("--magazyn", default=str(DEFAULT_STORE), help="Folder magazynu historii")
+    ap.add_argument("--dodaj", help="CSV z ofertami (link, cena, cena_za_metr, metry)")
+    ap.add_argument("--intake", help="CSV intake z captured_date/captured_time")
+    ap.add_argument("--link", help="Pokaż ostatnią cenę i historię linku")
+    ap.add_argument("--na-dzien", dest="na_dzien", help="Przekrój na dzień RRRR-MM-DD")
+    ap.add_argument("--zapis", help="Plik CSV dla --na-dzien")
+    args = ap.parse_args()
+
+    with PriceHistory(Path(args.magazyn)) as hist:
+        if args.dodaj:
+            n = hist.append(captures_from_files(Path(args.dodaj), Path(args.intake) if args.intake else None))
+            print(f"[OK] Dopisano {n} wierszy historii.")
+        if args.link:
+            print(hist.latest(args.link))
+            print(hist.history(args.link).to_string(index=False))
+        if args.na_dzien:
+            df = hist.as_of(args.na_dzien)
+            if args.zapis:
+                df.to_csv(args.zapis, index=False, encoding="utf-8-sig")
+                print(f"[OK] Zapisano {len(df)} wierszy do {args.zapis}")
+            else:
+                print(df.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
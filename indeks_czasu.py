@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+indeks_czasu.py — indeks daty pobrania ofert (kolumna 'data_pobrania' zapisywana przez scalanie.py)
+- dla każdego poziomu adresu: oferty lokalizacji posortowane wg (kod lokalizacji, czas pobrania)
+  – ta sama struktura co indeks lokalizacji (il.LevelArrays), kluczem jest czas zamiast metrażu,
+- „stan na dzień” i „oferty z ostatnich N dni” = dwa wyszukiwania binarne w segmencie lokalizacji,
+  bez filtrowania całej bazy dla każdego wiersza raportu,
+- waga wykładnicza wg wieku oferty (okres połowicznego zaniku w dniach) – do średnich ważonych,
+- czas jako liczba dni od 1970-01-01 (float); oferty bez daty nie trafiają do indeksu,
+- indeks budowany w pamięci (jedno sortowanie na poziom) i współdzielony w obrębie procesu.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import automat_matma as am
+import indeks_lokalizacji as il
+
+COL_CAPTURED = "data_pobrania"
+TIME_VERSION = "1"
+
+_EPOCH = pd.Timestamp("1970-01-01")
+_DAY = pd.Timedelta(days=1)
+
+
+def parse_days(series: pd.Series) -> np.ndarray:
+    """Daty/czasy pobrania (ISO 'RRRR-MM-DD[THH:MM:SS]') → dni od 1970-01-01; NaN = brak daty."""
+    t = pd.to_datetime(series.astype("string"), errors="coerce", format="ISO8601")
+    return ((t - _EPOCH) / _DAY).to_numpy(dtype="float64", na_value=np.nan)
+
+
+def resolve_as_of(as_of: Optional[str]) -> str:
+    """Dzień „stanu na” jako 'RRRR-MM-DD' (None → dzisiaj); ValueError dla złej daty."""
+    if as_of is None or not str(as_of).strip():
+        return date.today().isoformat()
+    try:
+        return date.fromisoformat(str(as_of).strip()[:10]).isoformat()
+    except ValueError:
+        raise ValueError(f"Nieprawidłowa data: {as_of} (oczekiwano RRRR-MM-DD).") from None
+
+
+def time_window(as_of: str, max_age_days: Optional[float] = None) -> Tuple[float, float]:
+    """
+    Zakres czasu [od, do] (dni, domknięty): oferty pobrane najpóźniej w dniu `as_of`
+    i – gdy podano `max_age_days` – nie wcześniej niż N dni wstecz (dzień `as_of` wliczony).
+    """
+    end = float((pd.Timestamp(as_of) - _EPOCH) / _DAY) + 1.0
+    hi = float(np.nextafter(end, -np.inf))
+    if max_age_days is None:
+        return -np.inf, hi
+    if max_age_days <= 0:
+        raise ValueError("Liczba dni musi być dodatnia.")
+    return end - float(max_age_days), hi
+
+
+def recency_weights(days: np.ndarray, as_of: str, half_life_days: float) -> np.ndarray:
+    """Waga oferty 0.5^(wiek / okres połowicznego zaniku); wiek liczony od końca dnia `as_of`."""
+    if half_life_days <= 0:
+        raise ValueError("Okres połowicznego zaniku musi być dodatni.")
+    end = float((pd.Timestamp(as_of) - _EPOCH) / _DAY) + 1.0
+    return np.exp2(-np.maximum(end - days, 0.0) / float(half_life_days))
+
+
+class TimeIndex:
+    """Czas pobrania i metraż per oferta + oferty każdego poziomu posortowane wg (kod, czas)."""
+
+    def __init__(self, fingerprint: str, days: np.ndarray, metry: np.ndarray, levels: Dict[str, il.LevelArrays]):
+        self.fingerprint = fingerprint
+        self.days = days
+        self.metry = metry
+        self.levels = levels
+
+    @classmethod
+    def build(cls, df_db: pd.DataFrame, index: il.LocationIndex, fingerprint: str) -> "TimeIndex":
+        days = parse_days(df_db[COL_CAPTURED])
+        metry = am._coerce_numeric(df_db["metry"]).to_numpy(dtype="float64")
+        levels = {il.ALL: il.LevelArrays.build(np.zeros(len(df_db), dtype=np.int64), days, 1)}
+        for col, codes in index.codes.items():
+            levels[col] = il.LevelArrays.build(codes.astype(np.int64), days, len(index.vocab[col]))
+        return cls(fingerprint, days, metry, levels)
+
+    def dated(self) -> int:
+        """Liczba ofert z datą pobrania."""
+        return int(self.levels[il.ALL].pos.size)
+
+
+# tylko w pamięci procesu – budowa jest szybka, pliku obok bazy nie ma
+_CACHE: il.FrameCache[TimeIndex] = il.FrameCache()
+
+
+def time_fingerprint(df_db: pd.DataFrame, index: il.LocationIndex) -> str:
+    """Skrót treści bazy (z indeksu lokalizacji) rozszerzony o kolumnę daty pobrania."""
+    h = hashlib.sha1((TIME_VERSION + index.fingerprint).encode())
+    if COL_CAPTURED in df_db.columns:
+        part = df_db[[COL_CAPTURED]].astype(str)
+        h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def get_time_index(df_db: pd.DataFrame, index: Optional[il.LocationIndex] = None) -> TimeIndex:
+    """Indeks czasu dla ramki bazy (z pamięci procesu albo zbudowany); ValueError bez dat pobrania."""
+    if COL_CAPTURED not in df_db.columns:
+        raise ValueError(f"Baza nie ma kolumny '{COL_CAPTURED}' – uruchom ponownie scalanie.py.")
+    index = index if index is not None else il.get_index(df_db)
+
+    def build(fp: str) -> TimeIndex:
+        ti = TimeIndex.build(df_db, index, fp)
+        if ti.dated() == 0:
+            raise ValueError(f"Żadna oferta w bazie nie ma daty pobrania ('{COL_CAPTURED}').")
+        return ti
+
+    return _CACHE.get(df_db, lambda: time_fingerprint(df_db, index), build)
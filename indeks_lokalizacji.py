@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+indeks_lokalizacji.py — trwały indeks lokalizacji do wyszukiwania porównywalnych ofert
+- dla każdego poziomu adresu i znormalizowanej wartości: id ofert posortowane wg metrażu,
+- okno ±tol m² = dwa wyszukiwania binarne (czas logarytmiczny),
+- indeks zapisywany obok bazy ('<baza>.indeks.npz') i kluczowany skrótem TREŚCI bazy
+  – gdy baza się zmieni, przebudowuje się sam,
+- w obrębie procesu indeks jest współdzielony (cache po skrócie i po obiekcie ramki).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+import automat_matma as am
+import lokalizacje as lok
+import migawka
+
+INDEX_SUFFIX = ".indeks.npz"
+INDEX_VERSION = "1"
+
+# poziom „bez filtra lokalizacji” – wszystkie oferty posortowane wg metrażu
+ALL = ""
+
+
+class LevelArrays:
+    """Oferty jednego poziomu adresu posortowane wg (kod, metry) + granice segmentów kodów."""
+
+    def __init__(self, pos: np.ndarray, metry: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        self.pos = pos
+        self.metry = metry
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def build(cls, codes: np.ndarray, metry: np.ndarray, n_codes: int) -> "LevelArrays":
+        idx = np.flatnonzero(~np.isnan(metry))
+        order = idx[np.lexsort((metry[idx], codes[idx]))]
+        codes_s = codes[order]
+        return cls(
+            pos=order.astype(np.int64),
+            metry=metry[order],
+            starts=np.searchsorted(codes_s, np.arange(n_codes), side="left"),
+            ends=np.searchsorted(codes_s, np.arange(n_codes), side="right"),
+        )
+
+    def segment(self, code: int) -> Tuple[int, int]:
+        if code < 0 or code >= len(self.starts):
+            return 0, 0
+        return int(self.starts[code]), int(self.ends[code])
+
+    def bounds(self, code: int, lo, hi):
+        """Początki/końce okien [lo, hi] (domknięte) – lo/hi mogą być tablicami."""
+        s, e = self.segment(code)
+        seg = self.metry[s:e]
+        return s + np.searchsorted(seg, lo, side="left"), s + np.searchsorted(seg, hi, side="right")
+
+
+def db_fingerprint(df_db: pd.DataFrame) -> str:
+    """Skrót treści bazy (metry, ceny, kolumny adresowe) – klucz wersji indeksu."""
+    cols = [c for c in ["metry", "cena_za_metr", *lok.LOCATION_COLUMNS] if c in df_db.columns]
+    part = df_db[cols].copy()
+    for c in cols:
+        if isinstance(part[c].dtype, pd.CategoricalDtype):
+            part[c] = part[c].astype(str)
+    h = pd.util.hash_pandas_object(part, index=False).to_numpy()
+    return hashlib.sha1(INDEX_VERSION.encode() + h.tobytes()).hexdigest()
+
+
+class LocationIndex:
+    """Indeks wszystkich poziomów adresu dla jednej wersji bazy."""
+
+    def __init__(self, fingerprint: str, levels: Dict[str, LevelArrays], vocab: Dict[str, pd.Index]):
+        self.fingerprint = fingerprint
+        self.levels = levels
+        self.vocab = vocab
+        # kody lokalizacji per oferta (do zawężania hierarchicznego) – z ramki, nie z pliku
+        self.codes: Dict[str, np.ndarray] = {}
+
+    # --- budowa / zapis / odczyt ---
+    @classmethod
+    def build(cls, df_db: pd.DataFrame, fingerprint: Optional[str] = None) -> "LocationIndex":
+        metry = am._coerce_numeric(df_db["metry"]).to_numpy(dtype="float64")
+        levels = {ALL: LevelArrays.build(np.zeros(len(df_db), dtype=np.int64), metry, 1)}
+        vocab: Dict[str, pd.Index] = {}
+        for col in lok.LOCATION_COLUMNS:
+            if col not in df_db.columns:
+                continue
+            s = df_db[col]
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                s = lok.encode_location_column(s)
+            vocab[col] = lok.match_vocab(s.cat.categories)  # klucze dopasowania, nie pisownia
+            levels[col] = LevelArrays.build(s.cat.codes.to_numpy().astype(np.int64), metry, len(s.cat.categories))
+        return cls(fingerprint or db_fingerprint(df_db), levels, vocab)
+
+    def save(self, path: Path) -> None:
+        arrays = {"fingerprint": np.array(self.fingerprint)}
+        for key, la in self.levels.items():
+            name = key or "_all"
+            arrays[f"{name}__pos"] = la.pos
+            arrays[f"{name}__metry"] = la.metry
+            arrays[f"{name}__starts"] = la.starts
+            arrays[f"{name}__ends"] = la.ends
+        for key, cats in self.vocab.items():
+            arrays[f"{key}__vocab"] = np.array(cats.astype(str).tolist(), dtype=str)
+        tmp = Path(path).with_name(Path(path).name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "LocationIndex":
+        with np.load(path, allow_pickle=False) as z:
+            fp = str(z["fingerprint"])
+            levels: Dict[str, LevelArrays] = {}
+            vocab: Dict[str, pd.Index] = {}
+            for name in ["_all", *lok.LOCATION_COLUMNS]:
+                if f"{name}__pos" not in z.files:
+                    continue
+                key = ALL if name == "_all" else name
+                levels[key] = LevelArrays(
+                    z[f"{name}__pos"], z[f"{name}__metry"], z[f"{name}__starts"], z[f"{name}__ends"]
+                )
+                if f"{name}__vocab" in z.files:
+                    vocab[key] = pd.Index(z[f"{name}__vocab"].tolist(), dtype=object)
+        return cls(fp, levels, vocab)
+
+    # --- zapytania ---
+    def code(self, db_key: str, value) -> int:
+        cats = self.vocab.get(db_key)
+        if cats is None:
+            return -1
+        return int(cats.get_indexer([lok.normalize_location(value)])[0])
+
+    def window(self, db_key: str, value: str, lo: float, hi: float) -> np.ndarray:
+        """Pozycje (iloc) ofert w oknie metrażu dla danej lokalizacji – rosnąco, jak maska."""
+        if str(value).strip():
+            la, code = self.levels[db_key], self.code(db_key, value)
+        else:
+            la, code = self.levels[ALL], 0
+        a, b = la.bounds(code, lo, hi)
+        return np.sort(la.pos[int(a):int(b)])
+
+    def count(self, db_key: str, value: str, lo: float, hi: float) -> int:
+        if str(value).strip():
+            la, code = self.levels[db_key], self.code(db_key, value)
+        else:
+            la, code = self.levels[ALL], 0
+        a, b = la.bounds(code, lo, hi)
+        return int(b - a)
+
+    def attach_codes(self, df_db: pd.DataFrame) -> None:
+        for col in self.vocab:
+            s = df_db[col]
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                s = lok.encode_location_column(s)
+            self.codes[col] = s.cat.codes.to_numpy()
+
+    def count_hierarchical(self, lo: float, hi: float, values: Dict[str, str], levels) -> Dict[str, int]:
+        """
+        Liczniki zawężane kolejno po poziomach (jak wyniki.count_offers_hierarchical):
+        pierwszy podany poziom – z indeksu, kolejne – porównanie kodów tylko w tym podzbiorze.
+        """
+        counts: Dict[str, int] = {}
+        current: Optional[np.ndarray] = None
+        for human, db_key, rp_key in levels:
+            val = (values.get(rp_key) or "").strip()
+            if val:
+                if current is None:
+                    current = self.window(db_key, val, lo, hi)
+                else:
+                    code = self.code(db_key, val)
+                    current = current[self.codes[db_key][current] == code] if code >= 0 else current[:0]
+            if current is None:
+                counts[human] = self.count(ALL, "", lo, hi)
+            else:
+                counts[human] = int(len(current))
+        return counts
+
+
+# ===== Dostęp z cache =====
+
+T = TypeVar("T")
+
+
+class FrameCache(Generic[T]):
+    """
+    Pamięć procesu dla struktury liczonej z ramki bazy (indeks, kostka, model…):
+    po obiekcie ramki, po skrócie treści i – gdy podano `suffix` – w pliku obok bazy.
+    Obiekt musi mieć atrybut `.fingerprint`; plik z innym skrótem jest pomijany.
+    Po skrócie trzymana jest tylko najnowsza wersja dla danej bazy – przeładowania nie zostawiają
+    w pamięci poprzednich (obiekty wciąż używanych ramek trzyma słownik po ramce).
+    """
+
+    def __init__(self, suffix: Optional[str] = None):
+        self.suffix = suffix
+        self._by_fingerprint: Dict[str, T] = {}
+        # ścieżka bazy (None – ramka bez pliku) → skrót jej najnowszej wersji
+        self._latest: Dict[Optional[str], str] = {}
+        # ramki nie są haszowalne – klucz id(ramki) + słaba referencja (wpis znika razem z ramką)
+        self._by_frame: Dict[int, Tuple["weakref.ref[pd.DataFrame]", T]] = {}
+
+    def path(self, db_path: Path) -> Path:
+        return Path(db_path).with_name(Path(db_path).stem + self.suffix)
+
+    def get(
+        self,
+        df_db: pd.DataFrame,
+        fingerprint: Callable[[], str],
+        build: Callable[[str], T],
+        load: Optional[Callable[[Path], Optional[T]]] = None,
+        db_path: Optional[Path] = None,
+        attach: Optional[Callable[[T], None]] = None,
+    ) -> T:
+        """
+        Obiekt dla ramki: z pamięci, z pliku (gdy skrót się zgadza) albo `build(skrót)` i zapis.
+        `db_path` domyślnie z df_db.attrs['db_path']; `attach` wołane dla każdej nowej ramki.
+        """
+        hit = self._by_frame.get(id(df_db))
+        if hit is not None and hit[0]() is df_db:
+            return hit[1]
+
+        fp = fingerprint()
+        obj = self._by_fingerprint.get(fp)
+
+        if db_path is None and df_db.attrs.get("db_path"):
+            db_path = Path(df_db.attrs["db_path"])
+        path = self.path(db_path) if (self.suffix and db_path is not None) else None
+
+        if obj is None and load is not None and path is not None and path.exists():
+            try:
+                loaded = load(path)
+                if loaded is not None and loaded.fingerprint == fp:
+                    obj = loaded
+            except Exception:
+                obj = None
+
+        if obj is None:
+            obj = build(fp)
+            if path is not None:
+                try:
+                    obj.save(path)
+                except OSError:
+                    pass
+
+        if attach is not None:
+            attach(obj)
+        self._remember(str(db_path) if db_path is not None else None, fp, obj)
+        key = id(df_db)
+        self._by_frame[key] = (weakref.ref(df_db, lambda _r, k=key: self._by_frame.pop(k, None)), obj)
+        return obj
+
+    def _remember(self, db_key: Optional[str], fp: str, obj: T) -> None:
+        old = self._latest.get(db_key)
+        self._latest[db_key] = fp
+        if old is not None and old != fp and old not in self._latest.values():
+            self._by_fingerprint.pop(old, None)
+        self._by_fingerprint[fp] = obj
+
+    def publish(self, df: pd.DataFrame, db_xlsx: Path, sheet: str,
+                getter: Callable[[pd.DataFrame], T]) -> Path:
+        """
+        Zbuduj i zapisz strukturę dla świeżo scalonej bazy; zwraca ścieżkę pliku.
+        Ramka – z migawki, jeśli jest (ta sama, którą wczyta automat), inaczej przygotowana z `df`.
+        """
+        frame = migawka.load_snapshot(db_xlsx, sheet)
+        if frame is None:
+            frame = migawka.prepare_offer_frame(df.copy())
+        frame.attrs["db_path"] = str(db_xlsx)
+        getter(frame)
+        return self.path(db_xlsx)
+
+
+_CACHE: FrameCache[LocationIndex] = FrameCache(INDEX_SUFFIX)
+
+
+def index_path(db_path: Path) -> Path:
+    return _CACHE.path(db_path)
+
+
+def get_index(df_db: pd.DataFrame, db_path: Optional[Path] = None) -> LocationIndex:
+    """
+    Indeks dla ramki bazy: z pamięci procesu, z pliku obok bazy (gdy skrót treści się zgadza)
+    albo zbudowany od zera i zapisany. `db_path` domyślnie z df_db.attrs['db_path'].
+    """
+    return _CACHE.get(
+        df_db,
+        lambda: db_fingerprint(df_db),
+        lambda fp: LocationIndex.build(df_db, fingerprint=fp),
+        LocationIndex.load,
+        db_path,
+        attach=lambda idx: idx.attach_codes(df_db),
+    )
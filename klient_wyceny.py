@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+klient_wyceny.py — klient lokalnego serwera wyceny (serwer_wyceny.py)
+- connect(): serwer działa i obsłuży tę bazę → ServiceClient, inaczej None (praca w procesie),
+- wycena i odciski ramek raportu paczkami po CHUNK_ROWS wierszy (postęp między paczkami),
+- liczniki hierarchiczne, szacunek z kostki i statystyki jednego okna dla wyniki.py,
+- błąd w trakcie pracy → ServiceError; wywołujący przechodzi wtedy na wycenę w procesie.
+
+Adres serwera: PRICEBOT_SERWER=host:port (domyślnie 127.0.0.1:8765); PRICEBOT_SERWER=off – bez serwera.
+Tylko biblioteka standardowa – import nic nie kosztuje, gdy serwer nie działa.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+ENV_ADDRESS = "PRICEBOT_SERWER"
+# sprawdzenie, czy serwer działa – krótko, żeby brak serwera nie opóźniał startu
+PING_TIMEOUT = 0.3
+CHUNK_ROWS = 2000
+
+ProgressFn = Callable[[int, int], None]
+
+# serwer jest lokalny – bez proxy z http_proxy/HTTPS_PROXY
+_OPENER = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+class ServiceError(RuntimeError):
+    """Serwer wyceny nie odpowiedział albo zgłosił błąd."""
+
+
+def _json_default(value):
+    """Typy numpy/pandas w JSON (liczby jako liczby, reszta jako tekst)."""
+    item = getattr(value, "item", None)
+    if callable(item):
+        return item()
+    return str(value)
+
+
+def dumps(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+def address() -> Optional[str]:
+    """Adres bazowy serwera z PRICEBOT_SERWER (None = serwer wyłączony)."""
+    raw = os.environ.get(ENV_ADDRESS, "").strip()
+    if raw.lower() in {"off", "0", "nie", "brak"}:
+        return None
+    return f"http://{raw or f'{DEFAULT_HOST}:{DEFAULT_PORT}'}"
+
+
+def frame_payload(df, columns: Sequence[str]) -> Dict[str, list]:
+    """Kolumny ramki (tylko istniejące) jako listy – brak kolumny po stronie serwera = brak tutaj."""
+    return {c: df[c].tolist() for c in columns if c in df.columns}
+
+
+class ServiceClient:
+    """Połączenie z serwerem wyceny dla jednej bazy (plik + arkusz)."""
+
+    def __init__(self, url: str, db_path: Path | str, sheet: str):
+        self.url = url
+        self.db_path = str(Path(db_path).expanduser().resolve())
+        self.sheet = sheet
+        self.rows = 0
+        self.cache_text = ""
+
+    def _request(self, path: str, payload: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        data = None if payload is None else dumps({"baza": self.db_path, "arkusz": self.sheet, **payload})
+        req = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with _OPENER.open(req, timeout=timeout) as resp:
+                body = json.loads(resp.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            try:
+                msg = json.loads(e.read().decode("utf-8")).get("blad", str(e))
+            except Exception:
+                msg = str(e)
+            raise ServiceError(msg) from e
+        except (OSError, ValueError) as e:
+            raise ServiceError(f"Serwer wyceny nie odpowiada ({self.url}): {e}") from e
+        return body
+
+    def ping(self) -> dict:
+        return self._request("/status", timeout=PING_TIMEOUT)
+
+    def open(self) -> int:
+        """Serwer wczytuje bazę (albo ma ją już w pamięci); zwraca liczbę ofert."""
+        self.rows = int(self._request("/baza", {})["wiersze"])
+        return self.rows
+
+    # --- automat ---
+    def fingerprints(self, df, columns: Sequence[str], level_human: str, tol: float, **options) -> List[str]:
+        out: List[str] = []
+        for s in range(0, len(df.index), CHUNK_ROWS):
+            part = df.iloc[s:s + CHUNK_ROWS]
+            res = self._request("/odciski", {"ramka": frame_payload(part, columns), "poziom": level_human,
+                                             "tol": tol, "opcje": options})
+            out.extend(res["odciski"])
+        return out
+
+    def values(
+        self,
+        df,
+        columns: Sequence[str],
+        level_human: str,
+        tol: float,
+        workers: int = 1,
+        progress: Optional[ProgressFn] = None,
+        **options,
+    ) -> List[tuple]:
+        n = len(df.index)
+        out: List[tuple] = []
+        for s in range(0, n, CHUNK_ROWS):
+            part = df.iloc[s:s + CHUNK_ROWS]
+            res = self._request("/wycena", {"ramka": frame_payload(part, columns), "poziom": level_human,
+                                            "tol": tol, "workers": workers, "opcje": options})
+            out.extend(tuple(r) for r in res["wyniki"])
+            self.cache_text = res.get("cache", "")
+            if progress is not None:
+                progress(len(out), n)
+        if progress is not None and n == 0:
+            progress(0, 0)
+        return out
+
+    # --- wyniki ---
+    def counts(self, area: str, tol: str, values: Dict[str, str], level_human: str) -> Tuple[Dict[str, int], tuple]:
+        """(liczniki ofert na poziomach, szacunek z kostki (n, średnia, po IQR) dla level_human albo None)."""
+        res = self._request("/liczniki", {"obszar": area, "tol": tol, "wartosci": values, "poziom": level_human})
+        est = res.get("szacunek")
+        return res["liczniki"], (tuple(est) if est is not None else None)
+
+    def window_stats(self, level_key_db: str, level_value: str, area: str, tol: str) -> tuple:
+        """(liczba ofert, statystyki.PriceStats jako lista, środek, lo, hi) – jak wyniki.window_price_stats."""
+        res = self._request("/okno", {"klucz": level_key_db, "wartosc": level_value, "obszar": area, "tol": tol})
+        return res["n"], res["statystyki"], float(res["srodek"]), float(res["lo"]), float(res["hi"])
+
+
+def connect(db_path: Path | str, sheet: str) -> Optional[ServiceClient]:
+    """Klient serwera dla bazy, jeśli serwer działa i potrafi ją wczytać; inaczej None."""
+    url = address()
+    if url is None:
+        return None
+    client = ServiceClient(url, db_path, sheet)
+    try:
+        client.ping()
+    except ServiceError:
+        return None
+    try:
+        client.open()
+    except ServiceError as e:
+        print(f"[WARN] Serwer wyceny nie obsłuży tej bazy ({e}) – liczę w procesie.", file=sys.stderr)
+        return None
+    return client
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+kostka.py — wstępnie zagregowana kostka statystyk (poziom adresu × lokalizacja × przedział metrażu)
+- komórka = (poziom, kod lokalizacji, kubełek metrażu BUCKET_M2): liczba ofert, liczba cen,
+  suma cena_za_metr i szkic kwantyli (histogram w skali logarytmicznej, względna dokładność ~0,5%),
+- szkice są scalalne (sumowanie histogramów), więc okno ±tol to scalenie kilku sąsiednich
+  komórek – koszt zależy od szerokości okna, nie od rozmiaru bazy,
+- wynik przybliżony: okno rozszerzone do pełnych kubełków, kwartyle i średnia po IQR ze szkicu;
+  tryb dokładny (silnik_wyceny) pozostaje domyślny i jest używany, gdy kostka nie wystarcza,
+- zapis obok bazy ('<baza>.kostka.npz'), kluczowany tym samym skrótem treści co indeks lokalizacji;
+  scalanie.py buduje ją od razu po zapisaniu bazy.
+"""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import automat_matma as am
+import indeks_lokalizacji as il
+
+CUBE_SUFFIX = ".kostka.npz"
+CUBE_VERSION = "1"
+
+BUCKET_M2 = 1.0          # szerokość kubełka metrażu
+MAX_BUCKET = 100_000     # metraże powyżej trafiają do ostatniego kubełka
+
+# szkic: kosze logarytmiczne cena_za_metr w [P_MIN, P_MAX); 0 = poniżej, ostatni = powyżej
+P_MIN = 100.0
+P_MAX = 1_000_000.0
+GAMMA = 1.01
+N_BINS = int(math.ceil(math.log(P_MAX / P_MIN) / math.log(GAMMA))) + 2
+
+# wartość reprezentatywna kosza (środek geometryczny; skrajne – granice zakresu)
+_REP = np.concatenate((
+    [P_MIN],
+    P_MIN * GAMMA ** (np.arange(N_BINS - 2) + 0.5),
+    [P_MAX],
+))
+
+
+def price_bins(prices: np.ndarray) -> np.ndarray:
+    """Numer kosza szkicu dla cen (NaN nie powinny tu trafiać)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw = np.floor(np.log(np.maximum(prices, 1e-9) / P_MIN) / math.log(GAMMA)) + 1
+    return np.clip(raw, 0, N_BINS - 1).astype(np.int64)
+
+
+def area_buckets(metry: np.ndarray) -> np.ndarray:
+    return np.clip(np.floor(metry / BUCKET_M2), 0, MAX_BUCKET).astype(np.int64)
+
+
+def sketch_stats(hist: np.ndarray) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """(Q1, Q3, średnia po IQR) ze szkicu – kwantyle jako wartości reprezentatywne koszy."""
+    n = int(hist.sum())
+    if n == 0:
+        return None, None, None
+    cum = np.cumsum(hist)
+    # pozycje jak w kwantylu liniowym (rangi 0..n-1), zaokrąglone do kosza
+    q1 = float(_REP[np.searchsorted(cum, 0.25 * (n - 1) + 1)])
+    q3 = float(_REP[np.searchsorted(cum, 0.75 * (n - 1) + 1)])
+    iqr = q3 - q1
+    keep = (_REP >= q1 - 1.5 * iqr) & (_REP <= q3 + 1.5 * iqr) & (hist > 0)
+    kept = hist[keep]
+    mean_adj = float((kept * _REP[keep]).sum() / kept.sum()) if kept.sum() else None
+    return q1, q3, mean_adj
+
+
+class CubeLevel:
+    """Komórki jednego poziomu posortowane wg (kod, kubełek) + histogramy w układzie CSR."""
+
+    def __init__(self, code: np.ndarray, bucket: np.ndarray, count: np.ndarray, n_price: np.ndarray,
+                 total: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                 hist_ptr: np.ndarray, hist_bin: np.ndarray, hist_cnt: np.ndarray):
+        self.code = code
+        self.bucket = bucket
+        self.count = count
+        self.n_price = n_price
+        self.total = total
+        self.starts = starts
+        self.ends = ends
+        self.hist_ptr = hist_ptr
+        self.hist_bin = hist_bin
+        self.hist_cnt = hist_cnt
+
+    FIELDS = ("code", "bucket", "count", "n_price", "total", "starts", "ends", "hist_ptr", "hist_bin", "hist_cnt")
+
+    @classmethod
+    def build(cls, codes: np.ndarray, metry: np.ndarray, prices: np.ndarray, n_codes: int) -> "CubeLevel":
+        ok = ~np.isnan(metry) & (codes >= 0)
+        codes, metry, prices = codes[ok], metry[ok], prices[ok]
+        cell_key = codes.astype(np.int64) * (MAX_BUCKET + 1) + area_buckets(metry)
+        keys, cell_of = np.unique(cell_key, return_inverse=True)
+        n_cells = len(keys)
+
+        has_price = ~np.isnan(prices)
+        count = np.bincount(cell_of, minlength=n_cells).astype(np.int64)
+        n_price = np.bincount(cell_of[has_price], minlength=n_cells).astype(np.int64)
+        total = np.bincount(cell_of[has_price], weights=prices[has_price], minlength=n_cells)
+
+        # histogram (komórka, kosz) → liczność; posortowane wg komórki, więc CSR
+        hk = cell_of[has_price].astype(np.int64) * N_BINS + price_bins(prices[has_price])
+        hkeys, hcnt = np.unique(hk, return_counts=True)
+        hist_cell = hkeys // N_BINS
+        code = keys // (MAX_BUCKET + 1)
+        return cls(
+            code=code,
+            bucket=keys % (MAX_BUCKET + 1),
+            count=count,
+            n_price=n_price,
+            total=total,
+            starts=np.searchsorted(code, np.arange(n_codes), side="left"),
+            ends=np.searchsorted(code, np.arange(n_codes), side="right"),
+            hist_ptr=np.searchsorted(hist_cell, np.arange(n_cells + 1), side="left"),
+            hist_bin=(hkeys % N_BINS).astype(np.int32),
+            hist_cnt=hcnt.astype(np.int64),
+        )
+
+    def cells(self, code: int, lo: float, hi: float) -> Tuple[int, int]:
+        """Zakres komórek pokrywających okno [lo, hi] (rozszerzone do pełnych kubełków)."""
+        if code < 0 or code >= len(self.starts):
+            return 0, 0
+        s, e = int(self.starts[code]), int(self.ends[code])
+        seg = self.bucket[s:e]
+        b_lo = 0 if not np.isfinite(lo) else int(area_buckets(np.array([max(lo, 0.0)]))[0])
+        b_hi = MAX_BUCKET if not np.isfinite(hi) else int(area_buckets(np.array([max(hi, 0.0)]))[0])
+        return s + int(np.searchsorted(seg, b_lo, side="left")), s + int(np.searchsorted(seg, b_hi, side="right"))
+
+    def merged(self, c0: int, c1: int) -> Tuple[int, int, float, np.ndarray]:
+        """Scal komórki [c0, c1): (liczba ofert, liczba cen, suma cen, histogram)."""
+        a, b = int(self.hist_ptr[c0]), int(self.hist_ptr[c1])
+        hist = np.bincount(self.hist_bin[a:b], weights=self.hist_cnt[a:b], minlength=N_BINS)
+        return (int(self.count[c0:c1].sum()), int(self.n_price[c0:c1].sum()),
+                float(self.total[c0:c1].sum()), hist)
+
+
+class StatsCube:
+    """Kostka dla wszystkich poziomów adresu; kody lokalizacji wspólne z indeksem lokalizacji."""
+
+    def __init__(self, fingerprint: str, levels: Dict[str, CubeLevel]):
+        self.fingerprint = fingerprint
+        self.levels = levels
+
+    @classmethod
+    def build(cls, df_db: pd.DataFrame, index: il.LocationIndex) -> "StatsCube":
+        metry = am._coerce_numeric(df_db["metry"]).to_numpy(dtype="float64")
+        prices = am._coerce_numeric(df_db["cena_za_metr"]).to_numpy(dtype="float64")
+        levels = {il.ALL: CubeLevel.build(np.zeros(len(df_db), dtype=np.int64), metry, prices, 1)}
+        for col, cats in index.vocab.items():
+            codes = index.codes[col].astype(np.int64)
+            levels[col] = CubeLevel.build(codes, metry, prices, len(cats))
+        return cls(index.fingerprint, levels)
+
+    def save(self, path: Path) -> None:
+        arrays = {"fingerprint": np.array(self.fingerprint), "version": np.array(CUBE_VERSION)}
+        for key, lvl in self.levels.items():
+            name = key or "_all"
+            for f in CubeLevel.FIELDS:
+                arrays[f"{name}__{f}"] = getattr(lvl, f)
+        tmp = Path(path).with_name(Path(path).name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["StatsCube"]:
+        with np.load(path, allow_pickle=False) as z:
+            if str(z["version"]) != CUBE_VERSION:
+                return None
+            levels: Dict[str, CubeLevel] = {}
+            for name in {f.split("__", 1)[0] for f in z.files if "__" in f}:
+                levels[il.ALL if name == "_all" else name] = CubeLevel(
+                    **{f: z[f"{name}__{f}"] for f in CubeLevel.FIELDS}
+                )
+            return cls(str(z["fingerprint"]), levels)
+
+    # --- zapytania (przybliżone) ---
+    def _cells(self, index: il.LocationIndex, db_key: str, value: str, lo: float, hi: float):
+        if str(value).strip():
+            lvl, code = self.levels.get(db_key), index.code(db_key, value)
+        else:
+            lvl, code = self.levels[il.ALL], 0
+        if lvl is None:
+            return None, 0, 0
+        c0, c1 = lvl.cells(code, lo, hi)
+        return lvl, c0, c1
+
+    def count(self, index: il.LocationIndex, db_key: str, value: str, lo: float, hi: float) -> int:
+        lvl, c0, c1 = self._cells(index, db_key, value, lo, hi)
+        return int(lvl.count[c0:c1].sum()) if lvl is not None else 0
+
+    def window_stats(
+        self, index: il.LocationIndex, db_key: str, value: str, lo: float, hi: float,
+    ) -> Tuple[int, Optional[float], Optional[float]]:
+        """(liczba ofert, średnia surowa, średnia po IQR) dla okna – przybliżenie z komórek kostki."""
+        lvl, c0, c1 = self._cells(index, db_key, value, lo, hi)
+        if lvl is None or c1 <= c0:
+            return 0, None, None
+        n, n_price, total, hist = lvl.merged(c0, c1)
+        if n_price == 0:
+            return n, None, None
+        mean_raw = total / n_price
+        if n_price < 4:
+            return n, mean_raw, mean_raw
+        return n, mean_raw, sketch_stats(hist)[2]
+
+
+# ===== Dostęp z cache =====
+
+_CACHE: il.FrameCache[StatsCube] = il.FrameCache(CUBE_SUFFIX)
+
+
+def cube_path(db_path: Path) -> Path:
+    return _CACHE.path(db_path)
+
+
+def get_cube(df_db: pd.DataFrame, db_path: Optional[Path] = None) -> StatsCube:
+    """Kostka dla ramki bazy: z pamięci, z pliku obok bazy (ten sam skrót treści) albo zbudowana."""
+    index = il.get_index(df_db, db_path)
+    return _CACHE.get(df_db, lambda: index.fingerprint, lambda _fp: StatsCube.build(df_db, index),
+                      StatsCube.load, db_path)
+
+
+def publish_cube(df: pd.DataFrame, db_xlsx: Path, sheet: str) -> Path:
+    """Zbuduj i zapisz kostkę (oraz indeks lokalizacji) dla świeżo scalonej bazy."""
+    return _CACHE.publish(df, db_xlsx, sheet, get_cube)
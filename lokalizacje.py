@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+lokalizacje.py — słownikowe kodowanie kolumn adresowych bazy ogłoszeń
+- normalizuje wartości (casefold, NFC, zwinięte białe znaki) – klucz dopasowania,
+- zamienia kolumny wojewodztwo..ulica na pd.Categorical: jeden kod na znormalizowaną wartość,
+  kategorie = pisownia do wyświetlania (najczęstszy wariant w bazie, np. „Kraków”, nie „kraków”),
+- dopasowanie zawsze po kluczach (match_vocab), porównanie lokalizacji = porównanie kodów całkowitych.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# kolumny adresowe bazy (kolejność = od najogólniejszej)
+LOCATION_COLUMNS = ["wojewodztwo", "powiat", "gmina", "miejscowosc", "dzielnica", "ulica"]
+
+
+def clean_location(value) -> str:
+    """Pisownia do wyświetlania: NFC i zwinięte spacje (także NBSP), wielkość liter bez zmian."""
+    s = unicodedata.normalize("NFC", str(value))
+    return " ".join(s.split())
+
+
+def normalize_location(value) -> str:
+    """Znormalizuj pojedynczą wartość adresu: NFC, zwinięte spacje (także NBSP), casefold."""
+    return clean_location(value).casefold()
+
+
+def _spellings(series: pd.Series) -> Tuple[pd.Index, List[str], np.ndarray]:
+    """(klucze posortowane, pisownia per klucz – najczęstszy wariant, kod klucza per wiersz)."""
+    codes, uniques = pd.factorize(series.astype(str), sort=False)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    best: Dict[str, Tuple[str, int]] = {}
+    norm_uniques = []
+    for u, n in zip(uniques, counts):
+        key = normalize_location(u)
+        norm_uniques.append(key)
+        if key not in best or n > best[key][1]:  # remis – pierwszy napotkany wariant
+            best[key] = (clean_location(u), int(n))
+    vocab = pd.Index(sorted(best))
+    remap = vocab.get_indexer(norm_uniques)
+    return vocab, [best[k][0] for k in vocab], (remap[codes] if len(codes) else codes)
+
+
+def encode_location_column(series: pd.Series) -> pd.Series:
+    """
+    Zakoduj kolumnę jako kategorię: warianty pisowni scalone w jeden kod (po kluczu znormalizowanym),
+    kategorią jest najczęstsza pisownia wariantu. Normalizujemy tylko unikalne wartości.
+    Kolejność kodów = kolejność kluczy, więc kody nie zależą od wybranej pisowni.
+    """
+    _, labels, new_codes = _spellings(series)
+    dtype = pd.CategoricalDtype(categories=pd.Index(labels, dtype=object), ordered=False)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, dtype=dtype),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def encode_location_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Zakoduj w miejscu wszystkie kolumny adresowe obecne w ramce."""
+    for col in LOCATION_COLUMNS:
+        if col in df.columns:
+            df[col] = encode_location_column(df[col])
+    return df
+
+
+def match_vocab(categories: pd.Index) -> pd.Index:
+    """Klucze dopasowania (znormalizowane) dla kategorii kolumny – te same pozycje co kody."""
+    return pd.Index([normalize_location(c) for c in categories], dtype=object)
+
+
+def display_labels(series: pd.Series) -> Dict[str, str]:
+    """Klucz znormalizowany → pisownia do wyświetlania (kategorie kolumny albo najczęstszy wariant)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        cats = series.cat.categories
+        return dict(zip(match_vocab(cats), (str(c) for c in cats)))
+    vocab, labels, _ = _spellings(series)
+    return dict(zip(vocab, labels))
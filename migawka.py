@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+migawka.py — migawka (snapshot) bazy ogłoszeń w formacie Arrow IPC
+- scalanie.py publikuje ją obok 'Baza danych.xlsx' (plik '.arrow'),
+- automat / wyniki / automat gui mapują ją tylko do odczytu (mmap),
+  więc kilka narzędzi naraz współdzieli jedną fizyczną kopię w pamięci,
+- zimny start to doczytanie stron pliku zamiast parsowania xlsx.
+
+pyarrow jest opcjonalny: bez niego migawka nie powstaje, a wszyscy czytają xlsx.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+import automat_matma as am
+import lokalizacje as lok
+
+try:  # opcjonalna zależność
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pragma: no cover
+    pa = None
+    pa_ipc = None
+
+SNAPSHOT_SUFFIX = ".arrow"
+NUMERIC_COLUMNS = ["cena_za_metr", "metry", "rok_budowy", "liczba_pokoi", "pietro", "lat", "lon"]
+
+# klucze metadanych w schemacie Arrow
+_META_SHEET = b"pricebot.sheet"
+_META_SRC_MTIME = b"pricebot.source_mtime_ns"
+_META_SRC_SIZE = b"pricebot.source_size"
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def snapshot_path(db_xlsx: Path) -> Path:
+    return Path(db_xlsx).with_suffix(SNAPSHOT_SUFFIX)
+
+
+def prepare_offer_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Wspólne przygotowanie bazy: kolumny liczbowe → float, adresowe → kody słownikowe."""
+    for num_col in NUMERIC_COLUMNS:
+        if num_col in df.columns:
+            df[num_col] = am._coerce_numeric(df[num_col])
+    lok.encode_location_columns(df)
+    return df
+
+
+def _to_arrow_table(df: pd.DataFrame):
+    arrays = []
+    names = []
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            arr = pa.DictionaryArray.from_arrays(
+                pa.array(s.cat.codes.to_numpy()),
+                pa.array(s.cat.categories.astype(str).to_numpy(dtype=object), type=pa.string()),
+            )
+        elif pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+            # NaN zostaje wartością (nie null) – bez bitmapy ważności odczyt jest zero-copy
+            arr = pa.array(s.to_numpy(), from_pandas=False)
+        else:
+            arr = pa.array(s.astype("string").to_numpy(dtype=object, na_value=None), type=pa.string())
+        arrays.append(arr)
+        names.append(str(col))
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def publish_snapshot(df: pd.DataFrame, db_xlsx: Path, sheet: str) -> Optional[Path]:
+    """
+    Zapisz migawkę bazy obok pliku xlsx (atomowo: plik tymczasowy + os.replace,
+    więc procesy mające zmapowaną starą wersję nadal ją czytają).
+    Zwraca ścieżkę migawki albo None, gdy pyarrow jest niedostępny.
+    """
+    if pa is None:
+        return None
+    db_xlsx = Path(db_xlsx)
+    prepared = prepare_offer_frame(df.copy())
+    table = _to_arrow_table(prepared)
+
+    st = db_xlsx.stat()
+    meta = {
+        _META_SHEET: sheet.encode("utf-8"),
+        _META_SRC_MTIME: str(st.st_mtime_ns).encode(),
+        _META_SRC_SIZE: str(st.st_size).encode(),
+    }
+    table = table.replace_schema_metadata(meta)
+
+    out = snapshot_path(db_xlsx)
+    tmp = out.with_name(out.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, out)
+    return out
+
+
+def _string_as_arrow(t):
+    if pa.types.is_string(t) or pa.types.is_large_string(t):
+        return pd.ArrowDtype(t)
+    return None
+
+
+def load_snapshot(db_xlsx: Path, sheet: str) -> Optional[pd.DataFrame]:
+    """
+    Zmapuj migawkę tylko do odczytu i zwróć gotową (przygotowaną) ramkę.
+    None, gdy brak pyarrow, brak migawki, inny arkusz albo xlsx jest nowszy niż migawka.
+    """
+    if pa is None:
+        return None
+    db_xlsx = Path(db_xlsx)
+    snap = snapshot_path(db_xlsx)
+    if not snap.exists() or not db_xlsx.exists():
+        return None
+
+    try:
+        source = pa.memory_map(str(snap), "r")
+        table = pa_ipc.open_file(source).read_all()
+    except Exception:
+        return None
+
+    meta = table.schema.metadata or {}
+    st = db_xlsx.stat()
+    if (meta.get(_META_SHEET, b"").decode("utf-8") != sheet
+            or meta.get(_META_SRC_MTIME) != str(st.st_mtime_ns).encode()
+            or meta.get(_META_SRC_SIZE) != str(st.st_size).encode()):
+        return None
+
+    # liczby: widoki numpy na zmapowanym pliku; teksty: ArrowDtype bez kopiowania;
+    # kolumny słownikowe → pd.Categorical (kody + mały słownik)
+    return table.to_pandas(split_blocks=True, types_mapper=_string_as_arrow)
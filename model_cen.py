@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+model_cen.py — regionalny model hedoniczny ceny za m² (szybka wycena całego raportu)
+- regresja liniowa cena_za_metr ~ metry, liczba pokoi, piętro, rok budowy, rynek, materiał
+  (materiał jako zmienne 0/1 dla MAX_MATERIALS najczęstszych wartości),
+- osobne współczynniki dla miast i województw z co najmniej MIN_FIT ofertami + model krajowy;
+  wiersz raportu bierze model najwęższego dostępnego regionu (miasto → województwo → kraj),
+- ceny odstające (poza 1,5×IQR w regionie) pomijane przy dopasowaniu; lekka regularyzacja
+  grzbietowa (RIDGE) stabilizuje regiony z mało zróżnicowanymi cechami,
+- braki cech uzupełniane medianą regionu – także w wierszach raportu,
+- współczynniki zapisywane obok bazy ('<baza>.model.npz'), kluczowane skrótem treści bazy i cech;
+  scalanie.py dopasowuje model od razu po zapisaniu bazy,
+- wycena = jedno mnożenie macierzy cech raportu przez współczynniki regionów wierszy.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import automat_matma as am
+import indeks_lokalizacji as il
+import lokalizacje as lok
+import sasiedzi
+import statystyki as st
+
+MODEL_SUFFIX = ".model.npz"
+MODEL_VERSION = "2"
+
+MIN_FIT = 30
+RIDGE = 1.0
+MAX_MATERIALS = 8
+
+# (kolumna bazy, kolumna raportu) – kolejność jak sasiedzi.FEATURES (metry, pokoje, piętro, rok, rynek)
+FEATURES: List[Tuple[str, str]] = [(db, rp) for (db, rp, _) in sasiedzi.FEATURES]
+MATERIAL = ("material", "Materiał budynku")
+REGION = [("wojewodztwo", "Województwo"), ("miejscowosc", "Miejscowość")]
+
+LABEL_COUNTRY = "cała Polska"
+
+
+def _norm_values(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Znormalizowane wartości kolumny jako tablica napisów; brak kolumny / NaN → ''."""
+    if col not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    codes, uniques = pd.factorize(df[col].astype(object), sort=False)
+    norm = [lok.normalize_location(u) for u in uniques]
+    table = np.array([("" if v == "nan" else v) for v in norm] + [""], dtype=object)
+    return table[codes]
+
+
+def _region_keys(df: pd.DataFrame, columns: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(klucz województwa, klucz miasta 'woj|miejscowość') per wiersz; '' gdy brak."""
+    woj = _norm_values(df, columns[0])
+    msc = _norm_values(df, columns[1])
+    city = np.where((woj != "") & (msc != ""), woj + "|" + msc, "")
+    return woj, city
+
+
+class PriceModel:
+    """Współczynniki modeli regionalnych (wiersz 0 = model krajowy) + parametry przygotowania cech."""
+
+    def __init__(
+        self,
+        fingerprint: str,
+        keys: np.ndarray,
+        labels: np.ndarray,
+        coef: np.ndarray,
+        medians: np.ndarray,
+        counts: np.ndarray,
+        mu: np.ndarray,
+        sd: np.ndarray,
+        materials: np.ndarray,
+    ):
+        self.fingerprint = fingerprint
+        self.keys = pd.Index(keys, dtype=object)
+        self.labels = labels
+        self.coef = coef
+        self.medians = medians
+        self.counts = counts
+        self.mu = mu
+        self.sd = sd
+        self.materials = pd.Index(materials, dtype=object)
+
+    # --- cechy ---
+    def _design(self, X: np.ndarray, material: np.ndarray, region: np.ndarray) -> np.ndarray:
+        """Macierz planu: [1, cechy standaryzowane (braki → mediana regionu), materiał 0/1]."""
+        X = np.where(np.isnan(X), self.medians[region], X)
+        Z = np.zeros((len(X), 1 + X.shape[1] + len(self.materials)))
+        Z[:, 0] = 1.0
+        Z[:, 1:1 + X.shape[1]] = (X - self.mu) / self.sd
+        m = self.materials.get_indexer(material)
+        rows = np.flatnonzero(m >= 0)
+        Z[rows, 1 + X.shape[1] + m[rows]] = 1.0
+        return Z
+
+    # --- dopasowanie ---
+    @classmethod
+    def fit(cls, df_db: pd.DataFrame, fingerprint: str) -> "PriceModel":
+        y_all = am._coerce_numeric(df_db["cena_za_metr"]).to_numpy(dtype="float64")
+        X_all = sasiedzi.feature_matrix(df_db, [db for (db, _) in FEATURES])
+        material = _norm_values(df_db, MATERIAL[0])
+        woj, city = _region_keys(df_db, [db for (db, _) in REGION])
+
+        ok = ~np.isnan(y_all) & ~np.isnan(X_all[:, 0])
+        with np.errstate(invalid="ignore"):
+            mu = np.nanmean(X_all[ok], axis=0) if ok.any() else np.zeros(X_all.shape[1])
+            sd = np.nanstd(X_all[ok], axis=0) if ok.any() else np.ones(X_all.shape[1])
+        mu = np.where(np.isnan(mu), 0.0, mu)
+        sd = np.where(~np.isfinite(sd) | (sd == 0), 1.0, sd)
+        mat_counts = pd.Series(material[ok & (material != "")]).value_counts()
+        materials = mat_counts.index[:MAX_MATERIALS].to_numpy(dtype=object)
+
+        # regiony: kraj + województwa + miasta z >= MIN_FIT ofertami
+        groups: List[Tuple[str, str, np.ndarray]] = [("", LABEL_COUNTRY, np.flatnonzero(ok))]
+        # etykiety regionów w pisowni z bazy (klucze są znormalizowane)
+        names = [lok.display_labels(df_db[db]) if db in df_db.columns else {} for (db, _) in REGION]
+        for keys, kind, shown in ((woj, "województwo", names[0]), (city, "miejscowość", names[1])):
+            codes, uniq = pd.factorize(keys[ok])
+            sizes = np.bincount(codes[codes >= 0], minlength=len(uniq))
+            rows_ok = np.flatnonzero(ok)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.concatenate(([0], np.cumsum(sizes)))
+            for j, key in enumerate(uniq):
+                if key == "" or sizes[j] < MIN_FIT:
+                    continue
+                name = key.split("|")[-1]
+                groups.append((key, f"{kind} {shown.get(name, name)}", rows_ok[order[bounds[j]:bounds[j + 1]]]))
+
+        model = cls(fingerprint, np.array([g[0] for g in groups], dtype=object),
+                    np.array([g[1] for g in groups], dtype=object),
+                    np.zeros((len(groups), 1 + X_all.shape[1] + len(materials))),
+                    np.zeros((len(groups), X_all.shape[1])), np.zeros(len(groups), dtype=np.int64),
+                    mu, sd, materials)
+
+        penalty = np.sqrt(RIDGE) * np.eye(model.coef.shape[1])[1:]  # bez kary dla wyrazu wolnego
+        for r, (_, _, rows) in enumerate(groups):
+            rows = rows[st.iqr_mask(y_all[rows])]
+            with np.errstate(invalid="ignore"):
+                med = np.nanmedian(X_all[rows], axis=0) if rows.size else np.full(X_all.shape[1], np.nan)
+            model.medians[r] = np.where(np.isnan(med), mu, med)
+            model.counts[r] = rows.size
+            if rows.size == 0:
+                continue
+            Z = model._design(X_all[rows], material[rows], np.full(rows.size, r))
+            A = np.vstack([Z, penalty])
+            b = np.concatenate([y_all[rows], np.zeros(penalty.shape[0])])
+            model.coef[r] = np.linalg.lstsq(A, b, rcond=None)[0]
+        return model
+
+    def save(self, path: Path) -> None:
+        arrays = {
+            "fingerprint": np.array(self.fingerprint),
+            "keys": np.array(self.keys.astype(str).tolist(), dtype=str),
+            "labels": np.array(self.labels.astype(str).tolist(), dtype=str),
+            "coef": self.coef,
+            "medians": self.medians,
+            "counts": self.counts,
+            "mu": self.mu,
+            "sd": self.sd,
+            "materials": np.array(self.materials.astype(str).tolist(), dtype=str),
+        }
+        tmp = Path(path).with_name(Path(path).name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "PriceModel":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(
+                str(z["fingerprint"]),
+                np.array(z["keys"].tolist(), dtype=object),
+                np.array(z["labels"].tolist(), dtype=object),
+                z["coef"], z["medians"], z["counts"], z["mu"], z["sd"],
+                np.array(z["materials"].tolist(), dtype=object),
+            )
+
+    # --- wycena ---
+    def regions(self, df_rp: pd.DataFrame) -> np.ndarray:
+        """Numer modelu per wiersz raportu: miasto → województwo → kraj (0)."""
+        woj, city = _region_keys(df_rp, [rp for (_, rp) in REGION])
+        region = self.keys.get_indexer(city)
+        miss = region < 0
+        region[miss] = self.keys.get_indexer(woj[miss])
+        region[region < 0] = 0
+        return region
+
+    def predict(self, df_rp: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """(cena za m² z modelu, numer regionu) dla wszystkich wierszy raportu; cena <= 0 → NaN."""
+        region = self.regions(df_rp)
+        X = sasiedzi.feature_matrix(df_rp, [rp for (_, rp) in FEATURES])
+        Z = self._design(X, _norm_values(df_rp, MATERIAL[1]), region)
+        pred = np.einsum("ij,ij->i", Z, self.coef[region])
+        pred[~(pred > 0)] = np.nan
+        return pred, region
+
+
+# ===== Dostęp z cache =====
+
+_CACHE: il.FrameCache[PriceModel] = il.FrameCache(MODEL_SUFFIX)
+
+
+def model_path(db_path: Path) -> Path:
+    return _CACHE.path(db_path)
+
+
+def model_fingerprint(df_db: pd.DataFrame, index: il.LocationIndex) -> str:
+    """Skrót treści bazy (z indeksu lokalizacji) rozszerzony o kolumny cech modelu."""
+    h = hashlib.sha1((MODEL_VERSION + index.fingerprint).encode())
+    cols = [c for c in [db for (db, _) in FEATURES] + [MATERIAL[0]] if c in df_db.columns]
+    if cols:
+        part = df_db[cols].astype(str)
+        h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def get_model(df_db: pd.DataFrame, db_path: Optional[Path] = None) -> PriceModel:
+    """Model dla ramki bazy: z pamięci, z pliku obok bazy (ten sam skrót) albo dopasowany od zera."""
+    return _CACHE.get(df_db, lambda: model_fingerprint(df_db, il.get_index(df_db, db_path)),
+                      lambda fp: PriceModel.fit(df_db, fp), PriceModel.load, db_path)
+
+
+def publish_model(df: pd.DataFrame, db_xlsx: Path, sheet: str) -> Path:
+    """Dopasuj i zapisz model dla świeżo scalonej bazy (jak kostka.publish_cube)."""
+    return _CACHE.publish(df, db_xlsx, sheet, get_model)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+pamiec_wycen.py — pamięć (cache) wyników wyceny w obrębie i pomiędzy uruchomieniami
+- klucz: (wersja bazy, poziom, znormalizowana wartość lokalizacji, metraż, tolerancja),
+- w pamięci: ograniczony LRU; na dysku: '<baza>.wyceny.json' obok bazy,
+  ważny tylko dla tej samej wersji (skrótu treści) bazy,
+- liczniki trafień/chybień do podsumowania po process_report.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+import indeks_lokalizacji as il
+import lokalizacje as lok
+
+CACHE_SUFFIX = ".wyceny.json"
+# wersja formatu kluczy – pliki innej wersji są pomijane (np. wpisy trybu przybliżonego
+# zapisane przez wersję 1 pod kluczem trybu dokładnego)
+CACHE_VERSION = "2"
+DEFAULT_MAXSIZE = 50_000
+
+Key = Tuple[str, str, str, str]
+
+
+def make_key(level_key_db: str, level_value, center: float, tol: float) -> Key:
+    """Klucz zapytania; metraż/tolerancja jako repr liczby (NaN → 'nan')."""
+    value = str(level_value).strip()
+    return (
+        level_key_db if value else "",
+        lok.normalize_location(value) if value else "",
+        "nan" if math.isnan(center) else repr(float(center)),
+        repr(float(tol)),
+    )
+
+
+class ValuationCache:
+    """LRU wyników (krotki sformatowanych stringów) dla jednej wersji bazy."""
+
+    def __init__(self, fingerprint: str, path: Optional[Path] = None, maxsize: int = DEFAULT_MAXSIZE):
+        self.fingerprint = fingerprint
+        self.path = Path(path) if path is not None else None
+        self.maxsize = max(1, int(maxsize))
+        self._data: "OrderedDict[Key, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._load()
+
+    def get(self, key: Key) -> Optional[tuple]:
+        val = self._data.get(key)
+        if val is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return val
+
+    def put(self, key: Key, value: tuple) -> None:
+        self._data[key] = tuple(value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        self._dirty = True
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = 0
+
+    def stats_text(self) -> str:
+        total = self.hits + self.misses
+        pct = (100.0 * self.hits / total) if total else 0.0
+        return f"Cache wycen: trafienia {self.hits}, chybienia {self.misses} ({pct:.1f}% trafień)"
+
+    # --- dysk ---
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if payload.get("fingerprint") != self.fingerprint or payload.get("version") != CACHE_VERSION:
+            return
+        for k, v in payload.get("entries", [])[-self.maxsize:]:
+            self._data[tuple(k)] = tuple(v)
+
+    def save(self) -> None:
+        if self.path is None or not self._dirty:
+            return
+        payload = {
+            "version": CACHE_VERSION,
+            "fingerprint": self.fingerprint,
+            "entries": [[list(k), list(v)] for k, v in self._data.items()],
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+            self._dirty = False
+        except OSError:
+            pass
+
+
+_CACHES: Dict[str, ValuationCache] = {}
+# ścieżka bazy → skrót jej najnowszej wersji (cache poprzednich wersji nie zostają w pamięci)
+_LATEST: Dict[Optional[str], str] = {}
+
+
+def cache_path(db_path: Path) -> Path:
+    return Path(db_path).with_name(Path(db_path).stem + CACHE_SUFFIX)
+
+
+def get_cache(df_db: pd.DataFrame, maxsize: int = DEFAULT_MAXSIZE) -> ValuationCache:
+    """
+    Cache dla bieżącej wersji bazy (wersja = skrót treści z indeksu lokalizacji).
+    Cache poprzedniej wersji tej samej bazy jest zapominany – zapis należy do wołającego.
+    """
+    fp = il.get_index(df_db).fingerprint
+    db_path = df_db.attrs.get("db_path") or None
+    cache = _CACHES.get(fp)
+    if cache is None:
+        cache = ValuationCache(fp, cache_path(Path(db_path)) if db_path else None, maxsize=maxsize)
+        _CACHES[fp] = cache
+    old = _LATEST.get(db_path)
+    _LATEST[db_path] = fp
+    if old is not None and old != fp and old not in _LATEST.values():
+        _CACHES.pop(old, None)
+    return cache
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+profilowanie.py — tryb profilowania na żądanie dla skryptów CLI (przełącznik --profile)
+- cProfile całego przebiegu (plik .prof: python -m pstats / snakeviz),
+- próbkowanie stosu głównego wątku co SAMPLE_INTERVAL s → plik .folded (collapsed stacks:
+  flamegraph.pl, speedscope, inferno); korzeń każdego stosu to nazwa etapu,
+- etapy (stage): czas ścienny, liczba wejść i szczyt RSS w czasie etapu (próbkowany),
+- na koniec: tabela etapów i TOP_N funkcji wg czasu własnego na stderr, podsumowanie w .json.
+
+Poza trybem --profile stage() to pusty kontekst – instrumentacja kosztuje jedno wywołanie.
+Procesy potomne (automat --workers N) nie są profilowane – widać tylko czas oczekiwania na pulę.
+psutil jest opcjonalny: bez niego RSS z /proc (Linux) albo resource (szczyt całego procesu).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:  # opcjonalna zależność
+    import psutil
+except ImportError:  # pragma: no cover
+    psutil = None
+
+try:  # brak na Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+PROFILE_FLAG = "--profile"
+PROFILE_DIR = "profil"
+SAMPLE_INTERVAL = 0.005
+TOP_N = 20
+MAIN_STAGE = "(poza etapami)"
+
+_ACTIVE: Optional["Profiler"] = None
+
+
+def rss_bytes() -> Optional[int]:
+    """Bieżąca pamięć rezydentna procesu (None, gdy nie da się odczytać)."""
+    if psutil is not None:
+        return int(psutil.Process().memory_info().rss)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Szczyt RSS całego procesu od startu (jądro systemu, nie próbkowanie)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return int(getattr(info, "peak_wset", info.rss))
+    return None
+
+
+def _mb(n: Optional[int]) -> Optional[float]:
+    return None if n is None else round(n / 2 ** 20, 1)
+
+
+class _Stage:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak_rss: Optional[int] = None
+
+    def seen_rss(self, rss: Optional[int]) -> None:
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+
+
+class Profiler:
+    """cProfile + próbkowanie stosu + etapy dla jednego uruchomienia skryptu `name`."""
+
+    def __init__(self, name: str, out_dir: Path | str = PROFILE_DIR, interval: float = SAMPLE_INTERVAL):
+        self.name = name
+        self.out_dir = Path(out_dir)
+        self.interval = interval
+        self.stages: Dict[str, _Stage] = {}
+        self._stack: List[str] = []
+        self._samples: Counter = Counter()
+        self._profile = cProfile.Profile()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._main_ident = threading.get_ident()
+        self._t0 = 0.0
+        self._top_seconds = 0.0
+        self.wall = 0.0
+
+    # --- etapy ---
+    def _current(self) -> str:
+        return self._stack[-1] if self._stack else MAIN_STAGE
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        st = self.stages.setdefault(name, _Stage())
+        st.calls += 1
+        st.seen_rss(rss_bytes())
+        top = not self._stack
+        self._stack.append(name)
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t
+            st.seconds += dt
+            if top:
+                self._top_seconds += dt
+            self._stack.pop()
+            st.seen_rss(rss_bytes())
+
+    # --- próbkowanie ---
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._main_ident)
+            stage = self._current()
+            self.stages.setdefault(stage, _Stage()).seen_rss(rss_bytes())
+            names: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            names.append(stage)
+            self._samples[";".join(reversed(names))] += 1
+
+    # --- start / stop ---
+    def __enter__(self) -> "Profiler":
+        global _ACTIVE
+        _ACTIVE = self
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="profilowanie", daemon=True)
+        self._thread.start()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        global _ACTIVE
+        self._profile.disable()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.wall = time.perf_counter() - self._t0
+        _ACTIVE = None
+        try:
+            paths = self.write()
+            print(self.summary_text(), file=sys.stderr)
+            print("[PROFIL] Pliki: " + ", ".join(str(p) for p in paths), file=sys.stderr)
+        except Exception as e:
+            print(f"[WARN] Nie udało się zapisać profilu: {e}", file=sys.stderr)
+        return False
+
+    # --- wyniki ---
+    def hotspots(self, n: int = TOP_N) -> List[Dict[str, object]]:
+        """Funkcje o największym czasie własnym (tottime) z cProfile."""
+        stats = pstats.Stats(self._profile).stats  # type: ignore[attr-defined]
+        rows = sorted(stats.items(), key=lambda kv: kv[1][2], reverse=True)[:n]
+        return [
+            {
+                "funkcja": func,
+                "plik": f"{Path(file).name}:{line}" if line else file,
+                "wywolania": int(nc),
+                "czas_wlasny_s": round(tt, 4),
+                "czas_lacznie_s": round(ct, 4),
+            }
+            for (file, line, func), (cc, nc, tt, ct, _callers) in rows
+        ]
+
+    def stage_table(self) -> List[Dict[str, object]]:
+        """Etapy w kolejności pierwszego wejścia; MAIN_STAGE = czas poza etapami najwyższego poziomu."""
+        rest = self.stages.setdefault(MAIN_STAGE, _Stage())
+        rest.calls = 1
+        rest.seconds = max(self.wall - self._top_seconds, 0.0)
+        return [
+            {"etap": name, "wejscia": s.calls, "czas_s": round(s.seconds, 4), "szczyt_rss_mb": _mb(s.peak_rss)}
+            for name, s in self.stages.items()
+        ]
+
+    def summary_text(self) -> str:
+        lines = [f"[PROFIL] {self.name}: {self.wall:.3f} s, szczyt RSS procesu {_mb(peak_rss_bytes()) or '?'} MB"]
+        lines.append(f"  {'etap':<28} {'wejścia':>8} {'czas [s]':>10} {'szczyt RSS [MB]':>16}")
+        for row in self.stage_table():
+            rss = row["szczyt_rss_mb"] if row["szczyt_rss_mb"] is not None else "?"
+            lines.append(f"  {row['etap']:<28} {row['wejscia']:>8} {row['czas_s']:>10.3f} {rss:>16}")
+        lines.append(f"  TOP {TOP_N} wg czasu własnego:")
+        lines.append(f"  {'własny [s]':>10} {'łącznie [s]':>11} {'wywołania':>10}  funkcja")
+        for h in self.hotspots():
+            lines.append(f"  {h['czas_wlasny_s']:>10.3f} {h['czas_lacznie_s']:>11.3f} {h['wywolania']:>10}  {h['funkcja']} ({h['plik']})")
+        return "\n".join(lines)
+
+    def write(self) -> List[Path]:
+        """Zapisz <nazwa>_<czas>.prof / .folded / .json w out_dir; zwraca ścieżki."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        base = self.out_dir / f"{self.name}_{datetime.now():%Y%m%d_%H%M%S}"
+        prof_path = base.with_suffix(".prof")
+        self._profile.dump_stats(str(prof_path))
+        folded_path = base.with_suffix(".folded")
+        with open(folded_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._samples.items()):
+                f.write(f"{stack} {count}\n")
+        json_path = base.with_suffix(".json")
+        json_path.write_text(json.dumps({
+            "skrypt": self.name,
+            "argv": sys.argv,
+            "czas_s": round(self.wall, 4),
+            "szczyt_rss_mb": _mb(peak_rss_bytes()),
+            "probki": int(sum(self._samples.values())),
+            "interwal_s": self.interval,
+            "etapy": self.stage_table(),
+            "hotspoty": self.hotspots(),
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        return [prof_path, folded_path, json_path]
+
+
+def stage(name: str):
+    """Etap aktywnego profilu (albo pusty kontekst, gdy profilowanie jest wyłączone)."""
+    return _ACTIVE.stage(name) if _ACTIVE is not None else nullcontext()
+
+
+def pop_flag(argv: Optional[List[str]] = None) -> bool:
+    """Zdejmij --profile z argumentów (przed argparse / ręcznym parsowaniem); True, jeśli był."""
+    argv = sys.argv if argv is None else argv
+    if PROFILE_FLAG not in argv:
+        return False
+    argv.remove(PROFILE_FLAG)
+    return True
+
+
+def session(name: str, enabled: bool):
+    """Kontekst profilowania całego przebiegu skryptu (nic nie robi, gdy enabled=False)."""
+    return Profiler(name) if enabled else nullcontext()
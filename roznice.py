@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+roznice.py — raport zmian bazy po scaleniu (nowe / usunięte / zmiana ceny)
+- łączy (hash join) nową bazę z poprzednią po znormalizowanym 'link',
+- wszystko liczone wektorowo (pandas merge + maski), bez porównań wiersz po wierszu,
+- wynik: małe tabele + liczniki per województwo, zapisywane obok bazy.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+import automat_matma as am
+import lokalizacje as lok
+import migawka
+
+DIFF_FILE_NAME = "Zmiany bazy.xlsx"
+DIFF_COLUMNS = ["link", "wojewodztwo", "miejscowosc", "cena", "cena_za_metr", "metry"]
+
+SHEET_SUMMARY = "podsumowanie"
+SHEET_NEW = "nowe"
+SHEET_REMOVED = "usuniete"
+SHEET_REPRICED = "zmiana_ceny"
+
+
+def normalize_link(series: pd.Series) -> pd.Series:
+    """Klucz ogłoszenia: bez query/fragmentu, bez końcowego '/', https, bez segmentu '/hpr'."""
+    s = series.astype("string").fillna("").str.strip()
+    s = s.str.replace(r"[?#].*$", "", regex=True)
+    s = s.str.replace(r"/+$", "", regex=True)
+    s = s.str.replace(r"^http://", "https://", regex=True)
+    s = s.str.replace("/hpr/", "/", regex=False)
+    return s
+
+
+def _slim(df: pd.DataFrame) -> pd.DataFrame:
+    """Tylko kolumny potrzebne do porównania + klucz i ceny liczbowe."""
+    out = pd.DataFrame(index=df.index)
+    for col in DIFF_COLUMNS:
+        out[col] = df[col] if col in df.columns else pd.NA
+    out["_key"] = normalize_link(out["link"])
+    out["_cena"] = am._coerce_numeric(out["cena"])
+    out["_cena_m2"] = am._coerce_numeric(out["cena_za_metr"])
+    out["_woj"] = out["wojewodztwo"].astype("string").fillna("").map(lok.normalize_location)
+    out = out[out["_key"] != ""]
+    return out.drop_duplicates(subset=["_key"], keep="first")
+
+
+def load_previous(db_xlsx: Path, sheet: str) -> Optional[pd.DataFrame]:
+    """Poprzednia baza: migawka Arrow, a gdy jej brak – sam xlsx (tylko potrzebne kolumny)."""
+    snap = migawka.load_snapshot(db_xlsx, sheet)
+    if snap is not None:
+        return snap
+    if not Path(db_xlsx).exists():
+        return None
+    try:
+        return pd.read_excel(
+            db_xlsx, sheet_name=sheet, engine="openpyxl",
+            usecols=lambda c: str(c) in DIFF_COLUMNS,
+        )
+    except Exception:
+        return None
+
+
+def diff_offers(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Porównaj bazy. Zwraca słownik tabel:
+      'nowe', 'usuniete', 'zmiana_ceny' oraz 'podsumowanie' (liczniki per województwo).
+    """
+    a = _slim(old)
+    b = _slim(new)
+
+    j = b.merge(a, on="_key", how="outer", suffixes=("", "_old"), indicator=True)
+
+    # lewa strona = nowa baza, prawa = poprzednia (kolumny z sufiksem '_old')
+    only_new = j["_merge"] == "left_only"
+    only_old = j["_merge"] == "right_only"
+    both = j["_merge"] == "both"
+    repriced = both & j["_cena"].notna() & j["_cena_old"].notna() & (j["_cena"] != j["_cena_old"])
+
+    nowe = j.loc[only_new, DIFF_COLUMNS + ["_woj"]]
+    usuniete = j.loc[only_old, [c + "_old" for c in DIFF_COLUMNS] + ["_woj_old"]]
+    usuniete.columns = DIFF_COLUMNS + ["_woj"]
+
+    zm = j.loc[repriced, DIFF_COLUMNS + ["_woj", "_cena", "_cena_old", "_cena_m2", "_cena_m2_old"]].copy()
+    zm["cena_poprzednia"] = j.loc[repriced, "cena_old"]
+    zm["zmiana_zl"] = zm["_cena"] - zm["_cena_old"]
+    zm["zmiana_proc"] = (zm["zmiana_zl"] / zm["_cena_old"] * 100).round(2)
+    zm["cena_za_metr_poprzednia"] = j.loc[repriced, "cena_za_metr_old"]
+    zmiana_ceny = zm[DIFF_COLUMNS[:4] + ["cena_poprzednia", "zmiana_zl", "zmiana_proc",
+                                         "cena_za_metr", "cena_za_metr_poprzednia", "metry", "_woj"]]
+
+    summary = pd.concat(
+        {
+            "nowe": nowe["_woj"].value_counts(),
+            "usuniete": usuniete["_woj"].value_counts(),
+            "zmiana_ceny": zmiana_ceny["_woj"].value_counts(),
+            "bez_zmian": j.loc[both & ~repriced, "_woj"].value_counts(),
+        },
+        axis=1,
+    ).fillna(0).astype(int)
+    summary = summary.sort_index()
+    # klucze znormalizowane → pisownia z bazy (nowa ma pierwszeństwo)
+    shown: Dict[str, str] = {}
+    for df in (old, new):
+        if "wojewodztwo" in df.columns:
+            shown.update(lok.display_labels(df["wojewodztwo"]))
+    summary.index = pd.Index([shown.get(k, k) for k in summary.index], name="wojewodztwo")
+    summary.loc["RAZEM"] = summary.sum()
+
+    return {
+        SHEET_SUMMARY: summary.reset_index(),
+        SHEET_NEW: nowe.drop(columns="_woj").reset_index(drop=True),
+        SHEET_REMOVED: usuniete.drop(columns="_woj").reset_index(drop=True),
+        SHEET_REPRICED: zmiana_ceny.drop(columns="_woj").reset_index(drop=True),
+    }
+
+
+def write_diff_report(tables: Dict[str, pd.DataFrame], path: Path) -> None:
+    with pd.ExcelWriter(path, engine="openpyxl", mode="w") as wr:
+        for name in (SHEET_SUMMARY, SHEET_NEW, SHEET_REMOVED, SHEET_REPRICED):
+            tables[name].to_excel(wr, sheet_name=name, index=False)
+
+
+def summary_text(tables: Dict[str, pd.DataFrame]) -> str:
+    total = tables[SHEET_SUMMARY].set_index("wojewodztwo").loc["RAZEM"]
+    return (f"Nowe: {total['nowe']}, usunięte: {total['usuniete']}, "
+            f"zmiana ceny: {total['zmiana_ceny']}, bez zmian: {total['bez_zmian']}")
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+sasiedzi.py — wyszukiwanie k najbardziej podobnych ofert (kNN) po cechach mieszkania
+- cechy: metry, liczba_pokoi, pietro, rok_budowy, rynek – skalowane odchyleniem
+  standardowym z całej bazy i ważone (wagi w FEATURES),
+- drzewo KD per (poziom, lokalizacja, zestaw cech obecnych w raporcie), budowane leniwie
+  i trzymane w pamięci; zapytanie ~ logarytmiczne względem liczby ofert lokalizacji,
+- zapytania wsadowe: wszystkie wiersze raportu z tej samej lokalizacji jednym wywołaniem,
+- braki cech w bazie uzupełniane medianą lokalizacji; cechy, których brak w wierszu raportu,
+  są pomijane (drzewo budowane na pozostałych).
+
+scipy jest opcjonalne: bez niego wyszukiwanie jest pełnym przeglądem (numpy, paczkami)
+ofert danej lokalizacji – wynik ten sam, tylko wolniej dla dużych miast.
+"""
+
+from __future__ import annotations
+
+import warnings
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import automat_matma as am
+import indeks_lokalizacji as il
+
+try:  # opcjonalna zależność
+    from scipy.spatial import cKDTree
+except ImportError:  # pragma: no cover
+    cKDTree = None
+
+DEFAULT_K = 10
+
+# (kolumna bazy, kolumna raportu, waga) – metraż raportu to 'Obszar'
+FEATURES: List[Tuple[str, str, float]] = [
+    ("metry",        "Obszar",       2.0),
+    ("liczba_pokoi", "Liczba pokoi", 1.0),
+    ("pietro",       "Piętro",       0.5),
+    ("rok_budowy",   "Rok budowy",   1.0),
+    ("rynek",        "Rynek",        1.0),
+]
+
+_BRUTE_CHUNK = 2048
+
+
+def _to_number(series: pd.Series, name: str) -> np.ndarray:
+    """Cecha jako float: 'parter' → 0, rynek pierwotny/wtórny → 1/0, reszta jak _coerce_numeric."""
+    s = series.astype("string").str.strip().str.casefold()
+    if name == "rynek":
+        out = np.full(len(s), np.nan)
+        out[s.str.startswith("pierwot").fillna(False).to_numpy(dtype=bool)] = 1.0
+        out[s.str.startswith("wt").fillna(False).to_numpy(dtype=bool)] = 0.0
+        return out
+    if name == "pietro":
+        s = s.mask(s.str.startswith("parter").fillna(False), "0")
+    return am._coerce_numeric(s.astype(object)).to_numpy(dtype="float64")
+
+
+def feature_matrix(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """Macierz cech (wiersze × FEATURES) z podanych kolumn; brak kolumny → NaN."""
+    out = np.full((len(df), len(FEATURES)), np.nan)
+    for j, (name, col) in enumerate(zip([f[0] for f in FEATURES], columns)):
+        if col in df.columns:
+            out[:, j] = _to_number(df[col], name)
+    return out
+
+
+class NeighbourSearch:
+    """kNN porównywalnych ofert dla jednej (przygotowanej) bazy – drzewa per lokalizacja."""
+
+    def __init__(self, df_db: pd.DataFrame, index: il.LocationIndex | None = None):
+        self.index = index if index is not None else il.get_index(df_db)
+        self.prices = am._coerce_numeric(df_db["cena_za_metr"]).to_numpy(dtype="float64")
+        X = feature_matrix(df_db, [f[0] for f in FEATURES])
+        scale = np.nanstd(X, axis=0)
+        scale[~np.isfinite(scale) | (scale == 0)] = 1.0
+        self.weights = np.array([f[2] for f in FEATURES]) / scale
+        self.X = X
+        self._trees: Dict[Tuple[str, int, Tuple[bool, ...]], Tuple[np.ndarray, object]] = {}
+
+    def _members(self, db_key: str, code: int) -> np.ndarray:
+        """Pozycje ofert lokalizacji z ceną (kolejność wierszy bazy)."""
+        arrays = self.index.levels[il.ALL] if code == -2 else self.index.levels.get(db_key)
+        if arrays is None:
+            return np.empty(0, dtype=np.int64)
+        s, e = arrays.segment(0 if code == -2 else code)
+        pos = np.sort(arrays.pos[s:e])
+        return pos[~np.isnan(self.prices[pos])]
+
+    def _tree(self, db_key: str, code: int, mask: Tuple[bool, ...]):
+        key = (db_key, code, mask)
+        hit = self._trees.get(key)
+        if hit is not None:
+            return hit
+        pos = self._members(db_key, code)
+        cols = np.flatnonzero(mask)
+        Z = self.X[np.ix_(pos, cols)] if pos.size else np.empty((0, cols.size))
+        # braki w bazie → mediana lokalizacji (albo 0, gdy cecha nieznana w całej lokalizacji)
+        if Z.size:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # cecha pusta w całej lokalizacji
+                med = np.nanmedian(Z, axis=0)
+            Z = np.where(np.isnan(Z), np.where(np.isnan(med), 0.0, med), Z)
+        Z = Z * self.weights[cols]
+        tree = cKDTree(Z) if (cKDTree is not None and pos.size) else Z
+        self._trees[key] = (pos, tree)
+        return self._trees[key]
+
+    def query(self, db_key: str, code: int, Q: np.ndarray, k: int) -> List[np.ndarray]:
+        """
+        Dla macierzy zapytań Q (wiersze × FEATURES, NaN = cecha nieznana) zwróć listę pozycji
+        k najbliższych ofert (code == -2 → cała baza). Wiersze grupowane wg zestawu cech.
+        """
+        out: List[np.ndarray] = [np.empty(0, dtype=np.int64)] * len(Q)
+        avail = ~np.isnan(Q)
+        for mask in {tuple(r) for r in avail}:
+            rows = np.flatnonzero((avail == np.array(mask)).all(axis=1))
+            if not any(mask):
+                continue
+            pos, tree = self._tree(db_key, code, mask)
+            if pos.size == 0:
+                continue
+            cols = np.flatnonzero(mask)
+            q = Q[np.ix_(rows, cols)] * self.weights[cols]
+            kk = min(k, pos.size)
+            if cKDTree is not None:
+                _, idx = tree.query(q, k=kk)
+                idx = np.asarray(idx).reshape(len(rows), kk)
+            else:
+                idx = _brute_knn(tree, q, kk)
+            for r, ii in zip(rows, idx):
+                out[r] = pos[ii]
+        return out
+
+
+def _brute_knn(Z: np.ndarray, q: np.ndarray, k: int) -> np.ndarray:
+    """Pełny przegląd (bez scipy): odległości paczkami + argpartition."""
+    out = np.empty((len(q), k), dtype=np.int64)
+    zz = (Z * Z).sum(axis=1)
+    for s in range(0, len(q), _BRUTE_CHUNK):
+        qq = q[s:s + _BRUTE_CHUNK]
+        d = zz[None, :] - 2.0 * qq @ Z.T + (qq * qq).sum(axis=1)[:, None]
+        part = np.argpartition(d, k - 1, axis=1)[:, :k] if k < Z.shape[0] else np.tile(np.arange(Z.shape[0]), (len(qq), 1))
+        order = np.take_along_axis(d, part, axis=1).argsort(axis=1, kind="stable")
+        out[s:s + len(qq)] = np.take_along_axis(part, order, axis=1)
+    return out
@@ -1,189 +1,278 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-from __future__ import annotations
-
-import sys
-from pathlib import Path
-from typing import List
-
-import pandas as pd
-
-# ===== Konfiguracja ścieżek =====
-def _desktop() -> Path:
-    # Uniwersalnie: Windows/Mac/Linux
-    return Path.home() / "Desktop"
-
-def _base_dir() -> Path:
-    # wspiera obie wersje nazwy folderu
-    d = _desktop()
-    for name in ("baza danych", "Baza danych"):
-        p = d / name
-        if p.exists():
-            return p
-    # domyślnie utwórz małymi
-    p = d / "baza danych"
-    p.mkdir(parents=True, exist_ok=True)
-    return p
-
-SRC_DIR = _base_dir() / "województwa"
-DST_FILE = _base_dir() / "Baza danych.xlsx"
-DST_SHEET = "Polska"
-
-# kanoniczny układ kolumn (jeśli dostępny w danych)
-CANON_COLS: List[str] = [
-    "cena",
-    "cena_za_metr",
-    "metry",
-    "liczba_pokoi",
-    "pietro",
-    "rynek",
-    "rok_budowy",
-    "material",
-    "wojewodztwo",
-    "powiat",
-    "gmina",
-    "miejscowosc",
-    "dzielnica",
-    "ulica",
-    "link",
-]
-
-# ===== UI powiadomienia (opcjonalnie) =====
-def _info(msg: str) -> None:
-    try:
-        import tkinter as tk
-        from tkinter import messagebox
-        r = tk.Tk(); r.withdraw()
-        messagebox.showinfo("Scalanie – OK", msg, parent=r)
-        r.destroy()
-    except Exception:
-        print(msg)
-
-def _error(msg: str) -> None:
-    try:
-        import tkinter as tk
-        from tkinter import messagebox
-        r = tk.Tk(); r.withdraw()
-        messagebox.showerror("Scalanie – błąd", msg, parent=r)
-        r.destroy()
-    except Exception:
-        print("BŁĄD:", msg, file=sys.stderr)
-
-# ===== Wczytywanie CSV =====
-
-def _read_csv_robust(path: Path) -> pd.DataFrame:
-    """
-    Wczytuje CSV, próbując najpierw autodetekcji separatora,
-    potem kilka popularnych zestawów (encoding × sep).
-    """
-    # 1) próba autodetekcji
-    try:
-        return pd.read_csv(path, sep=None, engine="python", encoding="utf-8-sig")
-    except Exception:
-        pass
-
-    # 2) kombinacje fallback
-    encodings = ("utf-8-sig", "utf-8", "cp1250")
-    seps = (";", "|", "\t", ",")
-    last_err: Exception | None = None
-    for enc in encodings:
-        for sep in seps:
-            try:
-                return pd.read_csv(path, sep=sep, encoding=enc)
-            except Exception as e:
-                last_err = e
-                continue
-    # Jeśli wszystkie próby się nie powiodły:
-    raise last_err if last_err else RuntimeError("Nieznany błąd odczytu CSV")
-
-def _read_all_csv_from_folder(folder: Path) -> list[pd.DataFrame]:
-    if not folder.exists():
-        raise FileNotFoundError(f"Nie znaleziono folderu: {folder}")
-
-    files = sorted(folder.glob("*.csv"))
-    if not files:
-        raise FileNotFoundError(f"Brak plików .csv w {folder}")
-
-    frames: list[pd.DataFrame] = []
-    for f in files:
-        try:
-            df = _read_csv_robust(f)
-
-            # pomiń całkiem puste
-            if df.empty or all(c is None for c in df.columns):
-                continue
-
-            # usuń wiersze kompletnie puste
-            df = df.dropna(how="all")
-            if df.empty:
-                continue
-
-            # jeżeli brak kolumny 'wojewodztwo', uzupełnij nazwą pliku
-            if "wojewodztwo" not in df.columns:
-                df["wojewodztwo"] = f.stem
-
-            frames.append(df)
-        except Exception as e:
-            _error(f"Nie udało się wczytać pliku: {f.name}\n{e}")
-    return frames
-
-# ===== Ujednolicanie kolumn i zapis =====
-def _unify_columns(frames: list[pd.DataFrame]) -> pd.DataFrame:
-    if not frames:
-        return pd.DataFrame()
-
-    # pełny zbiór kolumn
-    all_cols: list[str] = []
-    seen = set()
-    for df in frames:
-        for c in df.columns:
-            cc = str(c)
-            if cc not in seen:
-                all_cols.append(cc)
-                seen.add(cc)
-
-    # preferuj kanoniczny układ, a resztę dorzuć na końcu
-    ordered = [c for c in CANON_COLS if c in all_cols] + [c for c in all_cols if c not in CANON_COLS]
-
-    # uzupełnij brakujące kolumny pustymi wartościami i ułóż w jedną ramkę
-    normed = []
-    for df in frames:
-        for c in ordered:
-            if c not in df.columns:
-                df[c] = pd.NA
-        normed.append(df[ordered])
-
-    out = pd.concat(normed, ignore_index=True)
-
-    # deduplikacja po 'link' jeśli kolumna istnieje
-    if "link" in out.columns:
-        out = out.drop_duplicates(subset=["link"], keep="first")
-
-    # posprzątaj typowe whitespace w nagłówkach
-    out.columns = [str(c).replace("\xa0", " ").strip() for c in out.columns]
-    return out
-
-def main():
-    try:
-        frames = _read_all_csv_from_folder(SRC_DIR)
-        if not frames:
-            _error("Nie znaleziono danych w plikach źródłowych CSV.")
-            sys.exit(2)
-
-        df = _unify_columns(frames)
-        if df.empty:
-            _error("Po scaleniu nie ma żadnych danych do zapisania.")
-            sys.exit(3)
-
-        # zapis do Excela
-        DST_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with pd.ExcelWriter(DST_FILE, engine="openpyxl", mode="w") as wr:
-            df.to_excel(wr, sheet_name=DST_SHEET, index=False)
-
-        _info(f"Scalenie zakończone.\n\nPlik: {DST_FILE}\nArkusz: {DST_SHEET}\nWierszy: {len(df)}")
-    except Exception as e:
-        _error(str(e))
-        sys.exit(1)
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+import historia_cen
+import geolokalizacja
+import indeks_czasu
+import kostka
+import migawka
+import model_cen
+import profilowanie as prof
+import roznice
+
+# ===== Konfiguracja ścieżek =====
+def _desktop() -> Path:
+    # Uniwersalnie: Windows/Mac/Linux
+    return Path.home() / "Desktop"
+
+def _base_dir() -> Path:
+    # wspiera obie wersje nazwy folderu
+    d = _desktop()
+    for name in ("baza danych", "Baza danych"):
+        p = d / name
+        if p.exists():
+            return p
+    # domyślnie utwórz małymi
+    p = d / "baza danych"
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+SRC_DIR = _base_dir() / "województwa"
+HISTORY_DIR = _base_dir() / "historia_cen"
+# tu scrapery zapisują intake_<region>.csv (captured_date / captured_time per link)
+INTAKE_DIRS = [_base_dir(), _base_dir() / "linki"]
+DST_FILE = _base_dir() / "Baza danych.xlsx"
+DST_SHEET = "Polska"
+
+# kanoniczny układ kolumn (jeśli dostępny w danych)
+CANON_COLS: List[str] = [
+    "cena",
+    "cena_za_metr",
+    "metry",
+    "liczba_pokoi",
+    "pietro",
+    "rynek",
+    "rok_budowy",
+    "material",
+    "wojewodztwo",
+    "powiat",
+    "gmina",
+    "miejscowosc",
+    "dzielnica",
+    "ulica",
+    "lat",
+    "lon",
+    "link",
+    "data_pobrania",
+]
+
+# ===== UI powiadomienia (opcjonalnie) =====
+def _info(msg: str) -> None:
+    try:
+        import tkinter as tk
+        from tkinter import messagebox
+        r = tk.Tk(); r.withdraw()
+        messagebox.showinfo("Scalanie – OK", msg, parent=r)
+        r.destroy()
+    except Exception:
+        print(msg)
+
+def _error(msg: str) -> None:
+    try:
+        import tkinter as tk
+        from tkinter import messagebox
+        r = tk.Tk(); r.withdraw()
+        messagebox.showerror("Scalanie – błąd", msg, parent=r)
+        r.destroy()
+    except Exception:
+        print("BŁĄD:", msg, file=sys.stderr)
+
+# ===== Wczytywanie CSV =====
+
+def _read_csv_robust(path: Path) -> pd.DataFrame:
+    """
+    Wczytuje CSV, próbując najpierw autodetekcji separatora,
+    potem kilka popularnych zestawów (encoding × sep).
+    """
+    # 1) próba autodetekcji
+    try:
+        return pd.read_csv(path, sep=None, engine="python", encoding="utf-8-sig")
+    except Exception:
+        pass
+
+    # 2) kombinacje fallback
+    encodings = ("utf-8-sig", "utf-8", "cp1250")
+    seps = (";", "|", "\t", ",")
+    last_err: Exception | None = None
+    for enc in encodings:
+        for sep in seps:
+            try:
+                return pd.read_csv(path, sep=sep, encoding=enc)
+            except Exception as e:
+                last_err = e
+                continue
+    # Jeśli wszystkie próby się nie powiodły:
+    raise last_err if last_err else RuntimeError("Nieznany błąd odczytu CSV")
+
+def _read_all_csv_from_folder(folder: Path, intake_dirs: List[Path]) -> list[pd.DataFrame]:
+    if not folder.exists():
+        raise FileNotFoundError(f"Nie znaleziono folderu: {folder}")
+
+    files = sorted(folder.glob("*.csv"))
+    if not files:
+        raise FileNotFoundError(f"Brak plików .csv w {folder}")
+
+    frames: list[pd.DataFrame] = []
+    for f in files:
+        try:
+            df = _read_csv_robust(f)
+
+            # pomiń całkiem puste
+            if df.empty or all(c is None for c in df.columns):
+                continue
+
+            # usuń wiersze kompletnie puste
+            df = df.dropna(how="all")
+            if df.empty:
+                continue
+
+            # jeżeli brak kolumny 'wojewodztwo', uzupełnij nazwą pliku
+            if "wojewodztwo" not in df.columns:
+                df["wojewodztwo"] = f.stem
+
+            # czas pobrania oferty z intake_<region>.csv (brak – czas zapisu pliku) – indeks czasu w automat
+            if "link" in df.columns and indeks_czasu.COL_CAPTURED not in df.columns:
+                intake = historia_cen.find_intake(f.stem, intake_dirs)
+                df[indeks_czasu.COL_CAPTURED] = historia_cen.capture_times(df["link"], intake, historia_cen.file_time(f))
+
+            frames.append(df)
+        except Exception as e:
+            _error(f"Nie udało się wczytać pliku: {f.name}\n{e}")
+    return frames
+
+# ===== Ujednolicanie kolumn i zapis =====
+def _unify_columns(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    if not frames:
+        return pd.DataFrame()
+
+    # pełny zbiór kolumn
+    all_cols: list[str] = []
+    seen = set()
+    for df in frames:
+        for c in df.columns:
+            cc = str(c)
+            if cc not in seen:
+                all_cols.append(cc)
+                seen.add(cc)
+
+    # preferuj kanoniczny układ, a resztę dorzuć na końcu
+    ordered = [c for c in CANON_COLS if c in all_cols] + [c for c in all_cols if c not in CANON_COLS]
+
+    # uzupełnij brakujące kolumny pustymi wartościami i ułóż w jedną ramkę
+    normed = []
+    for df in frames:
+        for c in ordered:
+            if c not in df.columns:
+                df[c] = pd.NA
+        normed.append(df[ordered])
+
+    out = pd.concat(normed, ignore_index=True)
+
+    # deduplikacja po 'link' jeśli kolumna istnieje
+    if "link" in out.columns:
+        out = out.drop_duplicates(subset=["link"], keep="first")
+
+    # posprzątaj typowe whitespace w nagłówkach
+    out.columns = [str(c).replace("\xa0", " ").strip() for c in out.columns]
+    return out
+
+def main():
+    try:
+        with prof.stage("wczytanie CSV"):
+            frames = _read_all_csv_from_folder(SRC_DIR, INTAKE_DIRS)
+        if not frames:
+            _error("Nie znaleziono danych w plikach źródłowych CSV.")
+            sys.exit(2)
+
+        with prof.stage("ujednolicenie kolumn"):
+            df = _unify_columns(frames)
+        if df.empty:
+            _error("Po scaleniu nie ma żadnych danych do zapisania.")
+            sys.exit(3)
+
+        # historia cen: dopisz bieżące pobrania (region CSV + intake_<region>.csv)
+        n_hist = 0
+        try:
+            with prof.stage("historia cen"):
+                n_hist = historia_cen.ingest_folder(SRC_DIR, INTAKE_DIRS, HISTORY_DIR)
+        except Exception as e:
+            print(f"[WARN] Nie udało się zaktualizować historii cen: {e}", file=sys.stderr)
+
+        # poprzednia baza (do raportu zmian) – przed nadpisaniem pliku
+        with prof.stage("poprzednia baza"):
+            prev = roznice.load_previous(DST_FILE, DST_SHEET)
+
+        # zapis do Excela
+        DST_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with prof.stage("zapis xlsx"), pd.ExcelWriter(DST_FILE, engine="openpyxl", mode="w") as wr:
+            df.to_excel(wr, sheet_name=DST_SHEET, index=False)
+
+        # migawka Arrow dla automat / wyniki (opcjonalnie – wymaga pyarrow)
+        snap = None
+        try:
+            with prof.stage("migawka"):
+                snap = migawka.publish_snapshot(df, DST_FILE, DST_SHEET)
+        except Exception as e:
+            print(f"[WARN] Nie udało się zapisać migawki Arrow: {e}", file=sys.stderr)
+
+        # indeks lokalizacji + kostka statystyk (szybkie szacunki w automat / wyniki)
+        cube = None
+        try:
+            with prof.stage("kostka"):
+                cube = kostka.publish_cube(df, DST_FILE, DST_SHEET)
+        except Exception as e:
+            print(f"[WARN] Nie udało się zbudować kostki statystyk: {e}", file=sys.stderr)
+
+        # indeks geograficzny (tryb promienia w automat)
+        geo = None
+        try:
+            with prof.stage("indeks geograficzny"):
+                geo = geolokalizacja.publish_geo(df, DST_FILE, DST_SHEET)
+        except Exception as e:
+            print(f"[WARN] Nie udało się zbudować indeksu geograficznego: {e}", file=sys.stderr)
+
+        # regionalny model cen (tryb 'model' w automat)
+        model = None
+        try:
+            with prof.stage("model cen"):
+                model = model_cen.publish_model(df, DST_FILE, DST_SHEET)
+        except Exception as e:
+            print(f"[WARN] Nie udało się dopasować modelu cen: {e}", file=sys.stderr)
+
+        msg = f"Scalenie zakończone.\n\nPlik: {DST_FILE}\nArkusz: {DST_SHEET}\nWierszy: {len(df)}"
+        if snap is not None:
+            msg += f"\nMigawka: {snap.name}"
+        if cube is not None:
+            msg += f"\nKostka statystyk: {cube.name}"
+        if geo is not None:
+            msg += f"\nIndeks geograficzny: {geo.name}"
+        if model is not None:
+            msg += f"\nModel cen: {model.name}"
+        msg += f"\nHistoria cen: +{n_hist} pobrań"
+
+        # raport zmian względem poprzedniego scalenia
+        if prev is not None:
+            try:
+                with prof.stage("raport zmian"):
+                    tables = roznice.diff_offers(prev, df)
+                    diff_path = DST_FILE.with_name(roznice.DIFF_FILE_NAME)
+                    roznice.write_diff_report(tables, diff_path)
+                msg += f"\n\nZmiany ({diff_path.name}): {roznice.summary_text(tables)}"
+            except Exception as e:
+                print(f"[WARN] Nie udało się policzyć raportu zmian: {e}", file=sys.stderr)
+
+        _info(msg)
+    except Exception as e:
+        _error(str(e))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    with prof.session("scalanie", prof.pop_flag()):
+        main()
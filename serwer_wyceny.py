@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+serwer_wyceny.py — lokalny serwer wyceny: baza ogłoszeń i jej indeksy trzymane w pamięci
+- baza wczytywana raz (automat.load_db_excel: migawka Arrow albo xlsx) razem z indeksem
+  lokalizacji, silnikiem wyceny i cache wyników – kolejne uruchomienia automat / automat gui /
+  wyniki nie płacą za wczytanie i konwersję 'Baza danych.xlsx',
+- pliki bazy obserwowane (mtime/rozmiar xlsx i migawki co WATCH_INTERVAL s): po zmianie baza
+  przeładowywana w tle; zapytanie do zmienionej bazy przeładowuje ją od razu (nigdy stare dane),
+- HTTP tylko na 127.0.0.1, JSON (klient: klient_wyceny.py):
+    GET  /status    – wczytane bazy,
+    POST /baza      – wczytaj bazę (albo potwierdź, że jest w pamięci),
+    POST /wycena    – wycena ramki raportu (automat._value_frame, te same tryby i opcje),
+    POST /odciski   – odciski wierszy (automat._row_fingerprints),
+    POST /liczniki  – liczby ofert na poziomach adresu + szacunek z kostki (wyniki),
+    POST /okno      – liczba ofert i statystyki jednego okna (wyniki.window_price_stats),
+- zapytania do jednej bazy obsługiwane po kolei (silnik i cache nie są współbieżne),
+- obsługiwane tylko bazy podane przy starcie (--baza, można powtórzyć) albo leżące w katalogu
+  --katalog; inna ścieżka od klienta → 400 (klient liczy wtedy w procesie),
+- cache wyników zapisywany przy przeładowaniu bazy, przy zamknięciu i – gdy się zmienił –
+  co SAVE_INTERVAL s (nie po każdym zapytaniu).
+Wyniki są identyczne z wyceną w procesie – serwer wywołuje te same funkcje.
+
+Uruchomienie:
+    python serwer_wyceny.py [--baza "Baza danych.xlsx" ...] [--katalog FOLDER] [--arkusz Polska] [--port 8765]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+import automat
+import klient_wyceny as kw
+import migawka
+import pamiec_wycen as pc
+import silnik_wyceny as sw
+import wyniki
+
+WATCH_INTERVAL = 2.0
+SAVE_INTERVAL = 60.0
+
+Stamp = Tuple[Tuple[int, int], ...]
+
+
+def _stamp(db_xlsx: Path) -> Stamp:
+    """Wersja plików bazy: (mtime_ns, rozmiar) xlsx i migawki (0, 0 = brak pliku)."""
+    out = []
+    for p in (db_xlsx, migawka.snapshot_path(db_xlsx)):
+        try:
+            st = p.stat()
+            out.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append((0, 0))
+    return tuple(out)
+
+
+class HotDB:
+    """Jedna baza w pamięci: ramka, indeks, silnik wyceny i cache wyników."""
+
+    def __init__(self, db_xlsx: Path, sheet: str):
+        self.db_xlsx = db_xlsx
+        self.sheet = sheet
+        self.lock = threading.Lock()
+        self.stamp: Stamp = ()
+        self.df_db: Optional[pd.DataFrame] = None
+        self.engine: Optional[sw.ValuationEngine] = None
+        self.cache: Optional[pc.ValuationCache] = None
+        self.loaded_at = 0.0
+
+    def _load(self) -> None:
+        stamp = _stamp(self.db_xlsx)
+        t = time.perf_counter()
+        df_db = automat.load_db_excel(self.db_xlsx, self.sheet)
+        cache = pc.get_cache(df_db)
+        engine = sw.ValuationEngine(df_db, cache=cache)
+        if self.cache is not None:
+            self.cache.save()
+        self.df_db, self.cache, self.engine, self.stamp = df_db, cache, engine, stamp
+        self.loaded_at = time.time()
+        print(f"[SERWER] Wczytano {self.db_xlsx.name} / {self.sheet}: {len(df_db)} ofert "
+              f"w {time.perf_counter() - t:.1f} s", file=sys.stderr)
+
+    def ensure_fresh(self) -> None:
+        """Wczytaj bazę, jeśli jej nie ma albo pliki zmieniły się od wczytania (wołać pod lock)."""
+        if self.df_db is None or _stamp(self.db_xlsx) != self.stamp:
+            self._load()
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "plik": str(self.db_xlsx), "arkusz": self.sheet,
+            "wiersze": 0 if self.df_db is None else len(self.df_db),
+            "wczytano": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.loaded_at)) if self.loaded_at else None,
+        }
+
+
+class ValuationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        allowed: Iterable[Path] = (),
+        root: Optional[Path] = None,
+        watch_interval: float = WATCH_INTERVAL,
+        save_interval: float = SAVE_INTERVAL,
+    ):
+        super().__init__(address, _Handler)
+        self.allowed = {Path(p).expanduser().resolve() for p in allowed}
+        self.root = Path(root).expanduser().resolve() if root is not None else None
+        self.dbs: Dict[Tuple[str, str], HotDB] = {}
+        self._dbs_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watch_interval = watch_interval
+        self._save_interval = save_interval
+        self._watcher = threading.Thread(target=self._watch_loop, name="obserwator-bazy", daemon=True)
+        self._watcher.start()
+
+    def is_allowed(self, path: Path) -> bool:
+        """Baza podana przy starcie albo plik w katalogu --katalog (ścieżki po resolve)."""
+        return path in self.allowed or (self.root is not None and path.is_relative_to(self.root))
+
+    def db(self, path: str, sheet: str) -> HotDB:
+        resolved = Path(path).expanduser().resolve()
+        if not self.is_allowed(resolved):
+            raise ValueError(f"Serwer nie obsługuje bazy {resolved} (dozwolone: --baza / --katalog przy starcie).")
+        key = (str(resolved), sheet or automat.DEFAULT_DB_SHEET)
+        with self._dbs_lock:
+            hot = self.dbs.get(key)
+            if hot is None:
+                hot = self.dbs[key] = HotDB(Path(key[0]), key[1])
+        return hot
+
+    def _watch_loop(self) -> None:
+        last_save = time.monotonic()
+        while not self._stop.wait(self._watch_interval):
+            for hot in list(self.dbs.values()):
+                if hot.df_db is None or _stamp(hot.db_xlsx) == hot.stamp:
+                    continue
+                try:
+                    with hot.lock:
+                        hot.ensure_fresh()
+                except Exception as e:
+                    print(f"[WARN] Nie udało się przeładować {hot.db_xlsx}: {e}", file=sys.stderr)
+            if time.monotonic() - last_save >= self._save_interval:
+                last_save = time.monotonic()
+                for hot in list(self.dbs.values()):
+                    with hot.lock:
+                        if hot.cache is not None:
+                            hot.cache.save()  # bez zmian od ostatniego zapisu – nic nie robi
+
+    def server_close(self) -> None:
+        self._stop.set()
+        for hot in self.dbs.values():
+            if hot.cache is not None:
+                hot.cache.save()
+        super().server_close()
+
+
+def _frame(payload: dict) -> pd.DataFrame:
+    return pd.DataFrame(payload.get("ramka") or {})
+
+
+def _options(payload: dict) -> Dict[str, object]:
+    opts = dict(payload.get("opcje") or {})
+    automat._check_options(payload["poziom"], opts.get("mode", automat.MODE_WINDOW), bool(opts.get("fallback")),
+                           bool(opts.get("ci")), bool(opts.get("adaptive")), bool(opts.get("approx")),
+                           opts.get("as_of") is not None)
+    return opts
+
+
+def _do_valuation(hot: HotDB, payload: dict) -> dict:
+    results = automat._value_frame(_frame(payload), hot.engine, payload["poziom"], float(payload["tol"]),
+                                   workers=int(payload.get("workers", 1)), **_options(payload))
+    return {"wyniki": [list(r) for r in results], "cache": hot.cache.stats_text()}
+
+
+def _do_fingerprints(hot: HotDB, payload: dict) -> dict:
+    fps = automat._row_fingerprints(_frame(payload), hot.engine, payload["poziom"], float(payload["tol"]),
+                                    **_options(payload))
+    return {"odciski": fps}
+
+
+def _do_counts(hot: HotDB, payload: dict) -> dict:
+    values = payload.get("wartosci") or {}
+    counts = wyniki.count_offers_hierarchical(hot.df_db, payload.get("obszar", ""), payload.get("tol", ""), values)
+    mapping = {h: (db_key, rp_key) for (h, db_key, rp_key) in wyniki.ADDRESS_LEVELS}
+    estimate = None
+    if payload.get("poziom") in mapping:
+        db_key, rp_key = mapping[payload["poziom"]]
+        estimate = list(wyniki.estimate_from_cube(hot.df_db, db_key, values.get(rp_key, ""),
+                                                  payload.get("obszar", ""), payload.get("tol", "")))
+    return {"liczniki": counts, "szacunek": estimate}
+
+
+def _do_window(hot: HotDB, payload: dict) -> dict:
+    n, stats, center, lo, hi = wyniki.window_price_stats(hot.df_db, payload["klucz"], payload.get("wartosc", ""),
+                                                         payload.get("obszar", ""), payload.get("tol", ""))
+    return {"n": n, "statystyki": list(stats), "srodek": center, "lo": lo, "hi": hi}
+
+
+_ROUTES = {
+    "/baza": lambda hot, payload: {"wiersze": len(hot.df_db)},
+    "/wycena": _do_valuation,
+    "/odciski": _do_fingerprints,
+    "/liczniki": _do_counts,
+    "/okno": _do_window,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: ValuationServer
+
+    def _reply(self, code: int, body: dict) -> None:
+        data = kw.dumps(body)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path != "/status":
+            self._reply(404, {"blad": f"Nieznany adres: {self.path}"})
+            return
+        self._reply(200, {"pid": os.getpid(), "bazy": [hot.status() for hot in self.server.dbs.values()]})
+
+    def do_POST(self) -> None:
+        route = _ROUTES.get(self.path)
+        if route is None:
+            self._reply(404, {"blad": f"Nieznany adres: {self.path}"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8"))
+            hot = self.server.db(payload["baza"], payload.get("arkusz", ""))
+            with hot.lock:
+                hot.ensure_fresh()
+                body = route(hot, payload)
+        except (ValueError, KeyError, FileNotFoundError) as e:
+            self._reply(400, {"blad": str(e)})
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self._reply(500, {"blad": f"{type(e).__name__}: {e}"})
+            return
+        self._reply(200, body)
+
+    def log_message(self, fmt: str, *args) -> None:  # bez logu każdego zapytania
+        pass
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Lokalny serwer wyceny (baza w pamięci).")
+    ap.add_argument("--baza", type=Path, action="append",
+                    help="Baza obsługiwana przez serwer i wczytywana od razu (można powtórzyć; "
+                         "domyślnie 'Baza danych.xlsx' z Pulpitu)")
+    ap.add_argument("--katalog", type=Path, help="Obsługuj też dowolną bazę z tego katalogu (i podkatalogów)")
+    ap.add_argument("--arkusz", default=automat.DEFAULT_DB_SHEET)
+    ap.add_argument("--port", type=int, default=kw.DEFAULT_PORT)
+    args = ap.parse_args()
+    bazy = args.baza or [automat.DEFAULT_DB_XLSX]
+
+    server = ValuationServer((kw.DEFAULT_HOST, args.port), allowed=bazy, root=args.katalog)
+    for baza in bazy:
+        if baza.exists():
+            hot = server.db(str(baza), args.arkusz)
+            with hot.lock:
+                hot.ensure_fresh()
+        else:
+            print(f"[WARN] Brak bazy {baza} – zostanie wczytana przy pierwszym zapytaniu.", file=sys.stderr)
+    # kill / zamknięcie sesji: zakończ jak po Ctrl+C (zapis cache wyników)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"[SERWER] Nasłuch: http://{kw.DEFAULT_HOST}:{args.port} (Ctrl+C kończy)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1159 @@
+# -*- coding: utf-8 -*-
+"""
+silnik_wyceny.py — wsadowy (wektorowy) silnik wyceny dla automat.process_report
+- baza przygotowywana raz: indeks lokalizacji (indeks_lokalizacji) – oferty posortowane
+  wg (kod lokalizacji, metry) per poziom adresu, trwały między uruchomieniami,
+- okno ±tol m² wyznaczane wyszukiwaniem binarnym (np.searchsorted) zamiast maski na całej bazie,
+- wiersze raportu grupowane wg (wartość poziomu, okno metrażu) – każde unikalne zapytanie liczone raz,
+- średnia i średnia po IQR ze wspólnego jądra (statystyki) – wszystkie okna paczki naraz;
+  wynik identyczny z automat.compute_row,
+- opcjonalny cache wyników (pamiec_wycen) pomija zapytania już policzone – także w poprzednich uruchomieniach,
+- skróty wycinków bazy (slice_fingerprints) – do przyrostowego przeliczania raportu w automat,
+- niepewność (uncertainty_rows): liczba porównywalnych, odchylenie i przedział ufności średniej
+  po IQR – bootstrap wszystkich okien raportu naraz (bootstrap_adjusted_means),
+- okno adaptacyjne (value_rows_adaptive): okno ±ADAPT_START·metraż poszerzane geometrycznie
+  (×ADAPT_GROWTH, do ±ADAPT_CAP·metraż), aż obejmie ADAPT_TARGET ofert – liczności wszystkich
+  kroków jednym wyszukiwaniem binarnym na posortowanych metrażach lokalizacji,
+- wycena „na dzień” / z ostatnich N dni / z wagą wieku oferty (value_rows_recent): okres
+  z indeksu czasu pobrania (indeks_czasu) i okno metrażu – oba wyszukiwaniem binarnym w segmencie
+  lokalizacji; krótszy wycinek zawężany maską po drugiej współrzędnej,
+- tryb z poszerzaniem poziomu (value_rows_fallback): liczności okien na wszystkich poziomach
+  z indeksu w jednym przebiegu, statystyki tylko dla pierwszego poziomu z >= MIN_OFFERS ofert,
+- tryb przybliżony (value_rows_approx): statystyki z kostki (kostka) – scalenie kilku komórek
+  zamiast okna na ofertach; małe okna (< APPROX_MIN_COUNT ofert) liczone dokładnie,
+- tryb kNN (value_rows_knn): k najbardziej podobnych ofert lokalizacji wg cech mieszkania (sasiedzi),
+- tryb promienia (value_rows_radius): oferty w promieniu R km od (geokodowanego) wiersza raportu
+  i w oknie ±tol m² – siatka kwadratów z geolokalizacja, zamiast porównania nazw lokalizacji,
+- wycena modelem (value_report_model): regionalny model hedoniczny (model_cen) obok średniej
+  z porównywalnych – do kontroli krzyżowej, koszt pomijalny,
+- tryb wieloprocesowy (workers > 1): tablice liczbowe i indeks w pamięci współdzielonej,
+  paczki zapytań rozdzielane na pulę procesów, wyniki składane w kolejności wierszy.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import automat_matma as am
+import geolokalizacja as geo
+import indeks_czasu as ic
+import indeks_lokalizacji as il
+import kostka
+import model_cen
+import pamiec_wycen as pc
+import sasiedzi
+import statystyki as st
+
+MIN_OFFERS = 5
+MSG_NO_SIMILAR = "brak podobnych ogłoszeń"
+LEVEL_WHOLE_DB = "cała baza"
+# poniżej tej liczby ofert w oknie kostki wynik liczony jest dokładnie (blisko progu MIN_OFFERS)
+APPROX_MIN_COUNT = 4 * MIN_OFFERS
+
+# kod „bez filtra lokalizacji” (pusta wartość poziomu); -1 = wartości nie ma w bazie
+NO_FILTER = -2
+DEFAULT_CHUNK = 2000
+
+# przedziały ufności: bootstrap dla okien do BOOT_MAX_N cen, powyżej – przybliżenie normalne
+BOOT_SAMPLES = 200
+BOOT_LEVEL = 0.95
+BOOT_MAX_N = 200
+_BOOT_MAX_DRAWS = 1 << 21
+
+# okno adaptacyjne: połowa szerokości jako ułamek metrażu – start, mnożnik kroku, górna granica
+ADAPT_START = 0.05
+ADAPT_GROWTH = 1.5
+ADAPT_CAP = 0.5
+ADAPT_TARGET = 4 * MIN_OFFERS
+
+ProgressFn = Callable[[int, int], None]
+
+
+def parse_area(value) -> float:
+    """Ta sama konwersja 'Obszar' co w automat._filter_db (NaN gdy się nie da)."""
+    try:
+        return float(str(value).replace(",", ".").replace(" ", ""))
+    except Exception:
+        return float("nan")
+
+
+def window_stats(prices: np.ndarray) -> Tuple[float | None, float | None]:
+    """
+    (średnia surowa, średnia po IQR) dla cen z okna – w kolejności wierszy bazy.
+    Odpowiada am.mean_numeric + am.remove_outliers_iqr (jądro statystyki.price_stats).
+    """
+    stats = st.price_stats(prices)
+    return stats.mean_raw, stats.mean_adj
+
+
+def _format_stats(mean_raw: float, mean_adj: float, center: float) -> Tuple[str, str, str]:
+    """Sformatuj wynik okna (NaN = brak średniej, jak None w window_stats)."""
+    raw = None if np.isnan(mean_raw) else float(mean_raw)
+    adj = None if np.isnan(mean_adj) else float(mean_adj)
+    prop_value = (adj * center) if (adj is not None and not np.isnan(center)) else None
+    return (
+        am.format_price_per_m2(raw),
+        am.format_price_per_m2(adj),
+        am.format_currency(prop_value),
+    )
+
+
+def adaptive_steps(start: float = ADAPT_START, growth: float = ADAPT_GROWTH, cap: float = ADAPT_CAP) -> np.ndarray:
+    """Kolejne połowy okna (ułamek metrażu): start, start·growth, ... – ostatni krok równy cap."""
+    if not (0 < start <= cap) or growth <= 1:
+        raise ValueError("Okno adaptacyjne: wymagane 0 < start <= cap oraz growth > 1.")
+    steps = [float(start)]
+    while steps[-1] < cap:
+        steps.append(min(steps[-1] * growth, float(cap)))
+    return np.asarray(steps)
+
+
+def format_tol(half_width: float) -> str:
+    """Użyta tolerancja okna jako '±4,5 m²' ('—' gdy okno bez filtra metrażu)."""
+    if np.isnan(half_width):
+        return "—"
+    return f"±{half_width:.1f} m²".replace(".", ",")
+
+
+def _chunk_windows(
+    prices: np.ndarray,
+    all_arrays: il.LevelArrays,
+    level_arrays: Optional[il.LevelArrays],
+    codes: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+) -> Tuple[List[int], List[np.ndarray]]:
+    """
+    Okna paczki zapytań: grupowanie wg kodu, granice wektorowo (searchsorted). Zwraca numery
+    zapytań z >= MIN_OFFERS ofert w oknie i ceny ich okien (w kolejności wierszy bazy).
+    """
+    rows: List[int] = []
+    windows: List[np.ndarray] = []
+    for code in np.unique(codes):
+        sel = np.flatnonzero(codes == code)
+        if code == NO_FILTER or level_arrays is None:
+            arrays, c = all_arrays, 0
+        else:
+            arrays, c = level_arrays, int(code)
+        a, b = arrays.bounds(c, lo[sel], hi[sel])
+        for k in np.flatnonzero(b - a >= MIN_OFFERS):
+            rows.append(int(sel[k]))
+            # przywróć kolejność wierszy bazy, żeby sumy (a więc i średnie) były bit w bit jak w pandas
+            windows.append(prices[np.sort(arrays.pos[a[k]:b[k]])])
+    return rows, windows
+
+
+def _value_chunk(
+    prices: np.ndarray,
+    all_arrays: il.LevelArrays,
+    level_arrays: Optional[il.LevelArrays],
+    codes: np.ndarray,
+    centers: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+) -> List[Tuple[str, str, str]]:
+    """Wyceń paczkę zapytań: okna (_chunk_windows), statystyki wszystkich okien jednym batch_price_stats."""
+    out: List[Tuple[str, str, str]] = [(MSG_NO_SIMILAR, MSG_NO_SIMILAR, MSG_NO_SIMILAR)] * len(codes)
+    rows, windows = _chunk_windows(prices, all_arrays, level_arrays, codes, lo, hi)
+    if not rows:
+        return out
+    stats = st.batch_price_stats(np.concatenate(windows), np.array([w.size for w in windows]))
+    for j, i in enumerate(rows):
+        out[i] = _format_stats(stats.mean_raw[j], stats.mean_adj[j], float(centers[i]))
+    return out
+
+
+def _recent_windows(
+    time_index: ic.TimeIndex,
+    all_arrays: il.LevelArrays,
+    level_arrays: Optional[il.LevelArrays],
+    level_key: Optional[str],
+    codes: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+    t_lo: float,
+    t_hi: float,
+) -> Tuple[List[int], List[np.ndarray]]:
+    """
+    Okna paczki zapytań z filtrem czasu pobrania [t_lo, t_hi]: dla każdego zapytania krótszy
+    z dwóch wycinków lokalizacji – okno metrażu (indeks lokalizacji) albo okres (indeks czasu),
+    oba z wyszukiwania binarnego – zawężony maską po drugiej współrzędnej. Zwraca numery zapytań
+    z >= MIN_OFFERS ofert i pozycje ofert ich okien (rosnąco, jak maska).
+    """
+    rows: List[int] = []
+    windows: List[np.ndarray] = []
+    days, metry = time_index.days, time_index.metry
+    for code in np.unique(codes):
+        sel = np.flatnonzero(codes == code)
+        if code == NO_FILTER or level_arrays is None:
+            arrays, times, c = all_arrays, time_index.levels[il.ALL], 0
+        else:
+            arrays, times, c = level_arrays, time_index.levels[level_key], int(code)
+        a, b = arrays.bounds(c, lo[sel], hi[sel])
+        ta, tb = (int(x) for x in times.bounds(c, t_lo, t_hi))
+        recent = times.pos[ta:tb]
+        recent_m = metry[recent]
+        for k, i in enumerate(sel):
+            if b[k] - a[k] <= tb - ta:
+                pos = arrays.pos[a[k]:b[k]]
+                pos = pos[(days[pos] >= t_lo) & (days[pos] <= t_hi)]
+            else:
+                pos = recent[(recent_m >= lo[i]) & (recent_m <= hi[i])]
+            if pos.size >= MIN_OFFERS:
+                rows.append(int(i))
+                windows.append(np.sort(pos))
+    return rows, windows
+
+
+# ===== Niepewność: bootstrap średniej po IQR =====
+
+def _boot_rng(samples: Sequence[np.ndarray]) -> np.random.Generator:
+    """Jeden generator na wywołanie, zasiany treścią wszystkich próbek – ten sam raport, te same losowania."""
+    h = hashlib.sha1()
+    for p in samples:
+        h.update(np.int64(p.size).tobytes())
+        h.update(p.tobytes())
+    return np.random.default_rng(int.from_bytes(h.digest()[:8], "little"))
+
+
+def _sorted_quantile(X: np.ndarray, q: float, n: np.ndarray) -> np.ndarray:
+    """
+    Kwantyl liniowy (jak np.quantile) wzdłuż ostatniej, już posortowanej osi tensora
+    (okna, powtórzenia, n_max); `n` – długość każdego okna (ważne są początkowe pozycje).
+    """
+    pos = q * (n - 1)
+    i0 = np.floor(pos).astype(np.int64)
+    i1 = np.minimum(i0 + 1, n - 1)
+
+    def at(i: np.ndarray) -> np.ndarray:
+        return np.take_along_axis(X, np.broadcast_to(i[:, None, None], X.shape[:2] + (1,)), axis=2)[..., 0]
+
+    x0 = at(i0)
+    return x0 + (pos - i0)[:, None] * (at(i1) - x0)
+
+
+def bootstrap_adjusted_means(samples: Sequence[np.ndarray], n_boot: int = BOOT_SAMPLES) -> np.ndarray:
+    """
+    Macierz (próbki × n_boot) średnich po IQR z prób bootstrapowych (próbki min. 4 ceny).
+    Jeden generator i jedno losowanie (okna, powtórzenia, n_max) na paczkę okien – krótsze okna
+    maskowane swoją długością (dopełnienie +inf ląduje po sortowaniu na końcu), kwartyle liniowe
+    z pozycji zależnych od długości okna (jak np.quantile), obcięcie maską – bez pętli po oknach.
+    Okna posortowane wg liczności i dzielone na paczki do _BOOT_MAX_DRAWS losowań (pamięć).
+    """
+    out = np.full((len(samples), n_boot), np.nan)
+    if not len(samples):
+        return out
+    sizes = np.array([p.size for p in samples], dtype=np.int64)
+    order = np.argsort(sizes, kind="stable")
+    rng = _boot_rng(samples)
+    s = 0
+    while s < order.size:
+        # paczka: kolejne okna (rosnąco wg liczności), dopóki losowań <= _BOOT_MAX_DRAWS (min. jedno okno)
+        e = s + 1
+        while e < order.size and (e + 1 - s) * n_boot * int(sizes[order[e]]) <= _BOOT_MAX_DRAWS:
+            e += 1
+        sel = order[s:e]
+        n = sizes[sel]
+        n_max = int(n.max())
+        P = np.zeros((sel.size, n_max))
+        for k, j in enumerate(sel):
+            P[k, :n[k]] = samples[j]
+        U = rng.random((sel.size, n_boot, n_max))
+        X = np.take_along_axis(P[:, None, :], (U * n[:, None, None]).astype(np.int64), axis=2)
+        np.copyto(X, np.inf, where=np.arange(n_max) >= n[:, None, None])
+        X.sort(axis=2)
+        q1, q3 = (_sorted_quantile(X, q, n) for q in (0.25, 0.75))
+        low, high = st.iqr_bounds(q1, q3)
+        keep = (X >= low[..., None]) & (X <= high[..., None])
+        out[sel] = np.where(keep, X, 0.0).sum(axis=2) / keep.sum(axis=2)
+        s = e
+    return out
+
+
+def _normal_ci(prices: np.ndarray, level: float) -> Tuple[float, float]:
+    """Przybliżenie normalne dla dużych okien: średnia po IQR ± z·s/√n (na cenach po obcięciu)."""
+    kept = prices[st.iqr_mask(prices)]
+    z = NormalDist().inv_cdf(0.5 + level / 2.0)
+    half = z * kept.std(ddof=1) / np.sqrt(kept.size) if kept.size > 1 else 0.0
+    return float(kept.mean() - half), float(kept.mean() + half)
+
+
+# ===== Pamięć współdzielona dla puli procesów =====
+
+class _SharedArrays:
+    """Kopiuje tablice do bloków shared_memory; procesy potomne dołączają je bez kopiowania."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.spec: Dict[str, Tuple[str, tuple, str]] = {}
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            self.blocks.append(shm)
+            self.spec[name] = (shm.name, arr.shape, arr.dtype.str)
+
+    def close(self) -> None:
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks.clear()
+
+
+_W: Dict[str, object] = {}
+
+
+def _attach(spec: Dict[str, Tuple[str, tuple, str]]) -> Dict[str, np.ndarray]:
+    out = {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _W.setdefault("_blocks", []).append(shm)  # type: ignore[union-attr]
+        out[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    return out
+
+
+def _worker_init(spec: Dict[str, Tuple[str, tuple, str]]) -> None:
+    arr = _attach(spec)
+    _W["prices"] = arr["prices"]
+    _W["all"] = il.LevelArrays(arr["all_pos"], arr["all_metry"], arr["all_starts"], arr["all_ends"])
+    _W["level"] = (
+        il.LevelArrays(arr["lvl_pos"], arr["lvl_metry"], arr["lvl_starts"], arr["lvl_ends"])
+        if "lvl_pos" in arr else None
+    )
+
+
+def _worker_run(job: Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]):
+    idx, codes, centers, lo, hi = job
+    res = _value_chunk(_W["prices"], _W["all"], _W["level"], codes, centers, lo, hi)  # type: ignore[arg-type]
+    return idx, res
+
+
+class ValuationEngine:
+    """Silnik wyceny dla jednej (przygotowanej) bazy ogłoszeń i jej indeksu lokalizacji."""
+
+    def __init__(
+        self,
+        df_db: pd.DataFrame,
+        index: il.LocationIndex | None = None,
+        cache: pc.ValuationCache | None = None,
+    ):
+        self.df_db = df_db
+        self.prices = am._coerce_numeric(df_db["cena_za_metr"]).to_numpy(dtype="float64")
+        self.index = index if index is not None else il.get_index(df_db)
+        self.cache = cache
+        self._knn: sasiedzi.NeighbourSearch | None = None
+        self._time: ic.TimeIndex | None = None
+
+    def _codes_for(self, db_key: str, values: Sequence[str]) -> Dict[str, int]:
+        uniq = list(dict.fromkeys(values))
+        return {v: self.index.code(db_key, v) for v in uniq}
+
+    def slice_fingerprints(self, db_key: str, level_values: Sequence[str]) -> List[str]:
+        """
+        Skrót wycinka bazy używanego w trybie okna: metraże i ceny wszystkich ofert lokalizacji
+        wiersza (pusta wartość → skrót całej bazy, wartość spoza bazy → 'brak').
+        """
+        stripped = [str(v).strip() for v in level_values]
+        code_map = self._codes_for(db_key, [v for v in stripped if v])
+        arrays = self.index.levels.get(db_key)
+        by_code: Dict[int, str] = {NO_FILTER: self.index.fingerprint, -1: "brak"}
+        out: List[str] = []
+        for v in stripped:
+            code = code_map[v] if v else NO_FILTER
+            fp = by_code.get(code)
+            if fp is None:
+                s, e = arrays.segment(code)
+                h = hashlib.sha1(arrays.metry[s:e].tobytes())
+                h.update(self.prices[arrays.pos[s:e]].tobytes())
+                fp = by_code[code] = h.hexdigest()
+            out.append(fp)
+        return out
+
+    def windows(
+        self,
+        db_key: str,
+        level_values: Sequence[str],
+        areas: Sequence[str],
+        tol: float,
+    ) -> Tuple[List[int], List[np.ndarray]]:
+        """
+        Sam etap filtrowania trybu okna (bez cache i statystyk): numery wierszy z >= MIN_OFFERS
+        ofert i ceny ich okien – do pomiaru etapów (benchmark_wyceny).
+        """
+        centers = np.array([parse_area(a) for a in areas], dtype="float64")
+        lo = np.where(np.isnan(centers), -np.inf, centers - tol)
+        hi = np.where(np.isnan(centers), np.inf, centers + tol)
+        stripped = [str(v).strip() for v in level_values]
+        code_map = self._codes_for(db_key, [v for v in stripped if v])
+        codes = np.asarray([code_map[v] if v else NO_FILTER for v in stripped], dtype=np.int64)
+        return _chunk_windows(self.prices, self.index.levels[il.ALL], self.index.levels.get(db_key), codes, lo, hi)
+
+    def value_rows(
+        self,
+        db_key: str,
+        level_values: Sequence[str],
+        areas: Sequence[str],
+        tol: float,
+        workers: int = 1,
+        progress: Optional[ProgressFn] = None,
+        chunk_size: int = DEFAULT_CHUNK,
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Wyceń wiele wierszy naraz; zwraca listę (surowa_m2, skorygowana_m2, wartość) jak compute_row.
+        `workers` > 1 – pula procesów na pamięci współdzielonej; `progress(zrobione, wszystkie)`
+        wołany po każdej paczce (w procesie wywołującym).
+        """
+        n = len(level_values)
+        results: List[Tuple[str, str, str] | None] = [None] * n
+
+        centers = np.array([parse_area(a) for a in areas], dtype="float64")
+        lo = np.where(np.isnan(centers), -np.inf, centers - tol)
+        hi = np.where(np.isnan(centers), np.inf, centers + tol)
+
+        stripped = [str(v).strip() for v in level_values]
+
+        # unikalne zapytania (poziom, wartość, metraż, tolerancja) → wiersze raportu
+        by_key: Dict[pc.Key, List[int]] = {}
+        for i, v in enumerate(stripped):
+            by_key.setdefault(pc.make_key(db_key, v, centers[i], tol), []).append(i)
+
+        todo: List[Tuple[pc.Key, int]] = []
+        for key, rows in by_key.items():
+            hit = self.cache.get(key) if self.cache is not None else None
+            if hit is not None:
+                for i in rows:
+                    results[i] = hit
+            else:
+                todo.append((key, rows[0]))
+            if self.cache is not None and len(rows) > 1:
+                self.cache.hits += len(rows) - 1  # powtórzenia w tym samym raporcie
+
+        code_map = self._codes_for(db_key, [stripped[i] for _, i in todo if stripped[i]])
+        rep = np.asarray([i for _, i in todo], dtype=np.int64)
+        codes = np.asarray([code_map[stripped[i]] if stripped[i] else NO_FILTER for _, i in todo], dtype=np.int64)
+
+        computed = self._compute(db_key, codes, centers[rep], lo[rep], hi[rep], workers, progress, chunk_size, n - len(todo), n)
+
+        for (key, _), res in zip(todo, computed):
+            if self.cache is not None:
+                self.cache.put(key, res)
+            for j in by_key[key]:
+                results[j] = res
+        return results  # type: ignore[return-value]
+
+    def value_rows_adaptive(
+        self,
+        db_key: str,
+        level_values: Sequence[str],
+        areas: Sequence[str],
+        target: int = ADAPT_TARGET,
+        start: float = ADAPT_START,
+        growth: float = ADAPT_GROWTH,
+        cap: float = ADAPT_CAP,
+        workers: int = 1,
+        progress: Optional[ProgressFn] = None,
+        chunk_size: int = DEFAULT_CHUNK,
+    ) -> List[Tuple[str, str, str, str]]:
+        """
+        Wycena z oknem adaptacyjnym; zwraca (surowa_m2, skorygowana_m2, wartość, użyta_tolerancja).
+        Dla każdego wiersza pierwszy krok adaptive_steps z >= `target` ofertami w oknie (albo
+        ostatni krok – cap); statystyki wybranego okna liczone jak w value_rows (_compute).
+        Wiersze bez metrażu: okno na całej lokalizacji, tolerancja '—'.
+        """
+        fracs = adaptive_steps(start, growth, cap)
+        n = len(level_values)
+        results: List[Tuple[str, str, str, str] | None] = [None] * n
+        centers = np.array([parse_area(a) for a in areas], dtype="float64")
+        stripped = [str(v).strip() for v in level_values]
+
+        # klucz cache: parametry adaptacji w miejscu tolerancji (inna przestrzeń niż value_rows)
+        params = f"adapt:{int(target)}:{start!r}:{growth!r}:{cap!r}"
+        by_key: Dict[pc.Key, List[int]] = {}
+        for i, v in enumerate(stripped):
+            key = pc.make_key(db_key, v, centers[i], 0.0)
+            by_key.setdefault(("adapt:" + key[0],) + key[1:3] + (params,), []).append(i)
+
+        todo: List[Tuple[pc.Key, int]] = []
+        for key, rows in by_key.items():
+            hit = self.cache.get(key) if self.cache is not None else None
+            if hit is not None:
+                for i in rows:
+                    results[i] = hit  # type: ignore[assignment]
+            else:
+                todo.append((key, rows[0]))
+            if self.cache is not None and len(rows) > 1:
+                self.cache.hits += len(rows) - 1
+
+        code_map = self._codes_for(db_key, [stripped[i] for _, i in todo if stripped[i]])
+        rep = np.asarray([i for _, i in todo], dtype=np.int64)
+        codes = np.asarray([code_map[stripped[i]] if stripped[i] else NO_FILTER for _, i in todo], dtype=np.int64)
+        q_centers = centers[rep]
+
+        # 1) liczności okien dla wszystkich kroków naraz: granice (zapytania × kroki) jednym searchsorted
+        half = q_centers[:, None] * fracs[None, :]
+        no_area = np.isnan(q_centers)
+        lo2 = np.where(no_area[:, None], -np.inf, q_centers[:, None] - half)
+        hi2 = np.where(no_area[:, None], np.inf, q_centers[:, None] + half)
+        chosen = np.full(len(todo), len(fracs) - 1, dtype=np.int64)
+        all_arrays = self.index.levels[il.ALL]
+        level_arrays = self.index.levels.get(db_key)
+        for code in np.unique(codes):
+            if code == -1:
+                continue  # wartości nie ma w bazie – brak ofert przy każdym kroku
+            sel = np.flatnonzero(codes == code)
+            if code == NO_FILTER or level_arrays is None:
+                arrays, c = all_arrays, 0
+            else:
+                arrays, c = level_arrays, int(code)
+            a, b = arrays.bounds(c, lo2[sel], hi2[sel])
+            enough = (b - a) >= target
+            chosen[sel] = np.where(enough.any(axis=1), enough.argmax(axis=1), len(fracs) - 1)
+
+        # 2) statystyki wybranych okien – ta sama ścieżka co value_rows (paczki, pula procesów)
+        rows_idx = np.arange(len(todo))
+        lo, hi = lo2[rows_idx, chosen], hi2[rows_idx, chosen]
+        used = np.where(no_area, np.nan, half[rows_idx, chosen])
+        computed = self._compute(db_key, codes, q_centers, lo, hi, workers, progress, chunk_size, n - len(todo), n)
+
+        for j, ((key, _), res) in enumerate(zip(todo, computed)):
+            res = res + (format_tol(used[j]) if res[0] != MSG_NO_SIMILAR else "",)
+            if self.cache is not None:
+                self.cache.put(key, res)
+            for i in by_key[key]:
+                results[i] = res
+        return results  # type: ignore[return-value]
+
+    def value_rows_recent(
+        self,
+        db_key: str,
+        level_values: Sequence[str],
+        areas: Sequence[str],
+        tol: float,
+        as_of: str,
+        max_age_days: Optional[float] = None,
+        half_life_days: Optional[float] = None,
+        progress: Optional[ProgressFn] = None,
+        chunk_size: int = DEFAULT_CHUNK,
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Wycena z ofert pobranych najpóźniej w dniu `as_of` ('RRRR-MM-DD') – i, gdy podano
+        `max_age_days`, w ostatnich N dniach; format wyniku jak value_rows. `half_life_days` –
+        średnie ważone wagą 0.5^(wiek/okres) (ic.recency_weights). Oferty bez daty pobrania
+        nie są brane pod uwagę. Liczone w tym procesie, paczkami po `chunk_size` zapytań.
+        """
+        if self._time is None:
+            self._time = ic.get_time_index(self.df_db, self.index)
+        ti = self._time
+        t_lo, t_hi = ic.time_window(as_of, max_age_days)
+        if half_life_days is not None and half_life_days <= 0:
+            raise ValueError("Okres połowicznego zaniku musi być dodatni.")
+
+        n = len(level_values)
+        results: List[Tuple[str, str, str] | None] = [None] * n
+        centers = np.array([parse_area(a) for a in areas], dtype="float64")
+        lo = np.where(np.isnan(centers), -np.inf, centers - tol)
+        hi = np.where(np.isnan(centers), np.inf, centers + tol)
+        stripped = [str(v).strip() for v in level_values]
+
+        # klucz cache: tolerancja + parametry czasu + wersja dat pobrania (inna przestrzeń niż value_rows)
+        params = f"{tol!r}|{as_of}|{max_age_days!r}|{half_life_days!r}|{ti.fingerprint[:16]}"
+        by_key: Dict[pc.Key, List[int]] = {}
+        for i, v in enumerate(stripped):
+            key = pc.make_key("czas:" + db_key, v, centers[i], tol)
+            by_key.setdefault(key[:3] + (params,), []).append(i)
+
+        todo: List[Tuple[pc.Key, int]] = []
+        for key, rows in by_key.items():
+            hit = self.cache.get(key) if self.cache is not None else None
+            if hit is not None:
+                for i in rows:
+                    results[i] = hit
+            else:
+                todo.append((key, rows[0]))
+            if self.cache is not None and len(rows) > 1:
+                self.cache.hits += len(rows) - 1
+
+        code_map = self._codes_for(db_key, [stripped[i] for _, i in todo if stripped[i]])
+        rep = np.asarray([i for _, i in todo], dtype=np.int64)
+        codes = np.asarray([code_map[stripped[i]] if stripped[i] else NO_FILTER for _, i in todo], dtype=np.int64)
+        all_arrays = self.index.levels[il.ALL]
+        level_arrays = self.index.levels.get(db_key)
+        level_key = db_key if db_key in ti.levels else None
+        if level_key is None:
+            level_arrays = None
+
+        m = len(todo)
+        chunk_size = max(1, int(chunk_size))
+        for s in range(0, m, chunk_size):
+            e = min(s + chunk_size, m)
+            sel = rep[s:e]
+            out: List[Tuple[str, str, str]] = [(MSG_NO_SIMILAR, MSG_NO_SIMILAR, MSG_NO_SIMILAR)] * (e - s)
+            rows, windows = _recent_windows(ti, all_arrays, level_arrays, level_key, codes[s:e], lo[sel], hi[sel], t_lo, t_hi)
+            if rows:
+                pos = np.concatenate(windows)
+                weights = ic.recency_weights(ti.days[pos], as_of, half_life_days) if half_life_days is not None else None
+                stats = st.batch_price_stats(self.prices[pos], np.array([w.size for w in windows]), weights)
+                for j, r in enumerate(rows):
+                    out[r] = _format_stats(stats.mean_raw[j], stats.mean_adj[j], float(centers[sel[r]]))
+            for (key, _), res in zip(todo[s:e], out):
+                if self.cache is not None:
+                    self.cache.put(key, res)
+                for i in by_key[key]:
+                    results[i] = res
+            if progress is not None:
+                progress(n - m + e, n)
+        if progress is not None and m == 0:
+            progress(n, n)
+        return results  # type: ignore[return-value]
+
+    def uncertainty_rows(
+        self,
+        db_key: str,
+        level_values: Sequence[str],
+        areas: Sequence[str],
+        tol: float,
+        n_boot: int = BOOT_SAMPLES,
+        level: float = BOOT_LEVEL,
+    ) -> List[Tuple[int, str, str, str]]:
+        """
+        Dla tych samych okien co value_rows: (liczba porównywalnych, odchylenie standardowe ceny za m²,
+        dolna i górna granica przedziału ufności średniej po IQR). Bootstrap wszystkich okien naraz;
+        okna z < MIN_OFFERS ofertami – sama liczba.
+        """
+        n = len(level_values)
+        centers = np.array([parse_area(a) for a in areas], dtype="float64")
+        lo = np.where(np.isnan(centers), -np.inf, centers - tol)
+        hi = np.where(np.isnan(centers), np.inf, centers + tol)
+        stripped = [str(v).strip() for v in level_values]
+        code_map = self._codes_for(db_key, [v for v in stripped if v])
+        codes = np.asarray([code_map[v] if v else NO_FILTER for v in stripped], dtype=np.int64)
+        all_arrays = self.index.levels[il.ALL]
+        level_arrays = self.index.levels.get(db_key)
+
+        # unikalne okna (kod, lo, hi) → wiersze raportu
+        windows: Dict[Tuple[int, float, float], List[int]] = {}
+        for i in range(n):
+            windows.setdefault((int(codes[i]), float(lo[i]), float(hi[i])), []).append(i)
+
+        counts: List[int] = []
+        samples: List[np.ndarray] = []
+        for code, l, h in windows:
+            arrays, c = (all_arrays, 0) if (code == NO_FILTER or level_arrays is None) else (level_arrays, code)
+            a, b = arrays.bounds(c, l, h)
+            p = self.prices[np.sort(arrays.pos[int(a):int(b)])]
+            counts.append(int(b - a))
+            samples.append(p[~np.isnan(p)])
+
+        ci: Dict[int, Tuple[float, float]] = {}
+        boot = [j for j, p in enumerate(samples) if counts[j] >= MIN_OFFERS and 4 <= p.size <= BOOT_MAX_N]
+        if boot:
+            means = bootstrap_adjusted_means([samples[j] for j in boot], n_boot)
+            alpha = (1.0 - level) / 2.0
+            bounds = np.quantile(means, [alpha, 1.0 - alpha], axis=1)
+            for k, j in enumerate(boot):
+                ci[j] = (float(bounds[0, k]), float(bounds[1, k]))
+        for j, p in enumerate(samples):
+            if counts[j] >= MIN_OFFERS and p.size > BOOT_MAX_N:
+                ci[j] = _normal_ci(p, level)
+
+        results: List[Tuple[int, str, str, str]] = [None] * n  # type: ignore[list-item]
+        for j, rows in enumerate(windows.values()):
+            p = samples[j]
+            std = float(p.std(ddof=1)) if (counts[j] >= MIN_OFFERS and p.size > 1) else None
+            low, high = ci.get(j, (None, None))
+            res = (counts[j], am.format_price_per_m2(std), am.format_price_per_m2(low), am.format_price_per_m2(high))
+            for i in rows:
+                results[i] = res
+        return results
+
+    def _compute(
+        self,
+        db_key: str,
+        codes: np.ndarray,
+        centers: np.ndarray,
+        lo: np.ndarray,
+        hi: np.ndarray,
+        workers: int,
+        progress: Optional[ProgressFn],
+        chunk_size: int,
+        done_before: int,
+        total: int,
+    ) -> List[Tuple[str, str, str]]:
+        m = len(codes)
+        chunk_size = max(1, int(chunk_size))
+        bounds = [(s, min(s + chunk_size, m)) for s in range(0, m, chunk_size)]
+        all_arrays = self.index.levels[il.ALL]
+        level_arrays = self.index.levels.get(db_key)
+        out: List[Tuple[str, str, str]] = [None] * m  # type: ignore[list-item]
+
+        def _report(done_queries: int) -> None:
+            if progress is not None:
+                progress(done_before + int(round((total - done_before) * done_queries / max(m, 1))), total)
+
+        if workers <= 1 or len(bounds) <= 1:
+            done = 0
+            for s, e in bounds:
+                out[s:e] = _value_chunk(self.prices, all_arrays, level_arrays, codes[s:e], centers[s:e], lo[s:e], hi[s:e])
+                done += e - s
+                _report(done)
+            if not bounds:
+                _report(0)
+            return out
+
+        shared = {
+            "prices": self.prices,
+            "all_pos": all_arrays.pos, "all_metry": all_arrays.metry,
+            "all_starts": all_arrays.starts, "all_ends": all_arrays.ends,
+        }
+        if level_arrays is not None:
+            shared.update({
+                "lvl_pos": level_arrays.pos, "lvl_metry": level_arrays.metry,
+                "lvl_starts": level_arrays.starts, "lvl_ends": level_arrays.ends,
+            })
+        shm = _SharedArrays(shared)
+        try:
+            # bez `with`: wyjście z bloku czekałoby na paczki w toku, a anulowanie (JobCancelled
+            # z wywołania zwrotnego postępu) ma wrócić od razu
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, initargs=(shm.spec,))
+            try:
+                futures = [
+                    pool.submit(_worker_run, (k, codes[s:e], centers[s:e], lo[s:e], hi[s:e]))
+                    for k, (s, e) in enumerate(bounds)
+                ]
+                done = 0
+                for fut in as_completed(futures):
+                    k, res = fut.result()
+                    s, e = bounds[k]
+                    out[s:e] = res
+                    done += e - s
+                    _report(done)
+            except BaseException:
+                # błąd workera / wywołania zwrotnego – porzuć paczki jeszcze nierozpoczęte
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            pool.shutdown()
+        finally:
+            shm.close()
+        return out
+
+    def value_rows_approx(
+        self,
+        db_key: str,
+        level_values: Sequence[str],
+        areas: Sequence[str],
+        tol: float,
+        workers: int = 1,
+        progress: Optional[ProgressFn] = None,
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Przybliżona wycena z kostki statystyk; format wyniku jak value_rows.
+        Okna z mniej niż APPROX_MIN_COUNT ofertami (i lokalizacje spoza kostki) – tryb dokładny.
+        """
+        cube = kostka.get_cube(self.df_db)
+        n = len(level_values)
+        results: List[Tuple[str, str, str] | None] = [None] * n
+        centers = np.array([parse_area(a) for a in areas], dtype="float64")
+        stripped = [str(v).strip() for v in level_values]
+
+        # znacznik trybu w polu tolerancji – make_key zeruje poziom dla pustej wartości,
+        # więc prefiks poziomu nie oddzieliłby wyników przybliżonych od dokładnych
+        by_key: Dict[pc.Key, List[int]] = {}
+        for i, v in enumerate(stripped):
+            key = pc.make_key(db_key, v, centers[i], tol)
+            by_key.setdefault(key[:3] + ("approx|" + key[3],), []).append(i)
+
+        exact_rows: List[int] = []
+        for key, rows in by_key.items():
+            res = self.cache.get(key) if self.cache is not None else None
+            if res is None:
+                i = rows[0]
+                c = centers[i]
+                lo, hi = (-np.inf, np.inf) if np.isnan(c) else (c - tol, c + tol)
+                cnt, mean_raw, mean_adj = cube.window_stats(self.index, db_key, stripped[i], lo, hi)
+                if cnt < APPROX_MIN_COUNT:
+                    exact_rows.extend(rows)
+                    continue
+                prop_value = (mean_adj * c) if (mean_adj is not None and not np.isnan(c)) else None
+                res = (am.format_price_per_m2(mean_raw), am.format_price_per_m2(mean_adj), am.format_currency(prop_value))
+                if self.cache is not None:
+                    self.cache.put(key, res)
+            for j in rows:
+                results[j] = res
+
+        if exact_rows:
+            exact = self.value_rows(
+                db_key, [level_values[j] for j in exact_rows], [areas[j] for j in exact_rows], tol,
+                workers=workers,
+            )
+            for j, res in zip(exact_rows, exact):
+                results[j] = res
+        if progress is not None:
+            progress(n, n)
+        return results  # type: ignore[return-value]
+
+    def value_rows_knn(
+        self,
+        db_key: str,
+        level_values: Sequence[str],
+        features: np.ndarray,
+        k: int = sasiedzi.DEFAULT_K,
+        progress: Optional[ProgressFn] = None,
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Wycena z k najbardziej podobnych ofert tej samej lokalizacji (zamiast okna ±tol).
+        `features` – macierz wiersze × sasiedzi.FEATURES (NaN = brak cechy; kolumna 0 = metraż).
+        """
+        if self._knn is None:
+            self._knn = sasiedzi.NeighbourSearch(self.df_db, self.index)
+        n = len(level_values)
+        results: List[Tuple[str, str, str]] = [(MSG_NO_SIMILAR, MSG_NO_SIMILAR, MSG_NO_SIMILAR)] * n
+        stripped = [str(v).strip() for v in level_values]
+        code_map = self._codes_for(db_key, [v for v in stripped if v])
+        codes = np.asarray([code_map[v] if v else NO_FILTER for v in stripped], dtype=np.int64)
+
+        done = 0
+        for code in np.unique(codes):
+            if code == -1:
+                continue
+            sel = np.flatnonzero(codes == code)
+            found = self._knn.query(db_key, int(code), features[sel], max(int(k), MIN_OFFERS))
+            for i, pos in zip(sel, found):
+                if pos.size < MIN_OFFERS:
+                    continue
+                center = float(features[i, 0])
+                mean_raw, mean_adj = window_stats(self.prices[np.sort(pos)])
+                prop_value = (mean_adj * center) if (mean_adj is not None and not np.isnan(center)) else None
+                results[i] = (
+                    am.format_price_per_m2(mean_raw),
+                    am.format_price_per_m2(mean_adj),
+                    am.format_currency(prop_value),
+                )
+            done += sel.size
+            if progress is not None:
+                progress(done, n)
+        if progress is not None:
+            progress(n, n)
+        return results
+
+    def value_rows_radius(
+        self,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        areas: Sequence[str],
+        tol: float,
+        radius_km: float = geo.DEFAULT_RADIUS_KM,
+        progress: Optional[ProgressFn] = None,
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Wycena z ofert w promieniu `radius_km` od punktu (lat, lon) wiersza i w oknie ±tol m².
+        Wiersze bez współrzędnych (NaN) → MSG_NO_SIMILAR; pusty/niepoprawny metraż → bez filtra metrażu.
+        """
+        index = geo.get_geo(self.df_db)
+        n = len(areas)
+        results: List[Tuple[str, str, str] | None] = [None] * n
+        centers = np.array([parse_area(a) for a in areas], dtype="float64")
+        db_key = f"radius:{index.fingerprint}:{float(radius_km)!r}"
+
+        by_key: Dict[pc.Key, List[int]] = {}
+        for i in range(n):
+            point = "" if np.isnan(lat[i]) or np.isnan(lon[i]) else f"|{float(lat[i])!r},{float(lon[i])!r}"
+            by_key.setdefault(pc.make_key(db_key, point, centers[i], tol), []).append(i)
+
+        done = 0
+        for key, rows in by_key.items():
+            res = self.cache.get(key) if (self.cache is not None and key[1]) else None
+            if res is None:
+                i = rows[0]
+                c = centers[i]
+                lo, hi = (-np.inf, np.inf) if np.isnan(c) else (c - tol, c + tol)
+                pos = index.query(float(lat[i]), float(lon[i]), radius_km, lo, hi)
+                if pos.size < MIN_OFFERS:
+                    res = (MSG_NO_SIMILAR, MSG_NO_SIMILAR, MSG_NO_SIMILAR)
+                else:
+                    mean_raw, mean_adj = window_stats(self.prices[pos])
+                    prop_value = (mean_adj * c) if (mean_adj is not None and not np.isnan(c)) else None
+                    res = (am.format_price_per_m2(mean_raw), am.format_price_per_m2(mean_adj), am.format_currency(prop_value))
+                if self.cache is not None and key[1]:
+                    self.cache.put(key, res)
+            for j in rows:
+                results[j] = res
+            done += len(rows)
+            if progress is not None:
+                progress(done, n)
+        if progress is not None:
+            progress(n, n)
+        return results  # type: ignore[return-value]
+
+    def value_rows_fallback(
+        self,
+        levels: Sequence[Tuple[str, str]],
+        level_values: Sequence[Sequence[str]],
+        areas: Sequence[str],
+        tol: float,
+        workers: int = 1,
+        progress: Optional[ProgressFn] = None,
+    ) -> List[Tuple[str, str, str, str]]:
+        """
+        Wycena z poszerzaniem poziomu: `levels` = [(etykieta, kolumna_bazy), ...] od najwęższego,
+        `level_values[k][i]` = wartość poziomu k w wierszu i. Pierwszy poziom z >= MIN_OFFERS
+        ofertami w oknie daje wynik; zwraca (surowa_m2, skorygowana_m2, wartość, użyty_poziom).
+        Puste wartości poziomów są pomijane; gdy wszystkie puste – okno na całej bazie.
+        """
+        n = len(areas)
+        n_lvl = len(levels)
+        results: List[Tuple[str, str, str, str] | None] = [None] * n
+
+        centers = np.array([parse_area(a) for a in areas], dtype="float64")
+        lo = np.where(np.isnan(centers), -np.inf, centers - tol)
+        hi = np.where(np.isnan(centers), np.inf, centers + tol)
+        stripped = [[str(v).strip() for v in vals] for vals in level_values]
+
+        # klucz cache: cały łańcuch poziomów i wartości wiersza (inna przestrzeń niż value_rows)
+        chain_key = ">".join(db_key for _, db_key in levels)
+        by_key: Dict[pc.Key, List[int]] = {}
+        for i in range(n):
+            joined = "|".join(stripped[k][i] for k in range(n_lvl))
+            key = pc.make_key("fallback:" + chain_key, "|" + joined, centers[i], tol)
+            by_key.setdefault(key, []).append(i)
+
+        todo: List[Tuple[pc.Key, int]] = []
+        for key, rows in by_key.items():
+            hit = self.cache.get(key) if self.cache is not None else None
+            if hit is not None:
+                for i in rows:
+                    results[i] = hit  # type: ignore[assignment]
+            else:
+                todo.append((key, rows[0]))
+            if self.cache is not None and len(rows) > 1:
+                self.cache.hits += len(rows) - 1
+
+        m = len(todo)
+        rep = np.asarray([i for _, i in todo], dtype=np.int64)
+        q_lo, q_hi = lo[rep], hi[rep]
+
+        # 1) liczności okien na wszystkich poziomach naraz (wyszukiwanie binarne w indeksie)
+        codes = np.full((n_lvl, m), -1, dtype=np.int64)
+        counts = np.zeros((n_lvl, m), dtype=np.int64)
+        for k, (_, db_key) in enumerate(levels):
+            arrays = self.index.levels.get(db_key)
+            if arrays is None:
+                continue
+            vals = [stripped[k][i] for i in rep]
+            code_map = self._codes_for(db_key, [v for v in vals if v])
+            codes[k] = [code_map[v] if v else -1 for v in vals]
+            for code in np.unique(codes[k]):
+                if code < 0:
+                    continue
+                sel = np.flatnonzero(codes[k] == code)
+                a, b = arrays.bounds(int(code), q_lo[sel], q_hi[sel])
+                counts[k, sel] = b - a
+
+        # 2) pierwszy poziom z wystarczającą liczbą ofert; -1 = żaden
+        enough = counts >= MIN_OFFERS
+        chosen = np.where(enough.any(axis=0), enough.argmax(axis=0), -1) if n_lvl else np.full(m, -1)
+        all_empty = np.array([not any(stripped[k][i] for k in range(n_lvl)) for i in rep], dtype=bool)
+
+        # 3) statystyki tylko dla wybranego poziomu – grupami (ścieżka jak w value_rows, z pulą procesów)
+        computed: List[Tuple[str, str, str, str]] = [
+            (MSG_NO_SIMILAR, MSG_NO_SIMILAR, MSG_NO_SIMILAR, "")
+        ] * m
+        groups = [(k, np.flatnonzero(chosen == k)) for k in range(n_lvl)]
+        groups.append((-1, np.flatnonzero(all_empty)))
+        cached_rows = n - sum(len(by_key[key]) for key, _ in todo)
+        offset = 0
+        for k, sel in groups:
+            if sel.size == 0:
+                continue
+            db_key = levels[k][1] if k >= 0 else il.ALL
+            label = levels[k][0] if k >= 0 else LEVEL_WHOLE_DB
+            g_codes = codes[k, sel] if k >= 0 else np.full(sel.size, NO_FILTER, dtype=np.int64)
+
+            def _prog(d: int, _t: int, _off: int = offset) -> None:
+                if progress is not None:
+                    progress(cached_rows + int(round((n - cached_rows) * (_off + d) / max(m, 1))), n)
+
+            part = self._compute(db_key, g_codes, centers[rep][sel], q_lo[sel], q_hi[sel],
+                                 workers, _prog, DEFAULT_CHUNK, 0, int(sel.size))
+            for j, res in zip(sel, part):
+                computed[j] = res + (label,) if res[0] != MSG_NO_SIMILAR else res + ("",)
+            offset += int(sel.size)
+        if progress is not None:
+            progress(n, n)
+
+        for (key, _), res in zip(todo, computed):
+            if self.cache is not None:
+                self.cache.put(key, res)
+            for j in by_key[key]:
+                results[j] = res
+        return results  # type: ignore[return-value]
+
+
+def _report_inputs(df_rp: pd.DataFrame, col: str) -> List[str]:
+    """Kolumna raportu jako teksty (jak automat.compute_row: pusta komórka → ""); brak kolumny – same puste."""
+    return [str(v or "") for v in df_rp[col].tolist()] if col in df_rp.columns else [""] * len(df_rp)
+
+
+def value_report(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    db_key: str,
+    rp_key: str,
+    tol: float,
+    workers: int = 1,
+    progress: Optional[ProgressFn] = None,
+) -> List[Tuple[str, str, str]]:
+    """Wyceń wszystkie wiersze raportu (te same reguły odczytu pól co automat.compute_row)."""
+    level_values = _report_inputs(df_rp, rp_key)
+    areas = _report_inputs(df_rp, "Obszar")
+    return engine.value_rows(db_key, level_values, areas, tol, workers=workers, progress=progress)
+
+
+def value_report_adaptive(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    db_key: str,
+    rp_key: str,
+    target: int = ADAPT_TARGET,
+    workers: int = 1,
+    progress: Optional[ProgressFn] = None,
+) -> List[Tuple[str, str, str, str]]:
+    """Jak value_report, z oknem adaptacyjnym (tolerancja dobierana per wiersz, zwracana jako 4. pole)."""
+    level_values = _report_inputs(df_rp, rp_key)
+    areas = _report_inputs(df_rp, "Obszar")
+    return engine.value_rows_adaptive(db_key, level_values, areas, target=target, workers=workers, progress=progress)
+
+
+def value_report_recent(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    db_key: str,
+    rp_key: str,
+    tol: float,
+    as_of: str,
+    max_age_days: Optional[float] = None,
+    half_life_days: Optional[float] = None,
+    progress: Optional[ProgressFn] = None,
+) -> List[Tuple[str, str, str]]:
+    """Jak value_report, tylko z ofert pobranych do dnia `as_of` (ostatnie N dni, waga wieku)."""
+    level_values = _report_inputs(df_rp, rp_key)
+    areas = _report_inputs(df_rp, "Obszar")
+    return engine.value_rows_recent(db_key, level_values, areas, tol, as_of, max_age_days, half_life_days,
+                                    progress=progress)
+
+
+def value_report_uncertainty(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    db_key: str,
+    rp_key: str,
+    tol: float,
+) -> List[Tuple[int, str, str, str]]:
+    """Liczba porównywalnych, odchylenie i przedział ufności dla okien value_report."""
+    level_values = _report_inputs(df_rp, rp_key)
+    areas = _report_inputs(df_rp, "Obszar")
+    return engine.uncertainty_rows(db_key, level_values, areas, tol)
+
+
+def value_report_approx(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    db_key: str,
+    rp_key: str,
+    tol: float,
+    workers: int = 1,
+    progress: Optional[ProgressFn] = None,
+) -> List[Tuple[str, str, str]]:
+    """Jak value_report, w trybie przybliżonym (kostka statystyk)."""
+    level_values = _report_inputs(df_rp, rp_key)
+    areas = _report_inputs(df_rp, "Obszar")
+    return engine.value_rows_approx(db_key, level_values, areas, tol, workers=workers, progress=progress)
+
+
+def value_report_knn(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    db_key: str,
+    rp_key: str,
+    k: int = sasiedzi.DEFAULT_K,
+    progress: Optional[ProgressFn] = None,
+) -> List[Tuple[str, str, str]]:
+    """Jak value_report, w trybie kNN; cechy z kolumn raportu sasiedzi.FEATURES (jeśli są)."""
+    level_values = _report_inputs(df_rp, rp_key)
+    features = sasiedzi.feature_matrix(df_rp, [rp_col for (_, rp_col, _) in sasiedzi.FEATURES])
+    return engine.value_rows_knn(db_key, level_values, features, k=k, progress=progress)
+
+
+def value_report_radius(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    tol: float,
+    radius_km: float = geo.DEFAULT_RADIUS_KM,
+    progress: Optional[ProgressFn] = None,
+) -> List[Tuple[str, str, str]]:
+    """Jak value_report, w trybie promienia; współrzędne wierszy z geolokalizacja (kolumny lub centroid adresu)."""
+    index = geo.get_geo(engine.df_db)
+    if index.n_tagged == 0:
+        print("[WARN] Baza nie ma współrzędnych ofert (kolumny 'lat'/'lon') – tryb promienia nic nie znajdzie.",
+              file=sys.stderr)
+    lat, lon = index.locate_report(df_rp)
+    areas = _report_inputs(df_rp, "Obszar")
+    return engine.value_rows_radius(lat, lon, areas, tol, radius_km=radius_km, progress=progress)
+
+
+def value_report_fallback(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    levels: Sequence[Tuple[str, str, str]],
+    tol: float,
+    workers: int = 1,
+    progress: Optional[ProgressFn] = None,
+) -> List[Tuple[str, str, str, str]]:
+    """Jak value_report, z poszerzaniem poziomu; `levels` = [(etykieta, kolumna_bazy, kolumna_raportu), ...]."""
+    level_values = [_report_inputs(df_rp, rp_key) for (_, _, rp_key) in levels]
+    return engine.value_rows_fallback(
+        [(h, db_key) for (h, db_key, _) in levels], level_values, _report_inputs(df_rp, "Obszar"), tol,
+        workers=workers, progress=progress,
+    )
+
+
+def _format_diff(model_m2: float, mean_adj: float) -> str:
+    if np.isnan(model_m2) or np.isnan(mean_adj) or mean_adj == 0:
+        return "—"
+    return f"{100.0 * (model_m2 / mean_adj - 1.0):+.1f}%".replace(".", ",")
+
+
+def value_report_model(
+    df_rp: pd.DataFrame,
+    engine: ValuationEngine,
+    comparable: Sequence[Tuple[str, ...]],
+) -> List[Tuple[str, str, str, str]]:
+    """
+    Wycena modelem hedonicznym dla wszystkich wierszy naraz: (cena za m², wartość,
+    różnica względem średniej skorygowanej z `comparable`, region modelu).
+    """
+    model = model_cen.get_model(engine.df_db)
+    pred, region = model.predict(df_rp)
+    areas = np.array(
+        [parse_area(v) for v in df_rp["Obszar"].tolist()] if "Obszar" in df_rp.columns else [np.nan] * len(df_rp),
+        dtype="float64",
+    )
+    mean_adj = am._coerce_numeric(pd.Series([r[1] for r in comparable], dtype=object)).to_numpy(dtype="float64")
+    out: List[Tuple[str, str, str, str]] = []
+    for i in range(len(pred)):
+        m2 = float(pred[i])
+        value = m2 * areas[i]
+        out.append((
+            am.format_price_per_m2(None if np.isnan(m2) else m2),
+            am.format_currency(None if np.isnan(value) else value),
+            _format_diff(m2, mean_adj[i]),
+            str(model.labels[region[i]]),
+        ))
+    return out
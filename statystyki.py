@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+statystyki.py — jedno jądro statystyk cen: średnia surowa, granice IQR i średnia po IQR
+- wejście: tablica float już po konwersji (coerce_numeric – raz na kolumnę, nie 3× na okno),
+- kwartyle z np.partition (częściowe sortowanie) zamiast pełnego sortowania / Series.quantile;
+  interpolacja liniowa krok w krok jak w np.quantile, więc wynik jest identyczny,
+- sumy w kolejności wejścia (sumowanie parami jak w numpy) – średnie bit w bit jak w pandas,
+- wariant wsadowy (batch_price_stats): wiele okien naraz jako segmenty jednej tablicy,
+  opcjonalnie ze średnimi ważonymi (np. waga wieku oferty z indeks_czasu),
+- używane przez automat (compute_row), silnik_wyceny, wyniki oraz automat_matma/wyniki_matma.
+
+Mikro-benchmark (dawna ścieżka pandas vs price_stats vs batch_price_stats, te same okna):
+    python statystyki.py [--okna 500] [--min 5] [--max 400] [--powtorzenia 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+IQR_K = 1.5
+# poniżej tej liczby cen IQR nie jest liczony (średnia po IQR = średnia surowa)
+MIN_IQR = 4
+
+
+class PriceStats(NamedTuple):
+    count: int                  # liczba cen (bez NaN)
+    mean_raw: Optional[float]   # średnia surowa; None gdy brak cen
+    low: float                  # dolna granica IQR (-inf gdy count < MIN_IQR)
+    high: float                 # górna granica IQR (+inf gdy count < MIN_IQR)
+    kept: int                   # liczba cen w [low, high]
+    mean_adj: Optional[float]   # średnia po IQR; None gdy nic nie zostało
+
+
+class BatchStats(NamedTuple):
+    count: np.ndarray           # per segment; średnie NaN tam, gdzie brak cen
+    mean_raw: np.ndarray
+    kept: np.ndarray
+    mean_adj: np.ndarray
+
+
+def coerce_series(series: pd.Series) -> pd.Series:
+    """Przekonwertuj serię na liczby (uwzględniając przecinki, spacje, kropki tysięcy)."""
+    s = series.astype(str)
+    s = s.str.replace("\u00a0", " ", regex=False)           # NBSP
+    s = s.str.replace(",", ".", regex=False)                # przecinek -> kropka
+    s = s.str.replace(r"[^\d\.\-]", "", regex=True)         # usuń znaki nie-numeryczne
+    s = s.str.replace(r"(?<=\d)\.(?=.*\.)", "", regex=True) # usuń kropki tysięcy
+    return pd.to_numeric(s, errors="coerce")
+
+
+def coerce_numeric(series: pd.Series) -> np.ndarray:
+    """coerce_series jako tablica float64 (NaN = nie-liczba) – wejście dla price_stats."""
+    return coerce_series(series).to_numpy(dtype="float64")
+
+
+def _lerp(a, b, t):
+    """Interpolacja liniowa dokładnie jak numpy (_lerp w np.quantile, metoda 'linear')."""
+    d = b - a
+    return np.where(t >= 0.5, b - d * (1 - t), a + d * t)
+
+
+def _quartiles(c: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (Q1, Q3) liniowo jak np.quantile wzdłuż ostatniej osi – tylko potrzebne statystyki
+    pozycyjne (np.partition), bez pełnego sortowania. c: (n,) albo (k, n) – k okien po n cen.
+    """
+    n = c.shape[-1]
+    pos = np.array([0.25, 0.75]) * (n - 1)
+    i0 = np.floor(pos).astype(np.int64)
+    i1 = np.minimum(i0 + 1, n - 1)
+    part = np.partition(c, np.unique(np.concatenate([i0, i1])), axis=-1)
+    q = _lerp(part[..., i0], part[..., i1], pos - i0)
+    return q[..., 0], q[..., 1]
+
+
+def iqr_bounds(q1: float, q3: float) -> Tuple[float, float]:
+    iqr = q3 - q1
+    return q1 - IQR_K * iqr, q3 + IQR_K * iqr
+
+
+def iqr_mask(c: np.ndarray) -> np.ndarray:
+    """Maska cen w granicach IQR (przedział domknięty); c bez NaN. Poniżej MIN_IQR cen – wszystkie."""
+    if c.size < MIN_IQR:
+        return np.ones(c.size, dtype=bool)
+    low, high = iqr_bounds(*_quartiles(c))
+    return (c >= low) & (c <= high)
+
+
+def price_stats(values: np.ndarray) -> PriceStats:
+    """
+    Statystyki okna w jednym wywołaniu (values: float, NaN pomijane, kolejność wierszy bazy).
+    Odpowiada mean_numeric + remove_outliers_iqr + mean_numeric (przedział domknięty).
+    """
+    c = values[~np.isnan(values)]
+    n = int(c.size)
+    if n == 0:
+        return PriceStats(0, None, float("nan"), float("nan"), 0, None)
+    mean_raw = float(c.mean())
+    if n < MIN_IQR:
+        return PriceStats(n, mean_raw, float("-inf"), float("inf"), n, mean_raw)
+    low, high = (float(b) for b in iqr_bounds(*_quartiles(c)))
+    kept = c[(c >= low) & (c <= high)]
+    mean_adj = float(kept.mean()) if kept.size else None
+    return PriceStats(n, mean_raw, low, high, int(kept.size), mean_adj)
+
+
+def _segment_groups(cnt: np.ndarray):
+    """(długość m, numery segmentów, indeksy (k × m) do tablicy segmentów) – grupy równej długości."""
+    starts = np.concatenate([[0], np.cumsum(cnt)[:-1]])
+    for m in np.unique(cnt[cnt > 0]):
+        ids = np.flatnonzero(cnt == m)
+        yield int(m), ids, starts[ids, None] + np.arange(m)
+
+
+def _means(M: np.ndarray, W: Optional[np.ndarray]) -> np.ndarray:
+    """Średnie wierszy macierzy (k × m); z wagami – średnie ważone."""
+    if W is None:
+        return M.sum(axis=1) / M.shape[1]
+    return (M * W).sum(axis=1) / W.sum(axis=1)
+
+
+def batch_price_stats(values: np.ndarray, lengths: np.ndarray, weights: Optional[np.ndarray] = None) -> BatchStats:
+    """
+    price_stats dla wielu okien naraz: values = okna sklejone jedno po drugim, lengths = ich
+    długości. Okna o tej samej liczbie cen składane w macierz (k × m): kwartyle z np.partition
+    wzdłuż wiersza, sumy wzdłuż wiersza (to samo sumowanie parami co c.mean(), którego
+    np.add.reduceat nie zachowuje). Wyniki identyczne z price_stats dla każdego okna osobno.
+    `weights` (dodatnie, równoległe do values) – średnia surowa i po IQR ważone; granice IQR
+    zawsze z nieważonych kwartyli.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    n_seg = lengths.size
+    seg = np.repeat(np.arange(n_seg), lengths)
+    ok = ~np.isnan(values)
+    v, s = values[ok], seg[ok]
+    w = weights[ok] if weights is not None else None
+    count = np.bincount(s, minlength=n_seg)
+
+    mean_raw = np.full(n_seg, np.nan)
+    low = np.full(n_seg, -np.inf)
+    high = np.full(n_seg, np.inf)
+    for m, ids, idx in _segment_groups(count):
+        M = v[idx]
+        mean_raw[ids] = _means(M, w[idx] if w is not None else None)
+        if m >= MIN_IQR:
+            low[ids], high[ids] = iqr_bounds(*_quartiles(M))
+
+    keep = (v >= low[s]) & (v <= high[s])
+    v, s = v[keep], s[keep]
+    if w is not None:
+        w = w[keep]
+    kept = np.bincount(s, minlength=n_seg)
+    mean_adj = np.full(n_seg, np.nan)
+    for m, ids, idx in _segment_groups(kept):
+        mean_adj[ids] = _means(v[idx], w[idx] if w is not None else None)
+    return BatchStats(count, mean_raw, kept, mean_adj)
+
+
+# ===== Mikro-benchmark =====
+
+def _pandas_reference(series: pd.Series) -> Tuple[Optional[float], Optional[float]]:
+    """Dawna ścieżka *_matma: trzy konwersje serii, Series.quantile, filtr DataFrame."""
+    s = coerce_series(series).dropna()
+    if s.empty:
+        return None, None
+    mean_raw = float(s.mean())
+    if len(s) < MIN_IQR:
+        return mean_raw, mean_raw
+    low, high = iqr_bounds(s.quantile(0.25), s.quantile(0.75))
+    df = pd.DataFrame({"c": series})
+    kept = coerce_series(df[coerce_series(df["c"]).between(low, high)]["c"]).dropna()
+    return mean_raw, (float(kept.mean()) if not kept.empty else None)
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Mikro-benchmark jądra statystyk cen.")
+    ap.add_argument("--okna", type=int, default=500, help="Liczba okien (zapytań)")
+    ap.add_argument("--min", type=int, default=5, help="Najmniejsza liczba ofert w oknie")
+    ap.add_argument("--max", type=int, default=400, help="Największa liczba ofert w oknie")
+    ap.add_argument("--powtorzenia", type=int, default=3, help="Powtórzenia (liczy się najlepszy czas)")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(args.min, args.max + 1, args.okna)
+    windows: List[np.ndarray] = [np.round(rng.lognormal(9.2, 0.35, n), 2) for n in lengths]
+    texts = [pd.Series([f"{v:.2f}".replace(".", ",") for v in w], dtype=object) for w in windows]
+    flat = np.concatenate(windows)
+
+    ref = [_pandas_reference(t) for t in texts]
+    new = [price_stats(coerce_numeric(t)) for t in texts]
+    batch = batch_price_stats(flat, lengths)
+    same = all(r == (n.mean_raw, n.mean_adj) for r, n in zip(ref, new)) and all(
+        r == (float(a), float(b)) for r, a, b in zip(ref, batch.mean_raw, batch.mean_adj)
+    )
+
+    timings = [
+        ("pandas (3× konwersja, Series.quantile)", _best_of(lambda: [_pandas_reference(t) for t in texts], args.powtorzenia)),
+        ("price_stats + coerce_numeric", _best_of(lambda: [price_stats(coerce_numeric(t)) for t in texts], args.powtorzenia)),
+        ("price_stats (ceny już liczbowe)", _best_of(lambda: [price_stats(w) for w in windows], args.powtorzenia)),
+        ("batch_price_stats (wszystkie okna)", _best_of(lambda: batch_price_stats(flat, lengths), args.powtorzenia)),
+    ]
+    base = timings[0][1]
+    print(f"Okna: {args.okna}, oferty: {flat.size} ({args.min}–{args.max} na okno); wyniki zgodne: {'tak' if same else 'NIE'}")
+    for name, t in timings:
+        print(f"  {name:<40} {t * 1000:9.1f} ms   ×{base / t:7.1f}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
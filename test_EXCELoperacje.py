@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+test_EXCELoperacje.py — dopisywanie wierszy (BatchAppender) bez zmiany typów komórek
+"""
+
+import datetime as dt
+from unittest import mock
+
+import numpy as np
+import openpyxl
+import pytest
+
+import EXCELoperacje as xo
+
+HEADERS = ["data", "liczba", "cena", "opis"]
+
+
+def _skoroszyt(path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "S"
+    ws.append(HEADERS)
+    wb.save(path)
+
+
+def _wiersze(n):
+    return [{"data": dt.date(2024, 1, 2), "liczba": np.int64(5), "cena": 10.5 + i, "opis": f"w{i}"} for i in range(n)]
+
+
+def _odczyt(path):
+    ws = openpyxl.load_workbook(path)["S"]
+    return [tuple(c.value for c in row) for row in ws.iter_rows(min_row=2)]
+
+
+@pytest.mark.parametrize("batch_size", [5000, 2])  # w pamięci / przez plik pomocniczy
+def test_typy_komorek_zachowane(tmp_path, batch_size):
+    path = tmp_path / "baza.xlsx"
+    _skoroszyt(path)
+    with xo.BatchAppender(path, "S", HEADERS, batch_size=batch_size) as ap:
+        ap.extend(_wiersze(5))
+    rows = _odczyt(path)
+    assert len(rows) == 5
+    assert rows[0] == (dt.datetime(2024, 1, 2), 5, 10.5, "w0")
+    assert isinstance(rows[0][1], int)
+    assert not (tmp_path / "baza.xlsx.S.append.pkl").exists()
+
+
+def test_blad_zapisu_nie_gubi_wierszy(tmp_path):
+    path = tmp_path / "baza.xlsx"
+    _skoroszyt(path)
+    ap = xo.BatchAppender(path, "S", HEADERS)
+    ap.extend(_wiersze(3))
+    with mock.patch.object(xo, "load_workbook", side_effect=OSError("plik zablokowany")):
+        with pytest.raises(OSError):
+            ap.close()
+    assert ap.sidecar.exists()
+
+    with xo.BatchAppender(path, "S", HEADERS):
+        pass  # scala pozostawiony plik pomocniczy
+    rows = _odczyt(path)
+    assert [r[3] for r in rows] == ["w0", "w1", "w2"]
+    assert rows[0][0] == dt.datetime(2024, 1, 2)
+    assert not ap.sidecar.exists()
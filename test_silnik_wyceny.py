@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+test_silnik_wyceny.py — silnik wyceny: anulowanie w puli procesów, cache, zgodność z automat.compute_row (python -m pytest -q test_silnik_wyceny.py)
+"""
+
+import gc
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import automat
+import indeks_lokalizacji as il
+import kostka
+import migawka
+import pamiec_wycen as pc
+import silnik_wyceny as sw
+
+
+class _Przerwano(Exception):
+    pass
+
+
+_BRAMKA = None
+
+
+def _init_z_bramka(gate, initializer, initargs):
+    global _BRAMKA
+    _BRAMKA = gate
+    initializer(*initargs)
+
+
+def _za_bramka(fn, job):
+    # pierwsza paczka od razu, kolejne czekają na otwarcie bramki przez test
+    if job[0] > 0:
+        _BRAMKA.wait(30)
+    return fn(job)
+
+
+class _Pula(ProcessPoolExecutor):
+    """
+    Pula zapamiętująca zlecone paczki i wywołania shutdown; paczki poza pierwszą czekają
+    w workerach na `otworz()`. Bramka idzie przez initializer, więc działa też przy spawn.
+    """
+
+    ostatnia = None
+
+    def __init__(self, max_workers=None, initializer=None, initargs=()):
+        self.gate = multiprocessing.Event()
+        super().__init__(max_workers=max_workers, initializer=_init_z_bramka,
+                         initargs=(self.gate, initializer, initargs))
+        self.futures, self.shutdowns = [], []
+        _Pula.ostatnia = self
+
+    def submit(self, fn, job):
+        fut = super().submit(_za_bramka, fn, job)
+        self.futures.append(fut)
+        return fut
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shutdowns.append((wait, cancel_futures))
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def otworz(self):
+        # anulowanie kolejki robi wątek zarządcy puli – poczekaj, aż żadna paczka nie będzie oczekująca
+        deadline = time.monotonic() + 10
+        while any(not (f.running() or f.done()) for f in self.futures) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.gate.set()
+
+
+def _baza(n: int = 20000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    metry = rng.uniform(20, 120, n).round(1)
+    return pd.DataFrame({
+        "miejscowosc": rng.choice(["Kraków", "Gdańsk", "Łódź"], n),
+        "metry": metry,
+        "cena_za_metr": rng.uniform(8000, 20000, n).round(0),
+    })
+
+
+def _raport(m: int = 4000, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    values = list(rng.choice(["Kraków", "Gdańsk", "Łódź"], m))
+    areas = [f"{a:.2f}" for a in rng.uniform(25, 110, m)]
+    return values, areas
+
+
+def test_anulowanie_w_trakcie_wielu_procesow(monkeypatch):
+    monkeypatch.setattr(sw, "ProcessPoolExecutor", _Pula)
+    engine = sw.ValuationEngine(_baza())
+    values, areas = _raport()
+    calls = []
+
+    def progress(done, total):
+        calls.append(done)
+        raise _Przerwano()
+
+    with pytest.raises(_Przerwano):
+        engine.value_rows("miejscowosc", values, areas, 5.0, workers=2, progress=progress, chunk_size=20)
+    pool = _Pula.ostatnia
+    # przerwane po pierwszej paczce; pula zamknięta bez czekania na paczki w toku (te stoją przed bramką)
+    assert len(calls) == 1
+    assert pool.shutdowns == [(False, True)]
+    pool.otworz()
+    pool.shutdown()
+    # policzone: pierwsza paczka + co najwyżej te w workerach i w kolejce wywołań; reszta anulowana
+    processed = sum(not f.cancelled() for f in pool.futures)
+    assert 1 <= processed <= 2 * 2 + 2 < len(pool.futures)
+
+    monkeypatch.undo()
+    full = engine.value_rows("miejscowosc", values, areas, 5.0, workers=2, chunk_size=20)
+    assert full == engine.value_rows("miejscowosc", values, areas, 5.0, workers=1)
+
+
+def test_przyblizone_nie_trafia_do_cache_dokladnych():
+    # pusta wartość poziomu: make_key zeruje poziom – wpis z kostki nie może posłużyć trybowi dokładnemu
+    df = migawka.prepare_offer_frame(_baza(3000))
+    engine = sw.ValuationEngine(df, cache=pc.ValuationCache("test"))
+    approx = engine.value_rows_approx("miejscowosc", [""], ["54,3"], 15.0)
+    exact = engine.value_rows("miejscowosc", [""], ["54,3"], 15.0)
+    fresh = sw.ValuationEngine(df).value_rows("miejscowosc", [""], ["54,3"], 15.0)
+    assert approx != fresh  # inaczej test niczego nie sprawdza
+    assert exact == fresh
+
+
+def test_przeladowania_nie_zostawiaja_starych_wersji(tmp_path):
+    # serwer przy każdej zmianie pliku wczytuje nową wersję bazy – poprzednie nie mogą zostawać w pamięci
+    sizes = lambda: (len(il._CACHE._by_fingerprint), len(kostka._CACHE._by_fingerprint), len(pc._CACHES))
+    frames = lambda: (len(il._CACHE._by_frame), len(kostka._CACHE._by_frame))
+    before, before_frames = sizes(), frames()
+    for seed in range(4):
+        df = migawka.prepare_offer_frame(_baza(500, seed))
+        df.attrs["db_path"] = str(tmp_path / "baza.xlsx")
+        kostka.get_cube(df)
+        pc.get_cache(df)
+        del df
+    gc.collect()
+    assert all(n <= b + 1 for n, b in zip(sizes(), before))
+    assert all(n <= b for n, b in zip(frames(), before_frames))
+
+
+def test_value_report_zgodny_z_compute_row():
+    # wycena wektorowa = wiersz po wierszu; także puste, nieznane i inaczej zapisane lokalizacje
+    df = _baza(3000, seed=2)
+    df.loc[::37, "cena_za_metr"] = np.nan
+    df = migawka.prepare_offer_frame(df)
+    raport = pd.DataFrame({
+        "Miejscowość": ["Kraków", "", None, "Szczecin", "  kraków ", "GDAŃSK", "Łódź", "Łódź", "Gdańsk", np.nan],
+        "Obszar": ["54,3", "60", "41.5", "50", "70,0", np.nan, "", "abc", "  33,25 ", "48"],
+    })
+    engine = sw.ValuationEngine(df)
+    for rp in (raport, raport.drop(columns=["Obszar"])):
+        expected = [automat.compute_row(row, df, "Miejscowość", 5.0) for _, row in rp.iterrows()]
+        assert sw.value_report(rp, engine, "miejscowosc", "Miejscowość", 5.0) == expected
+        assert expected[0] != (sw.MSG_NO_SIMILAR,) * 3  # inaczej test niczego nie sprawdza
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+zadania.py — zadania w tle dla okien Tkinter (automat gui, wyniki, bazadanych)
+- praca w wątku roboczym; skrypty jako procesy potomne z wyjściem czytanym linia po linii,
+- komunikaty (log, postęp, wynik, błąd) przez kolejkę, którą okno odpytuje co POLL_MS przez
+  after() – widżety Tk dotykane są wyłącznie z wątku głównego, okno nie zamarza,
+- print() w czasie zadania (np. podsumowanie cache w automat) trafia do logu okna
+  (przekierowanie sys.stdout/stderr jest globalne – jedno zadanie naraz w procesie),
+- anulowanie: Job.progress / Job.check zgłaszają JobCancelled, proces potomny jest kończony,
+- jedno zadanie naraz na okno; wskazane przyciski są blokowane na czas pracy.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import subprocess
+import sys
+import threading
+import tkinter as tk
+from contextlib import redirect_stderr, redirect_stdout
+from tkinter import messagebox
+from typing import Any, Callable, List, Optional, Sequence
+
+POLL_MS = 100
+# proces potomny po anulowaniu: czas na zakończenie, potem kill
+TERMINATE_TIMEOUT = 5.0
+
+
+class JobCancelled(Exception):
+    """Zadanie przerwane przez użytkownika."""
+
+
+class _QueueWriter:
+    """Plik tekstowy dla print(): pełne linie jako komunikaty logu."""
+
+    def __init__(self, job: "Job"):
+        self.job = job
+        self._buf = ""
+
+    def write(self, text: str) -> int:
+        self._buf += text
+        while "\n" in self._buf:
+            line, self._buf = self._buf.split("\n", 1)
+            self.job.log(line)
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buf:
+            self.job.log(self._buf)
+            self._buf = ""
+
+
+class Job:
+    """Uchwyt zadania przekazywany do funkcji roboczej (działa w wątku roboczym)."""
+
+    def __init__(self, name: str, events: "queue.Queue[tuple]"):
+        self.name = name
+        self._events = events
+        self.cancelled = threading.Event()
+        self._proc: Optional[subprocess.Popen] = None
+
+    def log(self, text: str) -> None:
+        self._events.put(("log", text))
+
+    def check(self) -> None:
+        if self.cancelled.is_set():
+            raise JobCancelled(self.name)
+
+    def progress(self, done: int, total: int) -> None:
+        """Callback postępu (sygnatura jak w automat.process_report); przerywa anulowane zadanie."""
+        self._events.put(("progress", done, total))
+        self.check()
+
+    def run_process(self, cmd: Sequence[str], cwd: Optional[str] = None) -> int:
+        """Uruchom proces potomny, przekazując jego wyjście do logu linia po linii; zwraca kod wyjścia."""
+        self.check()
+        env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+        proc = subprocess.Popen(list(cmd), cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, encoding="utf-8", errors="replace", bufsize=1)
+        self._proc = proc
+        try:
+            for line in proc.stdout:  # type: ignore[union-attr]
+                self.log(line.rstrip("\n"))
+            proc.wait()
+        finally:
+            self._proc = None
+        self.check()
+        return proc.returncode
+
+    def _cancel(self) -> None:
+        self.cancelled.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(TERMINATE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+class JobRunner:
+    """
+    Uruchamia jedno zadanie naraz dla okna `root`. on_log(tekst) / on_progress(zrobione, wszystkie)
+    wołane w wątku Tk; `busy` – widżety wyłączane na czas zadania, `cancel_button` – włączany.
+    """
+
+    def __init__(
+        self,
+        root: tk.Misc,
+        on_log: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        busy: Sequence[tk.Misc] = (),
+        cancel_button: Optional[tk.Misc] = None,
+        poll_ms: int = POLL_MS,
+    ):
+        self.root = root
+        self.on_log = on_log
+        self.on_progress = on_progress
+        self.busy: List[tk.Misc] = list(busy)
+        self.cancel_button = cancel_button
+        self.poll_ms = poll_ms
+        self._events: "queue.Queue[tuple]" = queue.Queue()
+        self._job: Optional[Job] = None
+        self._on_done: Optional[Callable[[Any], None]] = None
+        self._on_error: Optional[Callable[[BaseException], None]] = None
+        if cancel_button is not None:
+            cancel_button.configure(state="disabled")
+
+    @property
+    def running(self) -> bool:
+        return self._job is not None
+
+    def start(
+        self,
+        name: str,
+        work: Callable[[Job], Any],
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> Optional[Job]:
+        """Uruchom work(job) w tle; on_done(wynik) / on_error(wyjątek) – w wątku Tk. None, gdy coś już działa."""
+        if self._job is not None:
+            messagebox.showinfo("Trwa zadanie", f"Poczekaj na zakończenie: {self._job.name}")
+            return None
+        job = Job(name, self._events)
+        self._job, self._on_done, self._on_error = job, on_done, on_error
+        self._set_busy(True)
+        threading.Thread(target=self._thread_main, args=(job, work), name=f"zadanie: {name}", daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+        return job
+
+    def cancel(self) -> None:
+        job = self._job
+        if job is not None and not job.cancelled.is_set():
+            if self.on_log is not None:
+                self.on_log(f"[INFO] Przerywam: {job.name}…")
+            threading.Thread(target=job._cancel, daemon=True).start()
+
+    # --- wątek roboczy ---
+    def _thread_main(self, job: Job, work: Callable[[Job], Any]) -> None:
+        out = _QueueWriter(job)
+        try:
+            with redirect_stdout(out), redirect_stderr(out):  # type: ignore[type-var]
+                result = work(job)
+            out.flush()
+            self._events.put(("done", job, result))
+        except JobCancelled:
+            out.flush()
+            self._events.put(("cancelled", job))
+        except BaseException as e:
+            out.flush()
+            self._events.put(("error", job, e))
+
+    # --- wątek Tk ---
+    def _set_busy(self, busy: bool) -> None:
+        for w in self.busy:
+            w.configure(state="disabled" if busy else "normal")
+        if self.cancel_button is not None:
+            self.cancel_button.configure(state="normal" if busy else "disabled")
+
+    def _poll(self) -> None:
+        finished = None
+        while True:
+            try:
+                ev = self._events.get_nowait()
+            except queue.Empty:
+                break
+            kind = ev[0]
+            if kind == "log":
+                if self.on_log is not None:
+                    self.on_log(ev[1])
+                else:
+                    print(ev[1], file=sys.__stdout__)
+            elif kind == "progress":
+                if self.on_progress is not None:
+                    self.on_progress(ev[1], ev[2])
+            else:
+                finished = ev
+        if finished is None:
+            self.root.after(self.poll_ms, self._poll)
+            return
+
+        on_done, on_error = self._on_done, self._on_error
+        self._job = self._on_done = self._on_error = None
+        self._set_busy(False)
+        if finished[0] == "done":
+            if on_done is not None:
+                on_done(finished[2])
+        elif finished[0] == "cancelled":
+            if self.on_log is not None:
+                self.on_log(f"[INFO] Przerwano: {finished[1].name}")
+        elif on_error is not None:
+            on_error(finished[2])
+        else:
+            messagebox.showerror("Błąd", str(finished[2]))